@@ -0,0 +1,235 @@
+# ai_integration/name_resolver.py
+# In-memory index of people names used to match assignee names extracted
+# from transcripts. Each organization's people are loaded once and kept
+# until the people collection version changes, so resolving a batch of
+# names costs no queries.
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from people.search import name_key
+
+logger = logging.getLogger(__name__)
+
+people_collection = settings.MONGODB_DB['people']
+users_collection = settings.MONGODB_DB['users']
+collection_versions_collection = settings.MONGODB_DB['collection_versions']
+
+# Common English nicknames -> canonical first name
+NICKNAMES = {
+    'abby': 'abigail', 'al': 'albert', 'alex': 'alexander', 'andy': 'andrew',
+    'bill': 'william', 'billy': 'william', 'bob': 'robert', 'bobby': 'robert',
+    'ben': 'benjamin', 'cathy': 'catherine', 'chris': 'christopher', 'dan': 'daniel',
+    'danny': 'daniel', 'dave': 'david', 'deb': 'deborah', 'dick': 'richard',
+    'ed': 'edward', 'eddie': 'edward', 'liz': 'elizabeth', 'beth': 'elizabeth',
+    'betty': 'elizabeth', 'fred': 'frederick', 'greg': 'gregory', 'jim': 'james',
+    'jimmy': 'james', 'jen': 'jennifer', 'jenny': 'jennifer', 'joe': 'joseph',
+    'joey': 'joseph', 'jon': 'jonathan', 'johnny': 'john', 'kate': 'katherine',
+    'katie': 'katherine', 'kathy': 'katherine', 'ken': 'kenneth', 'larry': 'lawrence',
+    'matt': 'matthew', 'mike': 'michael', 'mick': 'michael', 'nick': 'nicholas',
+    'pat': 'patrick', 'pete': 'peter', 'rob': 'robert', 'rick': 'richard',
+    'ron': 'ronald', 'sam': 'samuel', 'steve': 'stephen', 'sue': 'susan',
+    'ted': 'edward', 'tom': 'thomas', 'tommy': 'thomas', 'tony': 'anthony',
+    'vicky': 'victoria', 'will': 'william',
+}
+
+# Minimum score for a candidate to be accepted
+MATCH_THRESHOLD = 0.6
+
+
+def soundex(token):
+    """American Soundex code, e.g. "robert" -> "R163"."""
+    codes = {
+        **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+        **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+    }
+    letters = [c for c in token.lower() if c.isalpha()]
+    if not letters:
+        return ''
+
+    result = letters[0].upper()
+    previous = codes.get(letters[0], '')
+    for c in letters[1:]:
+        code = codes.get(c, '')
+        if code and code != previous:
+            result += code
+            if len(result) == 4:
+                break
+        if c not in 'hw':
+            previous = code
+    return result.ljust(4, '0')
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _canonical(token):
+    return NICKNAMES.get(token, token)
+
+
+def _token_score(query_token, candidate_token):
+    """How well one spoken name token matches one stored token (0 if not at all)"""
+    if query_token == candidate_token:
+        return 1.0
+    if _canonical(query_token) == _canonical(candidate_token):
+        return 0.9
+    # Allow one typo in short names, two in longer ones
+    limit = 1 if len(candidate_token) <= 5 else 2
+    distance = edit_distance(query_token, candidate_token, limit)
+    if distance <= limit:
+        return 0.85 - 0.1 * distance
+    if len(query_token) > 2 and soundex(query_token) == soundex(candidate_token):
+        return 0.7
+    # Initials ("j smith")
+    if len(query_token) == 1 and candidate_token.startswith(query_token):
+        return 0.6
+    return 0.0
+
+
+class PersonEntry:
+    """Name tokens of one person, as held by the index"""
+    __slots__ = ('person', 'key', 'tokens')
+
+    def __init__(self, person, username=None):
+        self.person = person
+        self.key = name_key(person.get('name'))
+        tokens = self.key.split()
+        tokens.extend(name_key(nickname) for nickname in person.get('nicknames', []) or [])
+        if username:
+            tokens.append(name_key(username))
+        self.tokens = [token for token in tokens if token]
+
+    def score(self, query_key, query_tokens):
+        if query_key == self.key:
+            return 1.0
+        # Every spoken token must match some stored token
+        total = 0.0
+        for query_token in query_tokens:
+            best = max((_token_score(query_token, token) for token in self.tokens), default=0.0)
+            if not best:
+                return 0.0
+            total += best
+        # Slightly prefer people whose whole name was spoken
+        coverage = min(len(query_tokens), len(self.key.split())) / max(len(self.key.split()), 1)
+        return total / len(query_tokens) * (0.9 + 0.1 * coverage)
+
+
+class NameResolver:
+    """
+    Per-organization in-memory name index.
+
+    Indexes are refreshed when the 'people' collection version is bumped;
+    the version is checked at most every NAME_RESOLVER_REFRESH_SECONDS.
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = (
+            refresh_seconds if refresh_seconds is not None
+            else getattr(settings, 'NAME_RESOLVER_REFRESH_SECONDS', 30)
+        )
+        self._indexes = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop all loaded indexes (call after changing people in this process)"""
+        with self._lock:
+            self._indexes = {}
+            self._checked_at = 0.0
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_seconds:
+            return
+        version_doc = collection_versions_collection.find_one({'_id': 'people'}, {'version': 1}) or {}
+        version = version_doc.get('version', 0)
+        if version != self._version:
+            self._indexes = {}
+            self._version = version
+        self._checked_at = now
+
+    def _load(self, organization):
+        query = {} if organization is None else {'organization': organization}
+        people = list(people_collection.find(query, {'name': 1, 'userId': 1, 'nicknames': 1, 'organization': 1}))
+        user_ids = [person['userId'] for person in people if person.get('userId')]
+        usernames = {
+            user['_id']: user.get('username')
+            for user in users_collection.find({'_id': {'$in': user_ids}}, {'username': 1})
+        }
+        entries = []
+        for person in people:
+            person['username'] = usernames.get(person.get('userId'))
+            entries.append(PersonEntry(person, person['username']))
+        logger.info(f"Loaded name index for organization {organization}: {len(entries)} people")
+        return entries
+
+    def _entries(self, organization):
+        with self._lock:
+            self._check_version()
+            if organization not in self._indexes:
+                self._indexes[organization] = self._load(organization)
+            return self._indexes[organization]
+
+    def resolve_many(self, names, organization=None):
+        """Resolve several names against one organization's index"""
+        entries = self._entries(organization)
+        return [self._resolve(name, entries) for name in names]
+
+    def resolve(self, name, organization=None):
+        """
+        Get the best matching person document for a spoken name, or None when
+        nothing is close enough or the best match is ambiguous.
+        """
+        return self.resolve_many([name], organization)[0]
+
+    def _resolve(self, name, entries):
+        query_key = name_key(name)
+        query_tokens = query_key.split()
+        if not query_tokens:
+            return None
+
+        best_score, best, runner_up = 0.0, None, 0.0
+        for entry in entries:
+            score = entry.score(query_key, query_tokens)
+            if score > best_score:
+                best_score, best, runner_up = score, entry, best_score
+            elif score > runner_up:
+                runner_up = score
+
+        if best is None or best_score < MATCH_THRESHOLD:
+            return None
+        if runner_up == best_score:
+            logger.info(f"Ambiguous assignee name '{name}'")
+            return None
+        return best.person
+
+
+def organization_for_username(username):
+    """Organization of the person linked to a username, or None"""
+    user = users_collection.find_one({'username': username}, {'_id': 1})
+    if not user:
+        return None
+    person = people_collection.find_one({'userId': user['_id']}, {'organization': 1})
+    return person.get('organization') if person else None
+
+
+name_resolver = NameResolver()
@@ -9,6 +9,8 @@ import openai
 from openai import OpenAI
 from django.conf import settings
 
+from project.metrics import openai_call, record_openai_retry, record_openai_usage
+
 logger = logging.getLogger(__name__)
 
 class OpenAIClient:
@@ -23,13 +25,14 @@ class OpenAIClient:
         self.max_retries = 3
         self.retry_delay = 2  # seconds
         
-    def _handle_api_error(self, error, attempt: int) -> bool:
+    def _handle_api_error(self, error, attempt: int, method: str) -> bool:
         """
         Handle API errors with appropriate retry logic
         
         Args:
             error: The exception that was raised
             attempt: Current attempt number
+            method: Client method that made the call, for metrics
             
         Returns:
             bool: True if should retry, False otherwise
@@ -38,12 +41,14 @@ class OpenAIClient:
             wait_time = min(2 ** attempt * self.retry_delay, 60)  # Exponential backoff, max 60s
             logger.warning(f"Rate limit reached. Retrying in {wait_time} seconds...")
             time.sleep(wait_time)
+            record_openai_retry(method, error)
             return True
             
         elif isinstance(error, openai.APITimeoutError):
             wait_time = min(2 ** attempt * self.retry_delay, 30)
             logger.warning(f"API timeout. Retrying in {wait_time} seconds...")
             time.sleep(wait_time)
+            record_openai_retry(method, error)
             return True
             
         elif isinstance(error, openai.APIConnectionError):
@@ -51,6 +56,7 @@ class OpenAIClient:
                 wait_time = self.retry_delay
                 logger.warning(f"API connection error. Retrying in {wait_time} seconds...")
                 time.sleep(wait_time)
+                record_openai_retry(method, error)
                 return True
                 
         # Log all errors
@@ -70,12 +76,14 @@ class OpenAIClient:
         for attempt in range(self.max_retries):
             try:
                 with open(audio_file_path, "rb") as audio_file:
-                    response = self.client.audio.transcriptions.create(
-                        file=audio_file,
-                        model="whisper-1",
-                        response_format="verbose_json",
-                        timestamp_granularities=["word"]
-                    )
+                    with openai_call('transcribe_audio'):
+                        response = self.client.audio.transcriptions.create(
+                            file=audio_file,
+                            model="whisper-1",
+                            response_format="verbose_json",
+                            timestamp_granularities=["word"]
+                        )
+                    record_openai_usage('transcribe_audio', response)
                     
                 return {
                     "text": response.text,
@@ -84,7 +92,7 @@ class OpenAIClient:
                 }
                     
             except Exception as e:
-                if not self._handle_api_error(e, attempt):
+                if not self._handle_api_error(e, attempt, 'transcribe_audio'):
                     raise
                     
         # If all retries failed
@@ -144,14 +152,16 @@ class OpenAIClient:
         
         for attempt in range(self.max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4",  # Or use "gpt-4" for better results
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.3  # Lower temperature for more consistent extraction
-                )
+                with openai_call('extract_tasks_from_text'):
+                    response = self.client.chat.completions.create(
+                        model="gpt-4",  # Or use "gpt-4" for better results
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_message}
+                        ],
+                        temperature=0.3  # Lower temperature for more consistent extraction
+                    )
+                record_openai_usage('extract_tasks_from_text', response)
                 
                 raw_content = response.choices[0].message.content.strip()
                 logger.debug(f"Raw GPT response:\n{raw_content}")
@@ -168,7 +178,7 @@ class OpenAIClient:
                 return json.loads(raw_content)
                 
             except Exception as e:
-                if not self._handle_api_error(e, attempt):
+                if not self._handle_api_error(e, attempt, 'extract_tasks_from_text'):
                     raise
         
         # If all retries failed
@@ -250,15 +260,17 @@ class OpenAIClient:
         
         for attempt in range(self.max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4",  # Use GPT-4 for better predictions
-                    response_format={"type": "json_object"},
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.5  # Balance between creativity and consistency
-                )
+                with openai_call('predict_upcoming_tasks'):
+                    response = self.client.chat.completions.create(
+                        model="gpt-4",  # Use GPT-4 for better predictions
+                        response_format={"type": "json_object"},
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_message}
+                        ],
+                        temperature=0.5  # Balance between creativity and consistency
+                    )
+                record_openai_usage('predict_upcoming_tasks', response)
                 
                 result = json.loads(response.choices[0].message.content)
                 
@@ -278,7 +290,7 @@ class OpenAIClient:
                 return predicted_tasks
                 
             except Exception as e:
-                if not self._handle_api_error(e, attempt):
+                if not self._handle_api_error(e, attempt, 'predict_upcoming_tasks'):
                     raise
         
         # If all retries failed
@@ -358,20 +370,22 @@ class OpenAIClient:
         
         for attempt in range(self.max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4",
-                    response_format={"type": "json_object"},
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.3
-                )
+                with openai_call('analyze_tasks_for_insights'):
+                    response = self.client.chat.completions.create(
+                        model="gpt-4",
+                        response_format={"type": "json_object"},
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_message}
+                        ],
+                        temperature=0.3
+                    )
+                record_openai_usage('analyze_tasks_for_insights', response)
                 
                 return json.loads(response.choices[0].message.content)
                 
             except Exception as e:
-                if not self._handle_api_error(e, attempt):
+                if not self._handle_api_error(e, attempt, 'analyze_tasks_for_insights'):
                     raise
         
         # If all retries failed
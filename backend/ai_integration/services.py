@@ -7,7 +7,10 @@ import openai
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Avg
-from .models import Task, User, Team, TranscriptionRecord, AITaskPrediction
+from bson import ObjectId
+from people.mongo_auth import MongoAuthUser
+from .models import Task, TranscriptionRecord, AITaskPrediction
+from .name_resolver import name_resolver, organization_for_username
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -136,28 +139,24 @@ def extract_tasks_from_transcript(transcript, user):
             task_titles = re.findall(r"Task:?\s*([^\n]+)", text_response)
             task_data = [{"title": title, "description": title} for title in task_titles]
             
+        # Resolve all assignee names in memory instead of scanning users per task
+        organization = organization_for_username(user.username)
+        assignees = name_resolver.resolve_many(
+            [task_item.get('assigned_to') or '' for task_item in task_data],
+            organization
+        )
+        
         # Create Task objects
         created_tasks = []
-        for task_item in task_data:
+        for task_item, assigned_person in zip(task_data, assignees):
             # Clean and extract data
             title = task_item.get('title', '')[:200]  # Limit to model field size
             description = task_item.get('description', '')
             
             # Handle assignee if mentioned
             assignee = None
-            assignee_name = task_item.get('assigned_to')
-            if assignee_name:
-                # Try to find user by name (simple match)
-                try:
-                    # Look for users with name containing the assignee_name
-                    assignee = User.objects.filter(
-                        username__icontains=assignee_name
-                    ).first() or User.objects.filter(
-                        first_name__icontains=assignee_name.split()[0] 
-                        if ' ' in assignee_name else assignee_name
-                    ).first()
-                except:
-                    pass
+            if assigned_person and assigned_person.get('username'):
+                assignee = MongoAuthUser.from_username(assigned_person['username'])
             
             # Parse priority
             priority = 2  # Default medium priority
@@ -222,12 +221,14 @@ def generate_task_predictions_with_gpt(user):
         # Gather context about the user
         recent_tasks = Task.objects.filter(assigned_to=user).order_by('-created_at')[:10]
         
-        # Get team context
-        teams = user.teams.all()
-        team_members = []
-        for team in teams:
-            team_members.extend([member.username for member in team.members.all() 
-                                if member != user])
+        # Get team context from the MongoDB teams and users collections
+        user_id = ObjectId(str(user.id))
+        teams = list(settings.MONGODB_DB['teams'].find({'members': user_id}, {'name': 1, 'members': 1}))
+        member_ids = {member for team in teams for member in team.get('members', []) if member != user_id}
+        team_members = [
+            member['username']
+            for member in settings.MONGODB_DB['users'].find({'_id': {'$in': list(member_ids)}}, {'username': 1})
+        ]
         
         # Get task patterns
         common_categories = Task.objects.filter(assigned_to=user).values(
@@ -256,7 +257,7 @@ def generate_task_predictions_with_gpt(user):
                     "due_date": task.due_date.isoformat() if task.due_date else None
                 } for task in recent_tasks
             ],
-            "teams": [team.name for team in teams],
+            "teams": [team.get('name') for team in teams],
             "team_members": team_members,
             "common_categories": [cat["category__name"] for cat in common_categories if cat["category__name"]],
             "recurring_patterns": recurring_patterns
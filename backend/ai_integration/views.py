@@ -21,6 +21,7 @@ from rest_framework.permissions import IsAuthenticated
 from .openai_client import OpenAIClient
 from tasks.models import tasks_collection
 from people.models import MongoUser  # Updated to use MongoUser
+from .name_resolver import name_resolver
 
 # Access MongoDB collections
 people_collection = settings.MONGODB_DB['people']
@@ -161,21 +162,13 @@ class ProcessAudioView(APIView):
                 logger.warning(f"Person not found for user {user_id}")
                 return extracted_tasks  # Return unprocessed tasks
                 
+            # Resolve all spoken assignee names against the in-memory name index
+            spoken_names = [task.get('assigned_person') or '' for task in extracted_tasks]
+            assignees = name_resolver.resolve_many(spoken_names, person.get('organization'))
+            
             processed_tasks = []
-            for task in extracted_tasks:
-                # Look up the assigned person by name if provided
-                assigned_to = None
-                if 'assigned_person' in task and task['assigned_person']:
-                    try:
-                        assigned_person = people_collection.find_one({
-                            'name': {'$regex': task['assigned_person'], '$options': 'i'},
-                            'organization': person['organization']
-                        })
-                        
-                        if assigned_person:
-                            assigned_to = str(assigned_person['_id'])
-                    except Exception as e:
-                        logger.error(f"Error looking up assigned person: {str(e)}")
+            for task, assigned_person in zip(extracted_tasks, assignees):
+                assigned_to = str(assigned_person['_id']) if assigned_person else None
                 
                 # Default to the current user if no assignee found
                 if not assigned_to:
@@ -1,6 +1,5 @@
 import os
 import django
-import pymongo
 from django.contrib.auth.hashers import make_password
 from datetime import datetime
 
@@ -8,10 +7,9 @@ from datetime import datetime
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 django.setup()
 
-from django.contrib.auth import get_user_model
 from django.conf import settings
-
-User = get_user_model()
+from people.registration import RegistrationConflict, register_user, role_for_name
+from people.search import name_key
 
 def create_superuser():
     # User details
@@ -19,20 +17,7 @@ def create_superuser():
     email = 'admin@example.com'
     password = 'adminpassword123'
     
-    # Create Django User
-    try:
-        user = User.objects.create_superuser(
-            username=username,
-            email=email,
-            password=password
-        )
-        print(f"Django superuser '{username}' created successfully!")
-    except Exception as e:
-        print(f"Error creating Django superuser: {e}")
-        user = User.objects.get(username=username)
-        print(f"Using existing Django superuser '{username}'")
-    
-    # Create MongoDB User
+    # Users live only in MongoDB; Django authenticates against them directly
     users_collection = settings.MONGODB_DB['users']
     
     # Check if MongoDB user exists
@@ -41,24 +26,38 @@ def create_superuser():
     if existing_user:
         print(f"MongoDB user '{username}' already exists")
     else:
-        # Create MongoDB user
+        admin_role = role_for_name('admin')
+        now = datetime.now()
         user_data = {
             'username': username,
             'email': email,
             'password': make_password(password),
             'first_name': 'Admin',
             'last_name': 'User',
+            'role': admin_role['_id'],
             'is_active': True,
             'is_staff': True,
             'is_superuser': True,
-            'created_at': datetime.now(),
-            'updated_at': datetime.now()
+            'created_at': now,
+            'updated_at': now
+        }
+        person_data = {
+            'name': 'Admin User',
+            'name_key': name_key('Admin User'),
+            'email': email,
+            'role': 'admin',
+            'teams': [],
+            'skills': [],
+            'created_at': now
         }
         
-        result = users_collection.insert_one(user_data)
-        print(f"MongoDB superuser '{username}' created with ID: {result.inserted_id}")
+        try:
+            register_user(user_data, person_data)
+            print(f"MongoDB superuser '{username}' created with ID: {user_data['_id']}")
+        except RegistrationConflict as e:
+            print(f"Error creating superuser: {e}")
     
     print("Superuser creation completed")
 
 if __name__ == '__main__':
-    create_superuser()
\ No newline at end of file
+    create_superuser()
@@ -0,0 +1,25 @@
+# gunicorn.conf.py
+# Run with: gunicorn -c gunicorn.conf.py project.wsgi
+# Workers share Prometheus metrics through files in PROMETHEUS_MULTIPROC_DIR
+# (see project.metrics); the directory is emptied when the master starts
+# and a worker's live gauges are dropped when it exits.
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+
+# Must be set before any worker imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'taskmgr-prometheus'))
+
+
+def on_starting(server):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
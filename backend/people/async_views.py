@@ -0,0 +1,47 @@
+# people/async_views.py
+# Async variants of the hot people read endpoints for the ASGI entry point
+from project.async_utils import (
+    aauthenticate_request, error_response, mongo_json_response,
+    not_modified, unauthorized_response, validated_response
+)
+from project.conditional import acollection_validators
+from utils.mongodb_connection import get_async_database
+
+
+async def people_list(request):
+    """Get a list of people for dropdowns"""
+    user = await aauthenticate_request(request)
+    if not user:
+        return unauthorized_response()
+
+    try:
+        db = get_async_database()
+        cursor = db['people'].find({}, {'name': 1, 'email': 1, 'role': 1})
+        formatted_people = [
+            {
+                'id': person.get('_id'),
+                'name': person.get('name', ''),
+                'email': person.get('email', ''),
+                'role': person.get('role', '')
+            }
+            async for person in cursor
+        ]
+        return mongo_json_response(formatted_people)
+    except Exception as e:
+        return error_response(f"Error fetching people: {str(e)}", 500)
+
+
+async def team_list(request):
+    """List all teams"""
+    user = await aauthenticate_request(request)
+    if not user:
+        return unauthorized_response()
+
+    db = get_async_database()
+    etag, last_modified = await acollection_validators(db, 'teams')
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    teams = await db['teams'].find().to_list(None)
+    return validated_response(teams, etag, last_modified)
@@ -4,11 +4,17 @@ from django.conf import settings
 from bson import ObjectId
 import datetime
 
+from project.caching import get_reference_data, get_reference_document, invalidate_reference_data
+from project.conditional import bump_collection_version
+from project.ratelimit import login_rate_limiter
+from . import user_cards
+
 # Django ORM User model for authentication
 class User(AbstractUser):
     """
-    Custom Django ORM User model to satisfy Django's authentication requirements.
-    The actual user data is stored in MongoDB and this model acts as a bridge.
+    Legacy Django ORM user table. Users live in MongoDB and authentication
+    reads them from there (see people.mongo_auth); this model remains for
+    AUTH_USER_MODEL and is read by `manage.py migrate_users_to_mongo`.
     """
     class Meta:
         verbose_name = 'user'
@@ -20,13 +26,7 @@ class User(AbstractUser):
         mongo_user = users_collection.find_one({'username': self.username})
         if mongo_user and 'role' in mongo_user:
             role_id = mongo_user['role']
-            if isinstance(role_id, str):
-                try:
-                    role_id = ObjectId(role_id)
-                except:
-                    return False
-            
-            role = roles_collection.find_one({'_id': role_id})
+            role = get_reference_document('roles', role_id)
             return role and role.get('permission_level', 0) >= 4
         return self.is_superuser
     
@@ -36,23 +36,21 @@ class User(AbstractUser):
         mongo_user = users_collection.find_one({'username': self.username})
         if mongo_user and 'role' in mongo_user:
             role_id = mongo_user['role']
-            if isinstance(role_id, str):
-                try:
-                    role_id = ObjectId(role_id)
-                except:
-                    return False
-                    
-            role = roles_collection.find_one({'_id': role_id})
+            role = get_reference_document('roles', role_id)
             return role and role.get('permission_level', 0) >= 3
         return self.is_superuser
     
-    def save(self, *args, **kwargs):
+    def save(self, *args, sync_to_mongo=True, **kwargs):
         """
-        Override save to sync with MongoDB
+        Override save to sync with MongoDB, so rows created by Django's own
+        tooling (e.g. createsuperuser) still reach the real user store.
         """
         # Call the Django ORM save
         super().save(*args, **kwargs)
         
+        if not sync_to_mongo:
+            return
+        
         # Sync with MongoDB - upsert the user
         mongo_data = {
             'username': self.username,
@@ -62,12 +60,19 @@ class User(AbstractUser):
             'is_active': self.is_active,
             'is_staff': self.is_staff,
             'is_superuser': self.is_superuser,
-            'updated_at': datetime.datetime.now()
         }
         
-        # Don't include password if it hasn't been set yet
-        if self.password:
+        # Only push the columns that were saved
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            mongo_data = {field: value for field, value in mongo_data.items() if field in update_fields}
+            mongo_data['username'] = self.username
+        
+        # Don't include password if it hasn't been set yet, or is only a placeholder
+        if self.password and self.has_usable_password() and (update_fields is None or 'password' in update_fields):
             mongo_data['password'] = self.password
+        
+        mongo_data['updated_at'] = datetime.datetime.now()
             
         # Upsert to MongoDB
         users_collection.update_one(
@@ -101,19 +106,8 @@ class MongoUser:
             
         result = users_collection.insert_one(user_data)
         user_data['_id'] = result.inserted_id
+        login_rate_limiter.forget_unknown_username(user_data.get('username'))
         
-        # Create Django user for authentication
-        try:
-            User.objects.create_user(
-                username=user_data.get('username', ''),
-                email=user_data.get('email', ''),
-                password=user_data.get('password', ''),
-                first_name=user_data.get('first_name', ''),
-                last_name=user_data.get('last_name', '')
-            )
-        except Exception as e:
-            print(f"Error creating Django user: {e}")
-            
         return user_data
     
     @staticmethod
@@ -158,23 +152,11 @@ class MongoUser:
             {'_id': user_id},
             {'$set': update_data}
         )
-        
-        # Update Django User if username is available
-        user = users_collection.find_one({'_id': user_id})
-        if user and 'username' in user:
-            try:
-                django_user = User.objects.get(username=user['username'])
-                if 'email' in update_data:
-                    django_user.email = update_data['email']
-                if 'first_name' in update_data:
-                    django_user.first_name = update_data['first_name']
-                if 'last_name' in update_data:
-                    django_user.last_name = update_data['last_name']
-                if 'password' in update_data:
-                    django_user.password = update_data['password']
-                django_user.save()
-            except User.DoesNotExist:
-                pass
+        user_cards.invalidate_user(user_id)
+        if any(field in update_data for field in ['role', 'is_staff', 'is_superuser']):
+            # Issued tokens carry the old role claims
+            from project.authentication import revoke_user_tokens
+            revoke_user_tokens(user_id)
         
         if result.modified_count > 0:
             return MongoUser.get_by_id(user_id)
@@ -190,6 +172,7 @@ class Role:
     def create(data):
         """Create a new role"""
         result = roles_collection.insert_one(data)
+        invalidate_reference_data('roles')
         data['_id'] = result.inserted_id
         return data
     
@@ -206,8 +189,8 @@ class Role:
     
     @staticmethod
     def get_all():
-        """Get all roles"""
-        return list(roles_collection.find())
+        """Get all roles (cached)"""
+        return get_reference_data('roles')
 
 
 class Team:
@@ -222,6 +205,7 @@ class Team:
             team_data['created_at'] = datetime.datetime.now()
             
         result = teams_collection.insert_one(team_data)
+        bump_collection_version('teams')
         team_data['_id'] = result.inserted_id
         return team_data
     
@@ -254,6 +238,7 @@ class Team:
             {'_id': team_id},
             {'$set': update_data}
         )
+        bump_collection_version('teams')
         
         if result.modified_count > 0:
             return Team.get_by_id(team_id)
@@ -278,6 +263,7 @@ class Team:
             {'_id': team_id},
             {'$addToSet': {'members': user_id}}
         )
+        bump_collection_version('teams')
         
         return result.modified_count > 0
     
@@ -300,5 +286,6 @@ class Team:
             {'_id': team_id},
             {'$pull': {'members': user_id}}
         )
+        bump_collection_version('teams')
         
         return result.modified_count > 0
\ No newline at end of file
@@ -0,0 +1,129 @@
+# people/mongo_auth.py
+# The user object handed to Django's auth framework, read straight from the
+# MongoDB users collection. It implements the parts of the user API that
+# authenticate(), login(), DRF and our permission classes rely on, so
+# authentication no longer needs the SQLite people.User table.
+import datetime
+
+from bson import ObjectId
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, is_password_usable, make_password
+
+from project.caching import get_reference_document
+from . import user_cards
+
+users_collection = settings.MONGODB_DB['users']
+
+# Attributes written back by save() when no update_fields are given
+SAVED_FIELDS = [
+    'username', 'email', 'first_name', 'last_name', 'password',
+    'is_active', 'is_staff', 'is_superuser', 'last_login',
+]
+
+
+class MongoAuthUser:
+    """A MongoDB user document wrapped as a Django auth user"""
+    USERNAME_FIELD = 'username'
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, document):
+        self.document = document
+        self.id = str(document['_id'])
+        self.pk = self.id
+        self.username = document.get('username', '')
+        self.email = document.get('email', '')
+        self.first_name = document.get('first_name', '')
+        self.last_name = document.get('last_name', '')
+        self.password = document.get('password', '')
+        self.is_active = document.get('is_active', True)
+        self.is_staff = document.get('is_staff', False)
+        self.is_superuser = document.get('is_superuser', False)
+        self.last_login = document.get('last_login')
+        self.role = str(document['role']) if document.get('role') else None
+
+    @classmethod
+    def from_id(cls, user_id):
+        if not user_id or not ObjectId.is_valid(str(user_id)):
+            return None
+        document = users_collection.find_one({'_id': ObjectId(str(user_id))})
+        return cls(document) if document else None
+
+    @classmethod
+    def from_username(cls, username):
+        document = users_collection.find_one({'username': username})
+        return cls(document) if document else None
+
+    def get_username(self):
+        return self.username
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def get_short_name(self):
+        return self.first_name
+
+    def check_password(self, raw_password):
+        """Verify a password, upgrading the stored hash if the hasher policy changed"""
+        def rehash(raw_password):
+            self.set_password(raw_password)
+            self.save(update_fields=['password'])
+        return check_password(raw_password, self.password, setter=rehash)
+
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password)
+
+    def set_unusable_password(self):
+        self.password = make_password(None)
+
+    def has_usable_password(self):
+        return is_password_usable(self.password)
+
+    def save(self, update_fields=None, **kwargs):
+        fields = update_fields or SAVED_FIELDS
+        changes = {field: getattr(self, field) for field in fields}
+        changes['updated_at'] = datetime.datetime.now()
+        users_collection.update_one({'_id': ObjectId(self.id)}, {'$set': changes})
+        self.document.update(changes)
+        user_cards.invalidate_user(self.id)
+
+    def _role(self):
+        return get_reference_document('roles', self.role) if self.role else None
+
+    def is_admin(self):
+        """Check if user has admin role"""
+        if self.role:
+            role = self._role()
+            return bool(role) and role.get('permission_level', 0) >= 4
+        return self.is_superuser
+
+    def is_manager(self):
+        """Check if user has manager role"""
+        if self.role:
+            role = self._role()
+            return bool(role) and role.get('permission_level', 0) >= 3
+        return self.is_superuser
+
+    @property
+    def mongo_user(self):
+        """The user document with its role resolved, for permission checks"""
+        return dict(self.document, role=self._role())
+
+    # Superusers get every permission; there are no per-object Django permissions
+    def has_perm(self, perm, obj=None):
+        return self.is_active and self.is_superuser
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        return self.is_active and self.is_superuser
+
+    def __eq__(self, other):
+        return str(getattr(other, 'id', None)) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.username
@@ -0,0 +1,141 @@
+# people/registration.py
+# Single-pass user registration. Username/email uniqueness is enforced by
+# unique indexes rather than pre-check reads, role ids come from the
+# reference data cache, and the user and person documents are inserted in
+# one multi-document transaction (or, on a standalone server without
+# transactions, inserted back to back with the user removed again if the
+# person insert fails).
+import logging
+import threading
+
+import pymongo
+from bson import ObjectId
+from django.conf import settings
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from project.caching import get_reference_data, invalidate_reference_data
+from project.conditional import bump_collection_version
+from project.ratelimit import login_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+users_collection = settings.MONGODB_DB['users']
+people_collection = settings.MONGODB_DB['people']
+roles_collection = settings.MONGODB_DB['roles']
+
+# Error code for "Transaction numbers are only allowed on a replica set member or mongos"
+ILLEGAL_OPERATION = 20
+
+_indexes_ready = False
+_transactions_supported = None
+_lock = threading.Lock()
+
+
+class RegistrationConflict(Exception):
+    """The username or email is already taken"""
+
+    def __init__(self, field):
+        super().__init__(f"{field.capitalize()} already exists")
+        self.field = field
+
+
+def ensure_user_indexes():
+    """Unique username and email indexes that registration relies on"""
+    users_collection.create_index([('username', pymongo.ASCENDING)], name='username_unique', unique=True)
+    users_collection.create_index(
+        [('email', pymongo.ASCENDING)], name='email_unique', unique=True,
+        partialFilterExpression={'email': {'$type': 'string'}}
+    )
+    people_collection.create_index([('userId', pymongo.ASCENDING)], name='userId')
+
+
+def _ensure_indexes_once():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with _lock:
+        if not _indexes_ready:
+            try:
+                ensure_user_indexes()
+            except OperationFailure as e:
+                # Existing duplicates: registration still works, without the guarantee
+                logger.error(f"Could not create unique user indexes: {str(e)}")
+            _indexes_ready = True
+
+
+def role_for_name(name):
+    """Role document by name from the cache, created on first use"""
+    for role in get_reference_data('roles'):
+        if role.get('name') == name:
+            return role
+
+    role = roles_collection.find_one_and_update(
+        {'name': name},
+        {'$setOnInsert': {
+            'name': name,
+            'description': f'{name.capitalize()} role',
+            'permission_level': 4 if name == 'admin' else 1
+        }},
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+    invalidate_reference_data('roles')
+    return role
+
+
+def _conflict(error):
+    """Map a duplicate key error on users to the offending field"""
+    key_pattern = (error.details or {}).get('keyPattern') or {}
+    return RegistrationConflict('email' if 'email' in key_pattern else 'username')
+
+
+def _insert_in_transaction(user, person):
+    with settings.MONGODB_DB.client.start_session() as session:
+        def insert(session):
+            users_collection.insert_one(user, session=session)
+            people_collection.insert_one(person, session=session)
+        session.with_transaction(insert)
+
+
+def _insert_without_transaction(user, person):
+    users_collection.insert_one(user)
+    try:
+        people_collection.insert_one(person)
+    except Exception:
+        users_collection.delete_one({'_id': user['_id']})
+        raise
+
+
+def register_user(user, person):
+    """
+    Insert a new user and the person linked to it, all or nothing.
+    ``_id``/``userId`` are assigned here. Raises RegistrationConflict when
+    the username or email is taken.
+    """
+    global _transactions_supported
+    _ensure_indexes_once()
+
+    user['_id'] = ObjectId()
+    person['_id'] = ObjectId()
+    person['userId'] = user['_id']
+
+    try:
+        if _transactions_supported is not False:
+            try:
+                _insert_in_transaction(user, person)
+                _transactions_supported = True
+            except OperationFailure as e:
+                if isinstance(e, DuplicateKeyError) or e.code != ILLEGAL_OPERATION:
+                    raise
+                logger.warning("MongoDB transactions unavailable (standalone server); registering without them")
+                _transactions_supported = False
+                _insert_without_transaction(user, person)
+        else:
+            _insert_without_transaction(user, person)
+    except DuplicateKeyError as e:
+        raise _conflict(e)
+
+    bump_collection_version('people')
+    # Every creation path comes through here, so a cached "unknown" never outlives the user
+    login_rate_limiter.forget_unknown_username(user.get('username'))
+    return user, person
@@ -0,0 +1,50 @@
+# people/search.py
+# Normalized name keys so name lookups can use an index instead of a
+# case-insensitive, unanchored $regex scan.
+import re
+import unicodedata
+
+import pymongo
+from django.conf import settings
+
+people_collection = settings.MONGODB_DB['people']
+
+
+def name_key(name):
+    """
+    Normalize a name for lookups: lowercase, accents stripped, single spaces.
+    "  José  Smith" -> "jose smith"
+    """
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+
+def name_prefix_query(prefix, organization=None):
+    """
+    Build a people query matching names that start with ``prefix``.
+    An anchored regex on a lowercase field is answered from the name_key index.
+    """
+    query = {'name_key': {'$regex': '^' + re.escape(name_key(prefix))}}
+    if organization is not None:
+        query['organization'] = organization
+    return query
+
+
+def ensure_people_indexes():
+    """Create the people name index and backfill name_key where it is missing"""
+    people_collection.create_index(
+        [('organization', pymongo.ASCENDING), ('name_key', pymongo.ASCENDING)],
+        name='organization_name_key'
+    )
+    people_collection.create_index([('name_key', pymongo.ASCENDING)], name='name_key')
+
+    updates = [
+        pymongo.UpdateOne({'_id': person['_id']}, {'$set': {'name_key': name_key(person.get('name'))}})
+        for person in people_collection.find({'name_key': {'$exists': False}}, {'name': 1})
+    ]
+    if updates:
+        people_collection.bulk_write(updates, ordered=False)
+    return len(updates)
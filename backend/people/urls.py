@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet, TeamViewSet, RoleViewSet, TeamAssignmentView, PeopleListView
+from . import async_views
 
 # Create a router and register our viewsets
 router = DefaultRouter()
@@ -13,4 +14,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('teams/assign/', TeamAssignmentView.as_view(), name='team-assign'),
     path('people/', PeopleListView.as_view(), name='people-list'),
-]
\ No newline at end of file
+    
+    # Async read path, served concurrently when running under ASGI
+    path('async/people/', async_views.people_list, name='async-people-list'),
+    path('async/teams/', async_views.team_list, name='async-team-list'),
+]
@@ -0,0 +1,248 @@
+# people/user_cards.py
+# Small denormalized summaries ("cards") of users and people, shown next to
+# tasks, comments, history and attachments. Every enrichment site reads them
+# from here: an in-process LRU with a TTL, optionally backed by a shared
+# Django cache so several workers load each card once. Writes to users or
+# people must call invalidate_user / invalidate_person.
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from project.metrics import record_cache_lookups
+from tasks.models import id_variants
+
+logger = logging.getLogger(__name__)
+
+users_collection = settings.MONGODB_DB['users']
+people_collection = settings.MONGODB_DB['people']
+
+USER = 'user'
+PERSON = 'person'
+
+USER_CARD_PROJECTION = {'username': 1, 'first_name': 1, 'last_name': 1, 'email': 1, 'role': 1}
+PERSON_CARD_PROJECTION = {'userId': 1, 'name': 1, 'role': 1, 'email': 1}
+
+
+def _user_card(user):
+    name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+    return {
+        'id': str(user['_id']),
+        'username': user.get('username', ''),
+        'first_name': user.get('first_name', ''),
+        'last_name': user.get('last_name', ''),
+        'name': name or user.get('username', ''),
+        'email': user.get('email', ''),
+        'role': str(user['role']) if user.get('role') else None
+    }
+
+
+def _person_card(person):
+    return {
+        'id': str(person['_id']),
+        'user_id': str(person['userId']) if person.get('userId') else None,
+        'name': person.get('name', ''),
+        'role': person.get('role', ''),
+        'email': person.get('email', '')
+    }
+
+
+LOADERS = {
+    USER: (users_collection, USER_CARD_PROJECTION, _user_card),
+    PERSON: (people_collection, PERSON_CARD_PROJECTION, _person_card),
+}
+
+
+class CardCache:
+    """Thread-safe LRU of cards keyed by (kind, id) with per-entry expiry"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # user id -> keys of person cards linked to that user
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                elif entry:
+                    self._drop(key)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, cards):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, card in cards.items():
+                self._entries[key] = (expires, card)
+                self._entries.move_to_end(key)
+                if key[0] == PERSON and card.get('user_id'):
+                    self._by_user.setdefault(card['user_id'], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def pop_user(self, user_id):
+        """Drop a user's card and any person cards linked to it; returns the keys dropped"""
+        with self._lock:
+            keys = [(USER, user_id)] + list(self._by_user.pop(user_id, ()))
+            for key in keys:
+                self._drop(key)
+        return keys
+
+    def pop(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry and key[0] == PERSON and entry[1].get('user_id'):
+            linked = self._by_user.get(entry[1]['user_id'])
+            if linked:
+                linked.discard(key)
+                if not linked:
+                    del self._by_user[entry[1]['user_id']]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_cache = CardCache(
+    getattr(settings, 'USER_CARD_CACHE_SIZE', 5000),
+    getattr(settings, 'USER_CARD_CACHE_SECONDS', 30)
+)
+
+
+def _shared_cache():
+    """The optional cross-process cache named by USER_CARD_SHARED_CACHE, or None"""
+    alias = getattr(settings, 'USER_CARD_SHARED_CACHE', None)
+    if not alias:
+        return None
+    from django.core.cache import caches
+    return caches[alias]
+
+
+def _shared_key(key):
+    return f'user-card:{key[0]}:{key[1]}'
+
+
+def _shared_get(keys):
+    shared = _shared_cache()
+    if not shared or not keys:
+        return {}
+    try:
+        stored = shared.get_many([_shared_key(key) for key in keys])
+    except Exception as e:
+        logger.warning(f"Shared user card cache unavailable: {str(e)}")
+        return {}
+    return {key: stored[_shared_key(key)] for key in keys if _shared_key(key) in stored}
+
+
+def _shared_set(cards):
+    shared = _shared_cache()
+    if not shared or not cards:
+        return
+    try:
+        shared.set_many({_shared_key(key): card for key, card in cards.items()}, timeout=_cache.ttl)
+    except Exception as e:
+        logger.warning(f"Shared user card cache unavailable: {str(e)}")
+
+
+def _shared_delete(keys):
+    shared = _shared_cache()
+    if not shared or not keys:
+        return
+    try:
+        shared.delete_many([_shared_key(key) for key in keys])
+    except Exception as e:
+        logger.warning(f"Shared user card cache unavailable: {str(e)}")
+
+
+def get_many(ids, kind=USER):
+    """
+    Get cards for the given ids as {str(id): card}, loading everything not
+    cached in one $in query. Ids may be strings or ObjectIds; unknown ids
+    are left out. Cards are shared between callers, so treat them as read-only.
+    """
+    keys = list({(kind, str(value)) for value in ids if value})
+    if not keys:
+        return {}
+
+    cards = _cache.get_many(keys)
+    missing = [key for key in keys if key not in cards]
+
+    if missing:
+        from_shared = _shared_get(missing)
+        if from_shared:
+            _cache.set_many(from_shared)
+            cards.update(from_shared)
+            missing = [key for key in missing if key not in from_shared]
+
+    # Hits from either tier count; only Mongo loads are misses
+    record_cache_lookups('user_cards', len(keys) - len(missing), len(missing))
+
+    if missing:
+        collection, projection, build = LOADERS[kind]
+        loaded = {}
+        for document in collection.find({'_id': {'$in': id_variants(key[1] for key in missing)}}, projection):
+            card = build(document)
+            loaded[(kind, card['id'])] = card
+        _cache.set_many(loaded)
+        _shared_set(loaded)
+        cards.update(loaded)
+
+    return {key[1]: card for key, card in cards.items()}
+
+
+def get(card_id, kind=USER):
+    if not card_id:
+        return None
+    return get_many([card_id], kind).get(str(card_id))
+
+
+def invalidate_user(user_id):
+    """Forget a user's card and the cards of people linked to that user"""
+    keys = _cache.pop_user(str(user_id))
+    # Person cards cached only in the shared cache are found via the people collection
+    keys += [
+        (PERSON, str(person['_id']))
+        for person in people_collection.find({'userId': {'$in': id_variants([user_id])}}, {'_id': 1})
+    ]
+    _shared_delete(list(set(keys)))
+
+
+def invalidate_person(person_id):
+    key = (PERSON, str(person_id))
+    _cache.pop(key)
+    _shared_delete([key])
+
+
+def cache_stats():
+    """Hit/miss counters of this process's cache, exported for monitoring"""
+    return _cache.stats()
@@ -12,27 +12,22 @@ import datetime
 import logging
 
 from .permissions import IsAdminOrManager, IsSelfOrAdmin
+from . import user_cards
+from .models import Role
+from project.authentication import revoke_user_tokens
+from project.caching import invalidate_reference_data
+from project.ratelimit import login_rate_limiter
+from project.conditional import (
+    bump_collection_version, collection_validators, not_modified_response, set_validators
+)
 
 # Get MongoDB collections
 users_collection = settings.MONGODB_DB['users']
 roles_collection = settings.MONGODB_DB['roles']
 teams_collection = settings.MONGODB_DB['teams']
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+logger = logging.getLogger(__name__)
 
-def convert_objectids(obj):
-    for key in obj:
-        if isinstance(obj[key], ObjectId):
-            obj[key] = str(obj[key])
-    return obj
-    
 class UserViewSet(viewsets.ViewSet):
     """
     API endpoint for user management
@@ -41,7 +36,7 @@ class UserViewSet(viewsets.ViewSet):
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [permissions.IsAuthenticated, IsSelfOrAdmin]
-        elif self.action == 'create':
+        elif self.action in ['create', 'card_cache_stats']:
             permission_classes = [permissions.IsAuthenticated, IsAdminOrManager]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -51,12 +46,6 @@ class UserViewSet(viewsets.ViewSet):
         """List all users"""
         users = list(users_collection.find())
         
-        # Convert ObjectId to string for serialization
-        for user in users:
-            user['_id'] = str(user['_id'])
-            if 'role' in user and user['role'] and isinstance(user['role'], ObjectId):
-                user['role'] = str(user['role'])
-        
         return Response(users)
     
     def retrieve(self, request, pk=None):
@@ -71,11 +60,6 @@ class UserViewSet(viewsets.ViewSet):
         if not user:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Convert ObjectId to string for serialization
-        user['_id'] = str(user['_id'])
-        if 'role' in user and user['role'] and isinstance(user['role'], ObjectId):
-            user['role'] = str(user['role'])
-        
         return Response(user)
     
     def create(self, request):
@@ -98,10 +82,10 @@ class UserViewSet(viewsets.ViewSet):
         
         # Insert into MongoDB
         result = users_collection.insert_one(user_data)
+        login_rate_limiter.forget_unknown_username(user_data.get('username'))
         
         # Get the created user
         created_user = users_collection.find_one({'_id': result.inserted_id})
-        created_user['_id'] = str(created_user['_id'])
         
         return Response(created_user, status=status.HTTP_201_CREATED)
     
@@ -136,14 +120,14 @@ class UserViewSet(viewsets.ViewSet):
         
         # Update in MongoDB
         users_collection.update_one({'_id': user_id}, {'$set': update_data})
+        user_cards.invalidate_user(user_id)
+        if any(field in update_data for field in ['role', 'is_staff', 'is_superuser']):
+            # Issued tokens carry the old role claims
+            revoke_user_tokens(user_id)
         
         # Get the updated user
         updated_user = users_collection.find_one({'_id': user_id})
-        updated_user['_id'] = str(updated_user['_id'])
         
-        if 'role' in updated_user and updated_user['role'] and isinstance(updated_user['role'], ObjectId):
-            updated_user['role'] = str(updated_user['role'])
-            
         return Response(updated_user)
     
     def destroy(self, request, pk=None):
@@ -160,8 +144,15 @@ class UserViewSet(viewsets.ViewSet):
         
         # Delete from MongoDB
         users_collection.delete_one({'_id': user_id})
+        user_cards.invalidate_user(user_id)
+        revoke_user_tokens(user_id)
         
         return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=False, methods=['get'], url_path='card-cache-stats')
+    def card_cache_stats(self, request):
+        """Hit ratio of this worker's user-card cache"""
+        return Response(user_cards.cache_stats())
 
 class TeamViewSet(viewsets.ViewSet):
     """
@@ -177,20 +168,14 @@ class TeamViewSet(viewsets.ViewSet):
     
     def list(self, request):
         """List all teams"""
+        etag, last_modified = collection_validators('teams')
+        cached = not_modified_response(request, etag, last_modified)
+        if cached:
+            return cached
+        
         teams = list(teams_collection.find())
         
-        # Convert ObjectId fields to strings
-        for team in teams:
-            team['_id'] = str(team['_id'])
-            if 'leader' in team and team['leader'] and isinstance(team['leader'], ObjectId):
-                team['leader'] = str(team['leader'])
-            if 'organization' in team and team['organization'] and isinstance(team['organization'], ObjectId):
-                team['organization'] = str(team['organization'])
-            if 'members' in team and team['members']:
-                team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                                  for member in team['members']]
-        
-        return Response(teams)
+        return set_validators(Response(teams), etag, last_modified)
     
     def retrieve(self, request, pk=None):
         """Get a specific team"""
@@ -204,16 +189,6 @@ class TeamViewSet(viewsets.ViewSet):
         if not team:
             return Response({"error": "Team not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Convert ObjectId fields to strings
-        team['_id'] = str(team['_id'])
-        if 'leader' in team and team['leader'] and isinstance(team['leader'], ObjectId):
-            team['leader'] = str(team['leader'])
-        if 'organization' in team and team['organization'] and isinstance(team['organization'], ObjectId):
-                team['organization'] = str(team['organization'])
-        if 'members' in team and team['members']:
-            team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                              for member in team['members']]
-        
         return Response(team)
     
     def create(self, request):
@@ -237,18 +212,11 @@ class TeamViewSet(viewsets.ViewSet):
         
         # Insert into MongoDB
         result = teams_collection.insert_one(team_data)
+        bump_collection_version('teams')
         
         # Get the created team
         created_team = teams_collection.find_one({'_id': result.inserted_id})
         
-        # Convert ObjectId fields to strings for response
-        created_team['_id'] = str(created_team['_id'])
-        if 'leader' in created_team and created_team['leader'] and isinstance(created_team['leader'], ObjectId):
-            created_team['leader'] = str(created_team['leader'])
-        if 'members' in created_team and created_team['members']:
-            created_team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                                        for member in created_team['members']]
-        
         return Response(created_team, status=status.HTTP_201_CREATED)
     
     def update(self, request, pk=None):
@@ -289,18 +257,11 @@ class TeamViewSet(viewsets.ViewSet):
         
         # Update in MongoDB
         teams_collection.update_one({'_id': team_id}, {'$set': update_data})
+        bump_collection_version('teams')
         
         # Get the updated team
         updated_team = teams_collection.find_one({'_id': team_id})
         
-        # Convert ObjectId fields to strings for response
-        updated_team['_id'] = str(updated_team['_id'])
-        if 'leader' in updated_team and updated_team['leader'] and isinstance(updated_team['leader'], ObjectId):
-            updated_team['leader'] = str(updated_team['leader'])
-        if 'members' in updated_team and updated_team['members']:
-            updated_team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                                        for member in updated_team['members']]
-        
         return Response(updated_team)
     
     def destroy(self, request, pk=None):
@@ -317,6 +278,7 @@ class TeamViewSet(viewsets.ViewSet):
         
         # Delete from MongoDB
         teams_collection.delete_one({'_id': team_id})
+        bump_collection_version('teams')
         
         return Response(status=status.HTTP_204_NO_CONTENT)
     
@@ -352,19 +314,12 @@ class TeamViewSet(viewsets.ViewSet):
             {'_id': team_id},
             {'$addToSet': {'members': user_id}}
         )
+        bump_collection_version('teams')
         
         if result.modified_count > 0:
             # Get the updated team
             updated_team = teams_collection.find_one({'_id': team_id})
             
-            # Convert ObjectId fields to strings for response
-            updated_team['_id'] = str(updated_team['_id'])
-            if 'leader' in updated_team and updated_team['leader'] and isinstance(updated_team['leader'], ObjectId):
-                updated_team['leader'] = str(updated_team['leader'])
-            if 'members' in updated_team and updated_team['members']:
-                updated_team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                                          for member in updated_team['members']]
-            
             return Response(updated_team)
         else:
             return Response({"message": "User is already a member of this team"})
@@ -396,19 +351,12 @@ class TeamViewSet(viewsets.ViewSet):
             {'_id': team_id},
             {'$pull': {'members': user_id}}
         )
+        bump_collection_version('teams')
         
         if result.modified_count > 0:
             # Get the updated team
             updated_team = teams_collection.find_one({'_id': team_id})
             
-            # Convert ObjectId fields to strings for response
-            updated_team['_id'] = str(updated_team['_id'])
-            if 'leader' in updated_team and updated_team['leader'] and isinstance(updated_team['leader'], ObjectId):
-                updated_team['leader'] = str(updated_team['leader'])
-            if 'members' in updated_team and updated_team['members']:
-                updated_team['members'] = [str(member) if isinstance(member, ObjectId) else member 
-                                          for member in updated_team['members']]
-            
             return Response(updated_team)
         else:
             return Response({"message": "User is not a member of this team"})
@@ -427,11 +375,7 @@ class RoleViewSet(viewsets.ViewSet):
     
     def list(self, request):
         """List all roles"""
-        roles = list(roles_collection.find())
-        
-        # Convert ObjectId to string for serialization
-        for role in roles:
-            role['_id'] = str(role['_id'])
+        roles = Role.get_all()
         
         return Response(roles)
     
@@ -447,9 +391,6 @@ class RoleViewSet(viewsets.ViewSet):
         if not role:
             return Response({"error": "Role not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Convert ObjectId to string for serialization
-        role['_id'] = str(role['_id'])
-        
         return Response(role)
     
     def create(self, request):
@@ -458,10 +399,10 @@ class RoleViewSet(viewsets.ViewSet):
         
         # Insert into MongoDB
         result = roles_collection.insert_one(role_data)
+        invalidate_reference_data('roles')
         
         # Get the created role
         created_role = roles_collection.find_one({'_id': result.inserted_id})
-        created_role['_id'] = str(created_role['_id'])
         
         return Response(created_role, status=status.HTTP_201_CREATED)
     
@@ -481,10 +422,10 @@ class RoleViewSet(viewsets.ViewSet):
         
         # Update in MongoDB
         roles_collection.update_one({'_id': role_id}, {'$set': update_data})
+        invalidate_reference_data('roles')
         
         # Get the updated role
         updated_role = roles_collection.find_one({'_id': role_id})
-        updated_role['_id'] = str(updated_role['_id'])
         
         return Response(updated_role)
     
@@ -511,6 +452,7 @@ class RoleViewSet(viewsets.ViewSet):
         
         # Delete from MongoDB
         roles_collection.delete_one({'_id': role_id})
+        invalidate_reference_data('roles')
         
         return Response(status=status.HTTP_204_NO_CONTENT)
     
@@ -554,6 +496,7 @@ class TeamAssignmentView(APIView):
                 {'_id': team_id_obj},
                 {'$addToSet': {'members': {'$each': user_id_objs}}}
             )
+            bump_collection_version('teams')
             
             # Access people collection
             people_collection = settings.MONGODB_DB['people']
@@ -567,12 +510,11 @@ class TeamAssignmentView(APIView):
             
             return Response({
                 "message": f"Successfully added {len(user_ids)} users to the team",
-                "team_id": str(team_id_obj),
-                "added_users": [str(user_id) for user_id in user_id_objs]
+                "team_id": team_id_obj,
+                "added_users": user_id_objs
             })
             
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.error(f"Error assigning users to team: {str(e)}")
             return Response(
                 {"error": f"Failed to assign users to team: {str(e)}"},
@@ -593,7 +535,7 @@ class PeopleListView(APIView):
             formatted_people = []
             for person in people:
                 formatted_people.append({
-                    'id': str(person.get('_id')),
+                    'id': person.get('_id'),
                     'name': person.get('name', ''),
                     'email': person.get('email', ''),
                     'role': person.get('role', '')
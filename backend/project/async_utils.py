@@ -0,0 +1,59 @@
+# project/async_utils.py
+# Helpers shared by the plain async Django views served under ASGI
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from project.authentication import MongoJWTAuthentication
+from project.conditional import is_not_modified, set_validators
+from project.renderers import MongoJSONEncoder
+
+
+def authenticate_request(request, allow_query_token=False):
+    """
+    Authenticate from the Authorization header, optionally falling back to a
+    ?token= query parameter (EventSource can't set headers)
+    """
+    auth = MongoJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None and allow_query_token:
+        raw_token = request.GET.get('token')
+    if not raw_token:
+        return None
+
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def aauthenticate_request(request, allow_query_token=False):
+    return await sync_to_async(authenticate_request)(request, allow_query_token)
+
+
+def mongo_json_response(data, status=200):
+    """JsonResponse that encodes raw MongoDB documents like the DRF renderer"""
+    return JsonResponse(data, status=status, safe=False, encoder=MongoJSONEncoder)
+
+
+def error_response(message, status):
+    return mongo_json_response({"error": message}, status=status)
+
+
+def unauthorized_response():
+    return error_response("Authentication credentials were not provided", 401)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 if the client's copy is current, otherwise None so the
+    caller can load the data and finish with ``validated_response``
+    """
+    if is_not_modified(request, etag, last_modified):
+        return set_validators(HttpResponse(status=304), etag, last_modified)
+    return None
+
+
+def validated_response(data, etag, last_modified):
+    return set_validators(mongo_json_response(data), etag, last_modified)
@@ -2,24 +2,24 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.contrib.auth import get_user_model
 from django.conf import settings
 from bson import ObjectId
 import datetime
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 import logging
 
-# Basic configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+from people import user_cards
+from people.registration import RegistrationConflict, register_user, role_for_name
+from people.mongo_auth import MongoAuthUser
+from people.search import name_key
+from project.authentication import revocation_list, revoke_user_tokens, tokens_for_user
+from project.caching import get_reference_document
+from project.ratelimit import client_ip, login_rate_limiter
+from project.conditional import bump_collection_version
+
+logger = logging.getLogger(__name__)
 
-User = get_user_model()
 
 # Access MongoDB collections
 users_collection = settings.MONGODB_DB['users']
@@ -38,42 +38,13 @@ class RegisterView(APIView):
             first_name = request.data.get('first_name', '')
             last_name = request.data.get('last_name', '')
             
-            # Check MongoDB first
-            mongo_user = users_collection.find_one({'username': username})
-            if mongo_user:
-                return Response(
-                    {"error": "Username already exists"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            if users_collection.find_one({'email': email}):
-                return Response(
-                    {"error": "Email already exists"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Check if user exists in Django but not in MongoDB
-            django_user_exists = User.objects.filter(username=username).exists()
-            
             # Get role information
             is_admin = request.data.get('is_admin', False)
             if isinstance(is_admin, str):
                 is_admin = is_admin.lower() == 'true'
                 
             role_name = 'admin' if is_admin else 'team_member'
-        
-            # Get or create appropriate role in MongoDB
-            role = roles_collection.find_one({'name': role_name})
-            if not role:
-                role_data = {
-                    'name': role_name,
-                    'description': f'{role_name.capitalize()} role',
-                    'permission_level': 4 if role_name == 'admin' else 1
-                }
-                role_result = roles_collection.insert_one(role_data)
-                role_id = role_result.inserted_id
-            else:
-                role_id = role['_id']
+            role = role_for_name(role_name)
         
             # Create MongoDB user with role
             from django.contrib.auth.hashers import make_password
@@ -86,21 +57,18 @@ class RegisterView(APIView):
                 'is_active': True,
                 'is_staff': is_admin,
                 'is_superuser': is_admin,
-                'role': role_id,
+                'role': role['_id'],
                 'created_at': datetime.datetime.now(),
                 'updated_at': datetime.datetime.now()
             }
         
-            # Insert into MongoDB
-            result = users_collection.insert_one(mongo_data)
-        
             # Prepare person name (use username if both first and last names are empty)
             person_name = f"{first_name} {last_name}".strip() or username
             
-            # Create person record linked to this user
+            # Person record linked to this user
             person_data = {
-                'userId': result.inserted_id,
                 'name': person_name,
+                'name_key': name_key(person_name),
                 'email': email,
                 'role': role_name,
                 'teams': [],
@@ -108,38 +76,15 @@ class RegisterView(APIView):
                 'organization': ObjectId("000000000000000000000001"),  # Default organization ID
                 'created_at': datetime.datetime.now()
             }
-        
-            # Add person to people collection
-            people_collection = settings.MONGODB_DB['people']
-            person_result = people_collection.insert_one(person_data)
-            
-            # Create or get Django user for authentication
-            if django_user_exists:
-                django_user = User.objects.get(username=username)
-                # Update password if it changed
-                django_user.set_password(request.data['password'])
-                # Update other fields
-                django_user.email = email
-                django_user.first_name = first_name
-                django_user.last_name = last_name
-            else:
-                django_user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=request.data['password'],
-                    first_name=first_name,
-                    last_name=last_name
-                )
             
-            # Set staff and superuser status if admin
-            if is_admin:
-                django_user.is_staff = True
-                django_user.is_superuser = True
+            # Insert both in one transaction; unique indexes reject taken usernames/emails
+            try:
+                register_user(mongo_data, person_data)
+            except RegistrationConflict as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            django_user.save()
-            
-            # Generate JWT token
-            refresh = RefreshToken.for_user(django_user)
+            # Generate JWT token carrying the Mongo id and role
+            refresh = tokens_for_user(MongoAuthUser(mongo_data), role)
             tokens = {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -148,7 +93,7 @@ class RegisterView(APIView):
             # Prepare response data
             response_data = {
                 'user': {
-                    'id': str(result.inserted_id),
+                    'id': mongo_data['_id'],
                     'username': mongo_data['username'],
                     'email': mongo_data['email'],
                     'first_name': first_name,
@@ -161,12 +106,7 @@ class RegisterView(APIView):
             return Response(response_data, status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            # Creating a logger
-            logger = logging.getLogger(__name__)
-            logger.error(f"Registration failed: {str(e)}")
-            # Print stack trace for debugging
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"Registration failed: {str(e)}")
             return Response(
                 {"error": f"Registration failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -190,6 +130,23 @@ class LoginView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Throttle before any lookup or password hash
+            retry_after = login_rate_limiter.check(username, client_ip(request))
+            if retry_after:
+                response = Response(
+                    {"error": "Too many login attempts, try again later"},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+            
+            # Recently seen unknown usernames fail without touching the database
+            if login_rate_limiter.is_unknown_username(username):
+                return Response(
+                    {"error": "Invalid credentials"},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            
             # Authenticate user (this will use our custom auth backend)
             from django.contrib.auth import authenticate
             user = authenticate(request, username=username, password=password)
@@ -200,26 +157,21 @@ class LoginView(APIView):
                     status=status.HTTP_401_UNAUTHORIZED
                 )
 
-            # Generate JWT token
-            refresh = RefreshToken.for_user(user)
+            # The backend returns the MongoDB user, so no second lookup is needed
+            role = get_reference_document('roles', user.role) if user.role else None
+            role_name = role.get('name') if role else None
+            
+            # Generate JWT token; the Mongo id and role ride along as claims
+            refresh = tokens_for_user(user, role)
             tokens = {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
             }
             
-            # Get MongoDB user data for additional info
-            mongo_user = users_collection.find_one({'username': username})
-            role_name = None
-            
-            if mongo_user and 'role' in mongo_user and mongo_user['role']:
-                role = roles_collection.find_one({'_id': mongo_user['role']})
-                if role:
-                    role_name = role.get('name')
-            
             # Prepare response data
             response_data = {
                 'user': {
-                    'id': str(mongo_user['_id']) if mongo_user else str(user.id),
+                    'id': user.document['_id'],
                     'username': user.username,
                     'email': user.email,
                     'first_name': user.first_name,
@@ -238,6 +190,33 @@ class LoginView(APIView):
             )
 
 
+class LogoutView(APIView):
+    """
+    API endpoint for logging out: revokes the access token used for the
+    request and, if given, the refresh token
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            if request.auth is not None and 'jti' in request.auth:
+                revocation_list.revoke_token(request.auth)
+            
+            if request.data.get('refresh'):
+                try:
+                    revocation_list.revoke_token(RefreshToken(request.data['refresh']))
+                except TokenError:
+                    return Response({"error": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            return Response(status=status.HTTP_204_NO_CONTENT)
+            
+        except Exception as e:
+            return Response(
+                {"error": f"Logout failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class UserProfileView(APIView):
     """
     API endpoint for getting and updating user profile
@@ -264,7 +243,7 @@ class UserProfileView(APIView):
             
             # Prepare response data
             user_data = {
-                'id': str(mongo_user['_id']),
+                'id': mongo_user['_id'],
                 'username': mongo_user['username'],
                 'email': mongo_user['email'],
                 'first_name': mongo_user.get('first_name', ''),
@@ -309,16 +288,6 @@ class UserProfileView(APIView):
             if 'role' in allowed_fields and update_data['role']:
                 update_data['role'] = roles_collection.find_one({'name': update_data['role']}).get('_id')
             
-            # Update Django user
-            if 'email' in update_data:
-                user.email = update_data['email']
-            if 'first_name' in update_data:
-                user.first_name = update_data['first_name']
-            if 'last_name' in update_data:
-                user.last_name = update_data['last_name']
-            
-            user.save()
-            
             # Update MongoDB user
             update_data['updated_at'] = datetime.datetime.now()
             users_collection.update_one(
@@ -328,10 +297,15 @@ class UserProfileView(APIView):
             
             # Get updated user data
             updated_user = users_collection.find_one({'_id': mongo_user['_id']})
+            claims_changed = any(
+                updated_user.get(field) != mongo_user.get(field) for field in ['role', 'is_staff', 'is_superuser']
+            )
             
             # Create person record linked to this user
+            person_name = updated_user['first_name'] + ' ' + updated_user['username']
             person_data = {
-                'name': updated_user['first_name'] + ' ' + updated_user['username'],
+                'name': person_name,
+                'name_key': name_key(person_name),
                 'email': updated_user['email'],
                 'role': role_name
             }
@@ -342,11 +316,13 @@ class UserProfileView(APIView):
                 {'userId': updated_user['_id']},
                 {'$set': person_data}
             )
+            bump_collection_version('people')
+            user_cards.invalidate_user(updated_user['_id'])
             
             # Prepare response data
             response_data = {
                 'bio': '',
-                'id': str(updated_user['_id']),
+                'id': updated_user['_id'],
                 'username': updated_user['username'],
                 'email': updated_user['email'],
                 'first_name': updated_user['first_name'],
@@ -355,6 +331,11 @@ class UserProfileView(APIView):
                 'profile_picture': None
             }
             
+            # Tokens carry the role, so replace them when it changes
+            if claims_changed:
+                revoke_user_tokens(updated_user['_id'])
+                response_data['token'] = str(tokens_for_user(MongoAuthUser(updated_user)).access_token)
+            
             return Response(response_data)
             
         except Exception as e:
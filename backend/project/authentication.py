@@ -0,0 +1,240 @@
+# project/authentication.py
+# Stateless JWT authentication. Tokens issued at login/register carry the
+# Mongo user id, role and permission level, so a request is authenticated
+# from the token alone: no SQLite user row, no Mongo user/role lookups.
+# Revocation is checked against an in-process copy of the revoked_tokens
+# collection that is refreshed every few seconds.
+import datetime
+import threading
+import time
+
+import pymongo
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from people.mongo_auth import MongoAuthUser
+from project.caching import get_reference_document
+
+revoked_tokens_collection = settings.MONGODB_DB['revoked_tokens']
+
+# Claim marking tokens that carry the principal; older tokens fall back to a DB load
+PRINCIPAL_CLAIM = 'mongo_id'
+
+
+class MongoPrincipal:
+    """
+    The authenticated user as described by the token claims. Quacks like the
+    Django user for the parts the views use (id, username, is_authenticated,
+    is_admin()/is_manager()), with ``id`` being the Mongo user id.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, claims):
+        self.id = claims[PRINCIPAL_CLAIM]
+        self.pk = self.id
+        self.username = claims.get('username', '')
+        self.role = claims.get('role')
+        self.role_name = claims.get('role_name')
+        self.permission_level = claims.get('permission_level')
+        self.is_staff = claims.get('is_staff', False)
+        self.is_superuser = claims.get('is_superuser', False)
+
+    def is_admin(self):
+        if self.permission_level is None:
+            return self.is_superuser
+        return self.permission_level >= 4
+
+    def is_manager(self):
+        if self.permission_level is None:
+            return self.is_superuser
+        return self.permission_level >= 3
+
+    @property
+    def mongo_user(self):
+        """Minimal user document for checks that read the role's permission level"""
+        role = {'permission_level': self.permission_level} if self.permission_level is not None else None
+        return {'_id': self.id, 'username': self.username, 'role': role}
+
+    def __eq__(self, other):
+        return str(getattr(other, 'id', None)) == str(self.id)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.username
+
+
+def principal_claims(mongo_user, role=None):
+    """Claims describing a Mongo user; ``role`` is looked up when not given"""
+    if role is None and mongo_user.get('role'):
+        role = get_reference_document('roles', mongo_user['role'])
+    return {
+        PRINCIPAL_CLAIM: str(mongo_user['_id']),
+        'username': mongo_user.get('username', ''),
+        'role': str(role['_id']) if role else None,
+        'role_name': role.get('name') if role else None,
+        'permission_level': role.get('permission_level') if role else None,
+        'is_staff': bool(mongo_user.get('is_staff', False)),
+        'is_superuser': bool(mongo_user.get('is_superuser', False)),
+    }
+
+
+def tokens_for_user(user, role=None):
+    """
+    Refresh token (and, via ``.access_token``, an access token) for a
+    MongoAuthUser, carrying the principal claims. auth_time survives
+    refreshes, so revoking a user's tokens also covers access tokens
+    refreshed later.
+    """
+    refresh = RefreshToken.for_user(user)
+    for claim, value in principal_claims(user.document, role).items():
+        refresh[claim] = value
+    refresh['auth_time'] = int(time.time())
+    return refresh
+
+
+class RevocationList:
+    """
+    In-process view of revoked_tokens. Entries are either a single token
+    (``jti``) or every token of a user issued before ``not_before``.
+    Checks are set/dict lookups; new entries are pulled incrementally.
+    """
+
+    def __init__(self):
+        self._jtis = {}
+        self._users = {}
+        self._loaded_until = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        interval = getattr(settings, 'JWT_REVOCATION_REFRESH_SECONDS', 5)
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < interval:
+                return
+            query = {}
+            if self._loaded_until:
+                query['revoked_at'] = {'$gte': self._loaded_until}
+            started = datetime.datetime.now()
+            for entry in revoked_tokens_collection.find(query):
+                self._add(entry)
+            self._loaded_until = started - datetime.timedelta(seconds=1)
+            self._checked_at = now
+            self._prune()
+
+    def _add(self, entry):
+        if entry.get('jti'):
+            self._jtis[entry['jti']] = entry['expires_at']
+        elif entry.get('user_id'):
+            current = self._users.get(entry['user_id'])
+            if not current or current[0] < entry['not_before']:
+                self._users[entry['user_id']] = (entry['not_before'], entry['expires_at'])
+
+    def _prune(self):
+        now = datetime.datetime.now()
+        self._jtis = {jti: expires for jti, expires in self._jtis.items() if expires > now}
+        self._users = {user: entry for user, entry in self._users.items() if entry[1] > now}
+
+    def is_revoked(self, token):
+        self._refresh()
+        if token.get('jti') in self._jtis:
+            return True
+        user_entry = self._users.get(token.get(PRINCIPAL_CLAIM))
+        if user_entry:
+            issued = token.get('auth_time') or token.get('iat') or 0
+            return issued < user_entry[0]
+        return False
+
+    def revoke_token(self, token):
+        """Revoke one token (access or refresh) until it would have expired anyway"""
+        entry = {
+            'jti': token['jti'],
+            'user_id': token.get(PRINCIPAL_CLAIM),
+            'revoked_at': datetime.datetime.now(),
+            'expires_at': datetime.datetime.fromtimestamp(token['exp']),
+        }
+        revoked_tokens_collection.insert_one(entry)
+        with self._lock:
+            self._add(entry)
+
+    def revoke_user(self, user_id):
+        """Revoke every token issued to a user so far, e.g. after a role change"""
+        now = datetime.datetime.now()
+        entry = {
+            'user_id': str(user_id),
+            'not_before': int(time.time()),
+            'revoked_at': now,
+            'expires_at': now + settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'],
+        }
+        revoked_tokens_collection.insert_one(entry)
+        with self._lock:
+            self._add(entry)
+
+
+revocation_list = RevocationList()
+
+
+def revoke_user_tokens(user_id):
+    revocation_list.revoke_user(user_id)
+
+
+def ensure_revocation_indexes():
+    revoked_tokens_collection.create_index(
+        [('expires_at', pymongo.ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0
+    )
+    revoked_tokens_collection.create_index([('revoked_at', pymongo.ASCENDING)], name='revoked_at')
+
+
+class MongoJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds a MongoPrincipal from the token claims.
+    Tokens issued before the claims existed load the user from MongoDB.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocation_list.is_revoked(token):
+            raise InvalidToken("Token has been revoked")
+        return token
+
+    def get_user(self, validated_token):
+        if PRINCIPAL_CLAIM in validated_token:
+            return MongoPrincipal(validated_token)
+        user = MongoAuthUser.from_id(validated_token.get(api_settings.USER_ID_CLAIM))
+        if not user or not user.is_active:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return user
+
+
+class RevocationAwareRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to refresh revoked tokens or tokens of deactivated users.
+    The user is read from MongoDB rather than the Django user table.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocation_list.is_revoked(refresh):
+            raise InvalidToken("Token has been revoked")
+
+        user = MongoAuthUser.from_id(refresh.get(PRINCIPAL_CLAIM) or refresh.get(api_settings.USER_ID_CLAIM))
+        if not user or not user.is_active:
+            raise AuthenticationFailed("No active account found for the given token", code="no_active_account")
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,153 @@
+# project/benchmarking.py
+# Small HTTP load driver used by the benchmark management commands
+import asyncio
+import os
+import re
+import statistics
+import time
+
+import httpx
+
+
+# mongo;dur=12.3;desc="4 queries" as set by project.profiling
+SERVER_TIMING_MONGO = re.compile(r'mongo;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def process_rss_mb(pid):
+    """Resident set size of a process in MB (Linux only), or None"""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+def process_tree_rss_mb(pid):
+    """RSS of a server process plus its workers, so multi-worker servers compare fairly"""
+    if not pid:
+        return None
+    total = process_rss_mb(pid)
+    if total is None:
+        return None
+    try:
+        for child in os.listdir('/proc'):
+            if not child.isdigit():
+                continue
+            try:
+                with open(f"/proc/{child}/stat") as f:
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if parent == int(pid):
+                total += process_rss_mb(child) or 0
+    except OSError:
+        pass
+    return total
+
+
+def process_tree_cpu_seconds(pid):
+    """User+system CPU time of a server process and its workers (Linux only), or None"""
+    if not pid:
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    total = 0.0
+    found = False
+    try:
+        pids = [name for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return None
+    for candidate in pids:
+        try:
+            with open(f"/proc/{candidate}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # fields[1] is the parent pid, fields[11]/[12] are utime/stime
+        if int(candidate) == int(pid) or fields[1] == str(pid):
+            total += (int(fields[11]) + int(fields[12])) / ticks
+            found = True
+    return total if found else None
+
+
+async def run_load(url, headers=None, concurrency=10, duration=10.0, timeout=30.0,
+                   method='GET', payload=None):
+    """
+    Hit a URL from ``concurrency`` workers for ``duration`` seconds.
+    ``url`` and ``payload`` (a JSON body) may be callables returning a
+    fresh value per request.
+
+    Returns a dict with request count, errors, requests/sec and latency
+    percentiles in milliseconds, plus MongoDB queries per request when the
+    server reports them in Server-Timing (request profiling enabled).
+    """
+    latencies = []
+    query_counts = []
+    query_ms = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, timeout=timeout, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                target = url() if callable(url) else url
+                body = payload() if callable(payload) else payload
+                try:
+                    response = await client.request(method, target, json=body)
+                    if response.status_code >= 400:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                timing = SERVER_TIMING_MONGO.search(response.headers.get('server-timing', ''))
+                if timing:
+                    query_ms.append(float(timing.group(1)))
+                    query_counts.append(int(timing.group(2)))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'url': url if isinstance(url, str) else None,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'queries_per_request': statistics.fmean(query_counts) if query_counts else None,
+        'max_queries_per_request': max(query_counts) if query_counts else None,
+        'mongo_ms_per_request': statistics.fmean(query_ms) if query_ms else None,
+    }
+
+
+def login(base_url, username, password):
+    """Get an access token for the benchmark user"""
+    response = httpx.post(
+        f"{base_url.rstrip('/')}/api/auth/login/",
+        json={'username': username, 'password': password},
+        timeout=30.0
+    )
+    response.raise_for_status()
+    return response.json()['token']
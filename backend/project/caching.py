@@ -0,0 +1,63 @@
+# project/caching.py
+# Read-through cache for small reference collections (task categories,
+# security levels, roles) on top of Django's cache framework. Which tier
+# holds them is picked by REFERENCE_DATA_CACHE: 'local' for a per-process
+# cache, 'default' for whatever CACHE_BACKEND configures (file or Redis to
+# share between workers). Writes through the models or ViewSets call
+# invalidate_reference_data, which only clears the calling process's copy
+# in a per-process tier; settings keep those copies for seconds, not minutes.
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import record_cache_lookups
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_COLLECTIONS = ['task_categories', 'security_levels', 'roles']
+
+
+def reference_cache():
+    return caches[getattr(settings, 'REFERENCE_DATA_CACHE', 'default')]
+
+
+def _key(name):
+    return f'reference:{name}'
+
+
+def get_reference_data(name):
+    """
+    All documents of a reference collection, loaded from Mongo on a miss.
+    A cache outage falls back to reading Mongo directly.
+    """
+    cache = reference_cache()
+    try:
+        documents = cache.get(_key(name))
+    except Exception as e:
+        logger.warning(f"Reference data cache unavailable: {str(e)}")
+        return list(settings.MONGODB_DB[name].find())
+
+    record_cache_lookups('reference_data', int(documents is not None), int(documents is None))
+    if documents is None:
+        documents = list(settings.MONGODB_DB[name].find())
+        try:
+            cache.set(_key(name), documents, getattr(settings, 'REFERENCE_DATA_CACHE_SECONDS', 300))
+        except Exception as e:
+            logger.warning(f"Reference data cache unavailable: {str(e)}")
+    return documents
+
+
+def get_reference_document(name, document_id):
+    """One document of a reference collection by _id (either id form), or None"""
+    for document in get_reference_data(name):
+        if str(document['_id']) == str(document_id):
+            return document
+    return None
+
+
+def invalidate_reference_data(name):
+    try:
+        reference_cache().delete(_key(name))
+    except Exception as e:
+        logger.warning(f"Reference data cache unavailable: {str(e)}")
@@ -0,0 +1,107 @@
+import hashlib
+import datetime
+
+from bson import json_util
+from django.conf import settings
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# Per-collection write counters for collections without updated_at timestamps
+collection_versions_collection = settings.MONGODB_DB['collection_versions']
+
+
+def bump_collection_version(name):
+    """Invalidate validators for a collection after a write"""
+    collection_versions_collection.update_one(
+        {'_id': name},
+        {'$inc': {'version': 1}, '$set': {'updated_at': datetime.datetime.now()}},
+        upsert=True
+    )
+
+
+def collection_validators(name):
+    """
+    Get (etag, last_modified) for a whole collection from its version counter
+    """
+    doc = collection_versions_collection.find_one({'_id': name}) or {}
+    return _collection_validators(name, doc)
+
+
+async def acollection_validators(db, name):
+    """Async variant of collection_validators for the ASGI read path"""
+    doc = await db['collection_versions'].find_one({'_id': name}) or {}
+    return _collection_validators(name, doc)
+
+
+def _collection_validators(name, doc):
+    etag = quote_etag(f"{name}-{doc.get('version', 0)}")
+    return etag, doc.get('updated_at')
+
+
+def _scope_pipeline(query):
+    return [
+        {'$match': query},
+        {'$group': {'_id': None, 'count': {'$sum': 1}, 'last_modified': {'$max': '$updated_at'}}}
+    ]
+
+
+def scope_validators(collection, query):
+    """
+    Get (etag, last_modified) for the documents matching a query.
+
+    The validator is derived from the query itself plus the count and the
+    newest updated_at of the matching documents, computed in a single
+    aggregation without materializing the documents.
+    """
+    stats = list(collection.aggregate(_scope_pipeline(query)))
+    return _scope_validators(collection.name, query, stats)
+
+
+async def ascope_validators(collection, query):
+    """Async variant of scope_validators for the ASGI read path"""
+    cursor = await collection.aggregate(_scope_pipeline(query))
+    stats = await cursor.to_list(None)
+    return _scope_validators(collection.name, query, stats)
+
+
+def _scope_validators(name, query, stats):
+    count = stats[0]['count'] if stats else 0
+    last_modified = stats[0]['last_modified'] if stats else None
+    if not isinstance(last_modified, datetime.datetime):
+        last_modified = None
+
+    digest = hashlib.md5(json_util.dumps(query).encode('utf-8'))
+    digest.update(f"{count}:{last_modified.isoformat() if last_modified else ''}".encode('utf-8'))
+    return quote_etag(f"{name}-{digest.hexdigest()}"), last_modified
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """Check whether the client's cached copy is still valid"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(
+        if_modified_since and last_modified and int(last_modified.timestamp()) <= if_modified_since
+    )
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Return a 304 response if the client's cached copy is still valid, else None
+    """
+    if is_not_modified(request, etag, last_modified):
+        return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return None
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified headers so clients can revalidate cheaply"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
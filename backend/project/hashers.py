@@ -0,0 +1,41 @@
+# project/hashers.py
+# Password hashers whose cost comes from settings.PASSWORD_HASHER_PARAMS, so
+# it can be tuned per deployment (see `manage.py benchmark_auth`). They keep
+# Django's algorithm names: existing hashes still verify, and hashes made
+# with weaker parameters are upgraded on the next successful login. Hashes
+# are never rehashed downwards, and PBKDF2 never goes below Django's default.
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, must_update_salt
+
+
+def _params(name):
+    return getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(name, {})
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _params('argon2').get('time_cost', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _params('argon2').get('memory_cost', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _params('argon2').get('parallelism', Argon2PasswordHasher.parallelism)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        weaker = decoded['time_cost'] < self.time_cost or decoded['memory_cost'] < self.memory_cost
+        return weaker or must_update_salt(decoded['salt'], self.salt_entropy)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return max(_params('pbkdf2').get('iterations', 0), PBKDF2PasswordHasher.iterations)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded['iterations'] < self.iterations or must_update_salt(decoded['salt'], self.salt_entropy)
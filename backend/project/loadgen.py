@@ -0,0 +1,393 @@
+# project/loadgen.py
+# Synthetic data for load and scale testing: organizations, teams with
+# skewed membership, people (some with user accounts), tasks with subtask
+# hierarchies and blocking edges, comments, history and AI predictions.
+# Everything is derived from one seed (ids included), so two runs with the
+# same seed and options produce identical data, and every document carries
+# ``synthetic: True`` so it can be removed again without touching real data.
+# Tasks get uuid strings like Task.create, and comments, history, parents and
+# blocking edges refer to them by that same string, as the task routes expect.
+# Documents are generated lazily and written with insert_many in batches per
+# collection, so memory stays flat apart from the people/teams index.
+import collections
+import datetime
+import itertools
+import random
+import struct
+import uuid
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from people.search import name_key
+from project.conditional import bump_collection_version
+
+SYNTHETIC = {'synthetic': True}
+GENERATED_COLLECTIONS = [
+    'organizations', 'teams', 'people', 'users', 'tasks', 'comments', 'task_history', 'ai_task_predictions',
+]
+# Generated collections whose validators come from a version counter, not updated_at
+VERSIONED_COLLECTIONS = ['teams', 'people']
+
+FIRST_NAMES = [
+    'Ada', 'Ben', 'Chen', 'Dana', 'Eli', 'Fatima', 'Goran', 'Hana', 'Ivan', 'Jun',
+    'Kofi', 'Lena', 'Mateo', 'Nia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sven', 'Tariq',
+]
+LAST_NAMES = [
+    'Abe', 'Brown', 'Costa', 'Diaz', 'Eriksen', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones',
+    'Kim', 'Lopez', 'Moreau', 'Novak', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Weber',
+]
+SKILLS = ['python', 'design', 'sales', 'writing', 'analytics', 'support', 'devops', 'finance', 'legal', 'research']
+TASK_VERBS = ['Draft', 'Review', 'Update', 'Migrate', 'Fix', 'Plan', 'Test', 'Document', 'Ship', 'Audit']
+TASK_OBJECTS = [
+    'quarterly report', 'onboarding guide', 'billing service', 'search index', 'release notes',
+    'customer survey', 'design mockups', 'API client', 'budget forecast', 'security review',
+]
+COMMENTS = [
+    'Started on this.', 'Blocked on review.', 'Can we move the deadline?', 'Done, please check.',
+    'Needs more detail.', 'Looks good to me.', 'Picking this up tomorrow.', 'See the attached notes.',
+]
+
+# (value, weight) pairs for task fields
+STATUS_WEIGHTS = [('backlog', 10), ('todo', 30), ('in_progress', 20), ('review', 10), ('done', 25), ('archived', 5)]
+PRIORITY_WEIGHTS = [(1, 30), (2, 40), (3, 22), (4, 8)]
+# Statuses a task passes through to reach each status, for its history
+STATUS_PATHS = {
+    'backlog': [], 'todo': [], 'in_progress': ['in_progress'], 'review': ['in_progress', 'review'],
+    'done': ['in_progress', 'review', 'done'], 'archived': ['in_progress', 'done', 'archived'],
+}
+
+MAX_DEPTH = 4
+# Recent tasks that new tasks may be nested under or blocked by
+RECENT_TASKS = 2000
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative weights where rank r gets 1/r**exponent, for random.choices"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class BatchWriter:
+    """Per-collection buffers flushed with insert_many every ``batch_size`` documents"""
+
+    def __init__(self, db, batch_size, stdout=None):
+        self.db = db
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.counts = collections.Counter()
+        self._buffers = collections.defaultdict(list)
+
+    def add(self, name, document):
+        buffer = self._buffers[name]
+        buffer.append(document)
+        if len(buffer) >= self.batch_size:
+            self._flush(name)
+
+    def _flush(self, name):
+        buffer = self._buffers[name]
+        if buffer:
+            self.db[name].insert_many(buffer, ordered=False, bypass_document_validation=True)
+            self.counts[name] += len(buffer)
+            self._buffers[name] = []
+
+    def flush(self):
+        for name in list(self._buffers):
+            self._flush(name)
+        if self.stdout is not None:
+            self.stdout.write(', '.join(f'{count} {name}' for name, count in sorted(self.counts.items())))
+
+
+class LoadDataGenerator:
+    """
+    Builds and inserts a synthetic dataset into ``db``. ``stdout`` (a
+    management command's) gets a progress line per stage.
+    """
+
+    # Task timestamps fall in the year after this date, whenever the run happens
+    BASE_TIME = datetime.datetime(2025, 1, 1)
+
+    def __init__(self, db, seed=0, batch_size=5000, stdout=None):
+        self.db = db
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.stdout = stdout
+        self.writer = BatchWriter(db, batch_size, stdout)
+        self._next_id = itertools.count()
+
+    @property
+    def counts(self):
+        return dict(self.writer.counts)
+
+    def object_id(self, when=None):
+        """Deterministic ObjectId: ``when`` as the timestamp, then seed and a counter"""
+        timestamp = int((when or self.BASE_TIME).replace(tzinfo=datetime.timezone.utc).timestamp())
+        return ObjectId(struct.pack('>IIL', timestamp, self.seed & 0xFFFFFFFF, next(self._next_id)))
+
+    def task_id(self):
+        """Deterministic uuid4 string, the form Task.create gives task ids"""
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def moment(self, start=None, days=365):
+        """A datetime up to ``days`` after ``start`` (BASE_TIME by default)"""
+        return (start or self.BASE_TIME) + datetime.timedelta(seconds=self.random.randrange(days * 86400))
+
+    def weighted(self, pairs):
+        values, weights = zip(*pairs)
+        return self.random.choices(values, weights)[0]
+
+    def count_around(self, mean):
+        """A non-negative integer with the given mean and a long tail"""
+        return int(self.random.expovariate(1.0 / mean)) if mean > 0 else 0
+
+    def organizations(self, count):
+        organizations = []
+        for number in range(count):
+            organization = dict(SYNTHETIC, **{
+                '_id': self.object_id(),
+                'name': f'Load Org {number + 1}',
+                'description': 'Synthetic organization for load testing',
+                'created_at': self.BASE_TIME,
+            })
+            self.writer.add('organizations', organization)
+            organizations.append(organization['_id'])
+        return organizations
+
+    def people(self, count, organization_ids, teams_per_org, users_ratio, roles, password):
+        """
+        People (and user accounts for ``users_ratio`` of them) spread over
+        organizations and teams by Zipf weights, so a few teams are huge
+        and most are small. Returns the people index and the teams, whose
+        member lists are filled in here.
+        """
+        org_weights = zipf_weights(len(organization_ids), 0.8)
+        team_weights = zipf_weights(teams_per_org)
+        teams = {
+            organization_id: [
+                {'_id': self.object_id(), 'organization': organization_id, 'members': [], 'leader': None}
+                for _ in range(teams_per_org)
+            ]
+            for organization_id in organization_ids
+        }
+
+        people = []
+        for number in range(count):
+            organization_id = self.random.choices(organization_ids, cum_weights=org_weights)[0]
+            memberships = {
+                team['_id']: team
+                for team in self.random.choices(
+                    teams[organization_id], cum_weights=team_weights, k=1 + min(2, self.count_around(0.5))
+                )
+            }
+            first_name, last_name = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+            name = f'{first_name} {last_name} {number + 1}'
+            role_name = 'manager' if self.random.random() < 0.05 else 'team_member'
+            person = dict(SYNTHETIC, **{
+                '_id': self.object_id(),
+                'name': name,
+                'name_key': name_key(name),
+                'email': f'person{number + 1}@load.example.com',
+                'role': role_name,
+                'organization': organization_id,
+                'teams': list(memberships),
+                'skills': self.random.sample(SKILLS, self.random.randint(0, 3)),
+                'created_at': self.BASE_TIME,
+            })
+
+            user_id = None
+            if self.random.random() < users_ratio:
+                user_id = self.object_id()
+                person['userId'] = user_id
+                self.writer.add('users', dict(SYNTHETIC, **{
+                    '_id': user_id,
+                    'username': f'load_user_{number + 1}',
+                    'email': person['email'],
+                    'password': password,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'role': roles.get(role_name),
+                    'is_active': True,
+                    'is_staff': False,
+                    'is_superuser': False,
+                    'created_at': self.BASE_TIME,
+                    'updated_at': self.BASE_TIME,
+                }))
+                for team in memberships.values():
+                    team['members'].append(user_id)
+                    if role_name == 'manager' and team['leader'] is None:
+                        team['leader'] = user_id
+
+            self.writer.add('people', person)
+            people.append((person['_id'], user_id, person['teams']))
+
+        for organization_id, org_teams in teams.items():
+            for number, team in enumerate(org_teams):
+                self.writer.add('teams', dict(SYNTHETIC, **team, **{
+                    'name': f'Team {number + 1}',
+                    'description': 'Synthetic team',
+                    'created_at': self.BASE_TIME,
+                }))
+        if self.stdout is not None:
+            self.stdout.write(f'Generated {count} people in {len(organization_ids) * teams_per_org} teams')
+        return people
+
+    def tasks(self, count, people, subtask_ratio, blocking_ratio, comments_per_task, categories):
+        """
+        Tasks assigned by Zipf weight over people, nested under and blocked
+        by recent tasks (so hierarchies stay within MAX_DEPTH and the
+        blocking graph stays acyclic), each with comments and history.
+        """
+        person_weights = zipf_weights(len(people), 0.9)
+        users = [user_id for _, user_id, _ in people if user_id] or [None]
+        recent = collections.deque(maxlen=RECENT_TASKS)
+        blocked_by = collections.defaultdict(list)
+
+        for _ in range(count):
+            person_id, _, teams = self.random.choices(people, cum_weights=person_weights)[0]
+            creator = self.random.choice(users)
+            created = self.moment()
+            status = self.weighted(STATUS_WEIGHTS)
+            task = dict(SYNTHETIC, **{
+                '_id': self.task_id(),
+                'title': f'{self.random.choice(TASK_VERBS)} {self.random.choice(TASK_OBJECTS)}',
+                'description': 'Synthetic task for load testing',
+                'status': status,
+                'priority': self.weighted(PRIORITY_WEIGHTS),
+                'assigned_to': str(person_id),
+                'assigned_by': str(creator) if creator else None,
+                'team': str(self.random.choice(teams)),
+                'category': self.random.choice(categories) if categories else None,
+                'due_date': self.moment(created, 60),
+                'parent': None,
+                'ancestors': [],
+                'depth': 0,
+                'created_at': created,
+                'updated_at': created,
+            })
+
+            if recent and self.random.random() < subtask_ratio:
+                parent_id, ancestors = self.random.choice(recent)
+                task.update(parent=parent_id, ancestors=ancestors + [parent_id], depth=len(ancestors) + 1)
+            if recent and self.random.random() < blocking_ratio:
+                blockers = list({blocker for blocker, _ in self.random.sample(recent, min(len(recent), self.random.randint(1, 3)))})
+                task['blocking_tasks'] = blockers
+                for blocker in blockers:
+                    blocked_by[blocker].append(task['_id'])
+            if task['depth'] < MAX_DEPTH:
+                recent.append((task['_id'], task['ancestors']))
+
+            self.writer.add('tasks', task)
+            self.history(task, creator, created)
+            for _ in range(self.count_around(comments_per_task)):
+                moment = self.moment(created, 30)
+                self.writer.add('comments', dict(SYNTHETIC, **{
+                    '_id': self.object_id(moment),
+                    'task_id': str(task['_id']),
+                    'author': self.random.choice(users),
+                    'content': self.random.choice(COMMENTS),
+                    'created_at': moment,
+                    'updated_at': moment,
+                }))
+
+        # Reverse edges go on tasks that are already written
+        self.writer.flush()
+        updates = (
+            UpdateOne({'_id': blocker}, {'$set': {'blocked_by_tasks': blocked}})
+            for blocker, blocked in blocked_by.items()
+        )
+        while True:
+            batch = list(itertools.islice(updates, self.writer.batch_size))
+            if not batch:
+                break
+            self.db['tasks'].bulk_write(batch, ordered=False)
+
+    def history(self, task, user_id, created):
+        """task_created plus a status_change per step to the task's status"""
+        task_id = str(task['_id'])
+        user = str(user_id) if user_id else None
+        self.writer.add('task_history', dict(SYNTHETIC, **{
+            '_id': self.object_id(created),
+            'task_id': task_id,
+            'user_id': user,
+            'change_type': 'task_created',
+            'new_value': f"Task '{task['title']}' created",
+            'timestamp': created,
+        }))
+        old_status = 'todo'
+        moment = created
+        for new_status in STATUS_PATHS[task['status']]:
+            moment = self.moment(moment, 7)
+            self.writer.add('task_history', dict(SYNTHETIC, **{
+                '_id': self.object_id(moment),
+                'task_id': task_id,
+                'user_id': user,
+                'change_type': 'status_change',
+                'old_value': old_status,
+                'new_value': new_status,
+                'timestamp': moment,
+            }))
+            old_status = new_status
+
+    def predictions(self, people, per_user, now):
+        """Open AI predictions for people with accounts, expiring after ``now``"""
+        for person_id, user_id, _ in people:
+            if not user_id:
+                continue
+            for _ in range(self.count_around(per_user)):
+                self.writer.add('ai_task_predictions', dict(SYNTHETIC, **{
+                    '_id': self.object_id(),
+                    'user_id': user_id,
+                    'person_id': person_id,
+                    'title': f'{self.random.choice(TASK_VERBS)} {self.random.choice(TASK_OBJECTS)}',
+                    'description': 'Synthetic prediction',
+                    'priority': self.random.choice(['low', 'medium', 'high']),
+                    'confidence': round(self.random.uniform(0.4, 0.95), 2),
+                    'converted_to_task': None,
+                    'was_accurate': None,
+                    'created_at': now,
+                    'expires_at': now + datetime.timedelta(days=self.random.randint(1, 30)),
+                }))
+
+    def generate(self, tasks, people=None, organizations=1, teams_per_org=10, users_ratio=0.2,
+                 subtask_ratio=0.3, blocking_ratio=0.1, comments_per_task=2.0, predictions_per_user=3.0,
+                 password=None):
+        """
+        Insert a whole dataset; people defaults to one per 20 tasks.
+        ``password`` is one already-hashed password shared by every user.
+        Returns {collection: documents inserted}.
+        """
+        people = people or max(10, tasks // 20)
+        roles = {role['name']: role['_id'] for role in self.db['roles'].find({}, {'name': 1})}
+        categories = [category['_id'] for category in self.db['task_categories'].find({}, {'_id': 1})]
+
+        organization_ids = self.organizations(organizations)
+        people_index = self.people(people, organization_ids, teams_per_org, users_ratio, roles, password or '!')
+        self.tasks(tasks, people_index, subtask_ratio, blocking_ratio, comments_per_task, categories)
+        # Expiry is relative to the real clock, or the TTL index would remove them at once
+        self.predictions(people_index, predictions_per_user, datetime.datetime.now())
+        self.writer.flush()
+        bump_versions(VERSIONED_COLLECTIONS)
+        return self.counts
+
+
+def bump_versions(names):
+    """Invalidate cached listings (and the name resolver index) of the written collections"""
+    for name in names:
+        bump_collection_version(name)
+
+
+def existing_synthetic_data(db, exclude=None):
+    """
+    Generated collections that already hold synthetic documents, ignoring
+    those matching ``exclude``. Ids repeat for a repeated seed, so
+    generating on top of these fails with duplicate keys.
+    """
+    query = dict(SYNTHETIC, **({'$nor': [exclude]} if exclude else {}))
+    return [name for name in GENERATED_COLLECTIONS if db[name].find_one(query, {'_id': 1})]
+
+
+def clear_synthetic_data(db, collections=None):
+    """Remove every generated document; returns {collection: deleted count}"""
+    names = collections or GENERATED_COLLECTIONS
+    counts = {name: db[name].delete_many(SYNTHETIC).deleted_count for name in names}
+    bump_versions([name for name in VERSIONED_COLLECTIONS if counts.get(name)])
+    return counts
@@ -0,0 +1,152 @@
+# project/logconfig.py
+# Pieces of the LOGGING pipeline in settings. Every logger feeds the root
+# QueuedHandler, which only puts the record on an in-memory queue; a
+# QueueListener thread formats it as one JSON object per line and does the
+# console and file writes, so request threads never wait on stdout or disk.
+# SamplingFilter thins out chatty loggers before records are even queued.
+import atexit
+import copy
+import datetime
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields as top-level keys"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a share of records below WARNING for the loggers in ``rates``
+    ({logger name: share kept}); the most specific name wins. Warnings and
+    errors always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._resolved = {}
+
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            parts = name.split('.')
+            for end in range(len(parts), 0, -1):
+                prefix = '.'.join(parts[:end])
+                if prefix in self.rates:
+                    rate = float(self.rates[prefix])
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Hands records to a background QueueListener that feeds the named
+    ``handlers``. The listener starts on the first record, once logging
+    configuration has created those handlers. When the queue is full,
+    records are dropped (and counted) instead of blocking the caller.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.handler_names = list(handlers)
+        self.dropped = 0
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _targets(self):
+        find = getattr(logging, 'getHandlerByName', None) or logging._handlers.get
+        targets = [find(name) for name in self.handler_names]
+        return [target for target in targets if target is not None] or [logging.StreamHandler(sys.stderr)]
+
+    def _start(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = QueueListener(self.queue, *self._targets(), respect_handler_level=True)
+                self._listener.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        """Flush what is queued and stop the listener thread"""
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    def prepare(self, record):
+        # Resolve the message now but keep the exception separate for the formatter
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._listener is None:
+            self._start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def parse_levels(value):
+    """'tasks=DEBUG,project.profiling=WARNING' -> {'tasks': 'DEBUG', ...}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def parse_rates(value):
+    """'tasks.views=0.1' -> {'tasks.views': 0.1}"""
+    return {name: float(rate) for name, rate in parse_levels(value).items()}
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import pymongo
+
+from project.retention import apply_rollup_policies, apply_ttl_policies
+
+class Command(BaseCommand):
+    help = (
+        'Apply RETENTION_POLICIES: create/update TTL indexes and run rollup-then-purge '
+        'jobs. Run once after deploys and on a schedule (e.g. daily) for rollups.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many entries rollup jobs would purge')
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        if not options['dry_run']:
+            for name in apply_ttl_policies():
+                self.stdout.write(self.style.SUCCESS(f'TTL index in place on {name}'))
+            
+            # Serves AITaskPrediction.get_by_user's filter and sort
+            settings.MONGODB_DB['ai_task_predictions'].create_index(
+                [('user_id', pymongo.ASCENDING), ('created_at', pymongo.DESCENDING)],
+                name='user_id_created_at'
+            )
+        
+        for name, count in apply_rollup_policies(dry_run=options['dry_run']).items():
+            verb = 'would be rolled up and purged' if options['dry_run'] else 'rolled up and purged'
+            self.stdout.write(self.style.SUCCESS(f'{name}: {count} entries {verb}'))
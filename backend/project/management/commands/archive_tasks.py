@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from tasks.archive import archive_tasks, ensure_archive_collections
+
+class Command(BaseCommand):
+    help = (
+        'Move done/archived tasks past the retention window, with their comments, '
+        'attachments and history, into the compressed archive collections. '
+        'Meant to run on a schedule, e.g. nightly from cron.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS,
+                            help='Archive tasks finished and untouched for this many days')
+        parser.add_argument('--batch-size', type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count eligible tasks')
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        if options['dry_run']:
+            count = archive_tasks(options['days'], options['batch_size'], dry_run=True)
+            self.stdout.write(f'{count} tasks are eligible for archiving')
+            return
+        
+        ensure_archive_collections()
+        count = archive_tasks(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} tasks'))
@@ -0,0 +1,280 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+import asyncio
+import datetime
+import itertools
+import json
+import subprocess
+
+from people.registration import RegistrationConflict, register_user, role_for_name
+from people.search import name_key
+from project.benchmarking import login, process_tree_rss_mb, run_load
+from project.loadgen import LoadDataGenerator, clear_synthetic_data, existing_synthetic_data
+
+BENCH_USERNAME = 'bench_api_admin'
+BENCH_EMAIL = f'{BENCH_USERNAME}@load.example.com'
+BENCH_TASK_PREFIX = 'bench-api '
+READ_ENDPOINTS = ['task-list', 'task-detail', 'user-tasks', 'people-list', 'team-list', 'login']
+WRITE_ENDPOINTS = ['task-create', 'task-update']
+STATUS_CYCLE = ['todo', 'in_progress', 'review', 'done']
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the main API endpoints of a running server through a concurrency ramp and '
+        'report latency percentiles, throughput and MongoDB queries per request. Point '
+        'MONGODB_URI at a throwaway local mongod, seed it with --seed-tasks, and run the '
+        'server with REQUEST_PROFILING_SAMPLE_RATE=1 and REQUEST_PROFILING_SERVER_TIMING=True '
+        '(for query counts) and LOGIN_RATE_LIMITS raised (for the login endpoint). Save runs '
+        'with --output and compare them with --compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--server-pid', type=int, help='Master PID of the server, for RSS')
+        parser.add_argument('--password', default='bench-api-password',
+                            help=f'Password of the {BENCH_USERNAME} user (created if missing)')
+        parser.add_argument('--seed-tasks', type=int, default=0,
+                            help='Generate this many synthetic tasks first (defaults of generate_load_data)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated data')
+        parser.add_argument('--clear', action='store_true', help='Remove synthetic data and bench tasks afterwards')
+        parser.add_argument('--endpoints', default=','.join(READ_ENDPOINTS),
+                            help=f"Comma separated, from {', '.join(READ_ENDPOINTS + WRITE_ENDPOINTS)}")
+        parser.add_argument('--writes', action='store_true',
+                            help='Also benchmark task create/update (updates touch synthetic tasks only)')
+        parser.add_argument('--ramp', default='1,10,50', help='Comma separated concurrency levels')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per endpoint and level')
+        parser.add_argument('--output', help='Write the run as JSON to this file')
+        parser.add_argument('--compare', help='Earlier --output file to compare against')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent change in p95 or throughput reported as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            raise CommandError('MongoDB client not configured in settings')
+        db = settings.MONGODB_DB
+
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        if options['writes']:
+            endpoints += [name for name in WRITE_ENDPOINTS if name not in endpoints]
+        unknown = set(endpoints) - set(READ_ENDPOINTS + WRITE_ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        if set(endpoints) & set(WRITE_ENDPOINTS) and not options['writes']:
+            raise CommandError('Pass --writes to benchmark task create/update')
+        ramp = [int(level) for level in options['ramp'].split(',') if level.strip()]
+
+        if options['seed_tasks']:
+            # The bench user is synthetic too, but survives runs without --clear
+            existing = existing_synthetic_data(db, exclude={'email': BENCH_EMAIL})
+            if existing:
+                raise CommandError(
+                    f"Synthetic data already exists in {', '.join(existing)}; drop --seed-tasks to reuse it "
+                    "or remove it with generate_load_data --clear --tasks 0"
+                )
+            LoadDataGenerator(db, seed=options['seed'], stdout=self.stdout).generate(options['seed_tasks'])
+
+        user_id, person_id = self.ensure_bench_user(options['password'])
+        task_ids = [str(task['_id']) for task in db['tasks'].aggregate([{'$sample': {'size': 500}}, {'$project': {'_id': 1}}])]
+        synthetic_ids = [
+            str(task['_id'])
+            for task in db['tasks'].aggregate([{'$match': {'synthetic': True}}, {'$sample': {'size': 500}}, {'$project': {'_id': 1}}])
+        ]
+        # Give the bench user something to list under user-tasks
+        if synthetic_ids:
+            db['tasks'].update_many(
+                {'_id': {'$in': [task['_id'] for task in db['tasks'].find({'synthetic': True}, {'_id': 1}).limit(200)]}},
+                {'$set': {'assigned_to': person_id}}
+            )
+        if 'task-detail' in endpoints and not task_ids:
+            raise CommandError('No tasks to retrieve; seed some with --seed-tasks')
+        if 'task-update' in endpoints and not synthetic_ids:
+            raise CommandError('task-update only touches synthetic tasks; seed some with --seed-tasks')
+
+        base_url = options['url'].rstrip('/')
+        try:
+            token = login(base_url, BENCH_USERNAME, options['password'])
+        except Exception as e:
+            raise CommandError(f"Could not log in: {str(e)}")
+        headers = {'Authorization': f'Bearer {token}'}
+
+        dataset = {name: db[name].estimated_document_count() for name in ['tasks', 'people', 'teams']}
+        runs = self.runs(base_url, endpoints, task_ids, synthetic_ids, user_id, person_id, options['password'])
+        results = []
+        try:
+            for name, method, url, payload, run_headers in runs:
+                for concurrency in ramp:
+                    result = asyncio.run(run_load(
+                        url,
+                        headers=headers if run_headers else None,
+                        concurrency=concurrency,
+                        duration=options['duration'],
+                        method=method,
+                        payload=payload
+                    ))
+                    result.update({'endpoint': name, 'rss_mb': process_tree_rss_mb(options['server_pid'])})
+                    results.append(result)
+        finally:
+            if options['clear']:
+                self.clear(db)
+
+        failed = [result for result in results if result['errors']]
+        if failed:
+            self.report(failed)
+            raise CommandError(
+                f"{len(failed)} runs had errors; fix them before trusting or saving the numbers"
+            )
+
+        run = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now().isoformat(),
+            'url': base_url,
+            'duration': options['duration'],
+            'ramp': ramp,
+            'dataset': dataset,
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(run, f, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(run, indent=2))
+        else:
+            self.report(results)
+
+        if options['compare']:
+            regressions = self.compare(options['compare'], results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{regressions} regressions over {options['threshold']}%")
+
+    def ensure_bench_user(self, password):
+        """The admin user the benchmark logs in as, and its person id"""
+        users = settings.MONGODB_DB['users']
+        user = users.find_one({'username': BENCH_USERNAME})
+        if user:
+            users.update_one({'_id': user['_id']}, {'$set': {'password': make_password(password)}})
+        else:
+            role = role_for_name('admin')
+            now = datetime.datetime.now()
+            user = {
+                'username': BENCH_USERNAME,
+                'email': BENCH_EMAIL,
+                'password': make_password(password),
+                'first_name': 'Bench',
+                'last_name': 'Admin',
+                'role': role['_id'],
+                'is_active': True,
+                'is_staff': True,
+                'is_superuser': True,
+                'synthetic': True,
+                'created_at': now,
+                'updated_at': now
+            }
+            person = {
+                'name': 'Bench Admin',
+                'name_key': name_key('Bench Admin'),
+                'email': user['email'],
+                'role': 'admin',
+                'teams': [],
+                'skills': [],
+                'synthetic': True,
+                'created_at': now
+            }
+            try:
+                register_user(user, person)
+            except RegistrationConflict as e:
+                raise CommandError(f"Could not create {BENCH_USERNAME}: {str(e)}")
+        person = settings.MONGODB_DB['people'].find_one({'userId': user['_id']}, {'_id': 1})
+        return str(user['_id']), str(person['_id']) if person else None
+
+    def runs(self, base_url, endpoints, task_ids, synthetic_ids, user_id, person_id, password):
+        """(name, method, url, payload, authenticated) per endpoint"""
+        task_urls = itertools.cycle(task_ids or [''])
+        update_urls = itertools.cycle(synthetic_ids or [''])
+        statuses = itertools.cycle(STATUS_CYCLE)
+        counter = itertools.count()
+
+        def detail_url():
+            return f'{base_url}/api/tasks/{next(task_urls)}/'
+
+        def update_url():
+            return f'{base_url}/api/tasks/{next(update_urls)}/'
+
+        def new_task():
+            return {'title': f'{BENCH_TASK_PREFIX}{next(counter)}', 'status': 'todo', 'priority': 2, 'assignedTo': person_id}
+
+        available = {
+            'task-list': ('GET', f'{base_url}/api/tasks/', None, True),
+            'task-detail': ('GET', detail_url, None, True),
+            'user-tasks': ('GET', f'{base_url}/api/tasks/user/{user_id}/', None, True),
+            'people-list': ('GET', f'{base_url}/api/people/', None, True),
+            'team-list': ('GET', f'{base_url}/api/teams/', None, True),
+            'login': ('POST', f'{base_url}/api/auth/login/', {'username': BENCH_USERNAME, 'password': password}, False),
+            'task-create': ('POST', f'{base_url}/api/tasks/', new_task, True),
+            'task-update': ('PUT', update_url, lambda: {'status': next(statuses)}, True),
+        }
+        return [(name,) + available[name] for name in endpoints]
+
+    def clear(self, db):
+        created = [str(task['_id']) for task in db['tasks'].find({'title': {'$regex': f'^{BENCH_TASK_PREFIX}'}}, {'_id': 1})]
+        db['task_history'].delete_many({'task_id': {'$in': created}})
+        db['tasks'].delete_many({'title': {'$regex': f'^{BENCH_TASK_PREFIX}'}})
+        counts = clear_synthetic_data(db)
+        self.stdout.write(f"Removed {len(created)} bench tasks and {sum(counts.values())} synthetic documents")
+
+    def report(self, results):
+        for result in results:
+            line = (
+                f"{result['endpoint']:<12} c={result['concurrency']:<4} "
+                f"{result['requests_per_second']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f}ms  p95 {result['p95_ms']:7.1f}ms  "
+                f"p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}"
+            )
+            if result['queries_per_request'] is not None:
+                line += (
+                    f"  queries {result['queries_per_request']:.1f} (max {result['max_queries_per_request']})"
+                    f"  mongo {result['mongo_ms_per_request']:.1f}ms"
+                )
+            self.stdout.write(line)
+
+    def compare(self, path, results, threshold):
+        """Print changes against an earlier run; returns the number of regressions"""
+        with open(path) as f:
+            baseline = json.load(f)
+        previous = {(result['endpoint'], result['concurrency']): result for result in baseline['results']}
+        self.stdout.write(f"Compared with {baseline.get('commit') or path}:")
+
+        regressions = 0
+        for result in results:
+            before = previous.get((result['endpoint'], result['concurrency']))
+            if not before:
+                continue
+            p95_change = (result['p95_ms'] - before['p95_ms']) * 100.0 / before['p95_ms'] if before['p95_ms'] else 0.0
+            rps_change = (
+                (result['requests_per_second'] - before['requests_per_second']) * 100.0 / before['requests_per_second']
+                if before['requests_per_second'] else 0.0
+            )
+            line = f"{result['endpoint']:<12} c={result['concurrency']:<4} p95 {p95_change:+6.1f}%  req/s {rps_change:+6.1f}%"
+            if before.get('queries_per_request') is not None and result['queries_per_request'] is not None:
+                line += f"  queries {before['queries_per_request']:.1f} -> {result['queries_per_request']:.1f}"
+            if p95_change > threshold or rps_change < -threshold:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stdout.write(line)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+        return regressions
@@ -0,0 +1,133 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.utils.module_loading import import_string
+import asyncio
+import json
+import time
+import uuid
+
+from project.benchmarking import process_tree_cpu_seconds, run_load
+
+BENCH_USER_PREFIX = 'bench_auth_'
+PASSWORD = 'correct horse battery staple'
+
+
+def time_hasher(algorithm, iterations):
+    """Mean wall and CPU milliseconds for one hash and one verification"""
+    hasher = get_hasher(algorithm)
+    results = {'hasher': f'{hasher.__class__.__name__} ({algorithm})'}
+    for name, operation in [
+        ('hash', lambda: make_password(PASSWORD, hasher=algorithm)),
+        ('verify', lambda encoded=make_password(PASSWORD, hasher=algorithm): check_password(PASSWORD, encoded)),
+    ]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(iterations):
+            operation()
+        results[f'{name}_ms'] = (time.perf_counter() - wall) * 1000.0 / iterations
+        results[f'{name}_cpu_ms'] = (time.process_time() - cpu) * 1000.0 / iterations
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure password hashing cost for the configured hashers and, given --url, '
+        'login/register latency and server CPU per request against a running server. '
+        'Use it to tune PASSWORD_HASHER_PARAMS on the production hardware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Hash/verify rounds per hasher')
+        parser.add_argument('--url', help='Base URL of a running server for the HTTP benchmark')
+        parser.add_argument('--server-pid', type=int, help='Master PID of the server, for CPU per request')
+        parser.add_argument('--username', help='Existing user for the login benchmark')
+        parser.add_argument('--password')
+        parser.add_argument('--register', action='store_true',
+                            help=f'Also benchmark registration (creates {BENCH_USER_PREFIX}* users, removed afterwards)')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        results = {'hashers': [], 'http': []}
+
+        # The tunable hashers; the rest of PASSWORD_HASHERS only verify legacy hashes
+        algorithms = []
+        for path in settings.PASSWORD_HASHERS:
+            if not path.startswith('project.hashers.'):
+                continue
+            try:
+                algorithms.append(import_string(path)().algorithm)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'Skipping {path}: {str(e)}'))
+        for algorithm in algorithms:
+            results['hashers'].append(time_hasher(algorithm, options['iterations']))
+
+        if options['url']:
+            results['http'] = self.http_benchmark(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results['hashers']:
+            self.stdout.write(
+                f"{result['hasher']:<50} hash {result['hash_ms']:7.1f}ms (cpu {result['hash_cpu_ms']:6.1f}ms)  "
+                f"verify {result['verify_ms']:7.1f}ms (cpu {result['verify_cpu_ms']:6.1f}ms)"
+            )
+        for result in results['http']:
+            line = (
+                f"{result['endpoint']:<9} {result['requests_per_second']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f}ms  p95 {result['p95_ms']:7.1f}ms  "
+                f"p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}"
+            )
+            if result.get('cpu_ms_per_request') is not None:
+                line += f"  server cpu {result['cpu_ms_per_request']:.1f}ms/req"
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'New hashes use {settings.PASSWORD_HASHER}'))
+
+    def http_benchmark(self, options):
+        base_url = options['url'].rstrip('/')
+        runs = []
+        if options['username']:
+            if not options['password']:
+                raise CommandError('--password is required with --username')
+            runs.append(('login', '/api/auth/login/', {
+                'username': options['username'], 'password': options['password']
+            }))
+        if options['register']:
+            def registration():
+                name = BENCH_USER_PREFIX + uuid.uuid4().hex[:12]
+                return {'username': name, 'email': f'{name}@example.com', 'password': uuid.uuid4().hex}
+            runs.append(('register', '/api/auth/register/', registration))
+        if not runs:
+            raise CommandError('Pass --username/--password and/or --register with --url')
+
+        results = []
+        try:
+            for name, path, payload in runs:
+                cpu_before = process_tree_cpu_seconds(options['server_pid'])
+                result = asyncio.run(run_load(
+                    base_url + path,
+                    concurrency=options['concurrency'],
+                    duration=options['duration'],
+                    method='POST',
+                    payload=payload
+                ))
+                cpu_after = process_tree_cpu_seconds(options['server_pid'])
+                result['endpoint'] = name
+                if cpu_before is not None and cpu_after is not None and result['requests']:
+                    result['cpu_ms_per_request'] = (cpu_after - cpu_before) * 1000.0 / result['requests']
+                results.append(result)
+        finally:
+            if options['register']:
+                self.remove_bench_users()
+        return results
+
+    def remove_bench_users(self):
+        pattern = {'$regex': f'^{BENCH_USER_PREFIX}'}
+        users = settings.MONGODB_DB['users']
+        user_ids = [user['_id'] for user in users.find({'username': pattern}, {'_id': 1})]
+        settings.MONGODB_DB['people'].delete_many({'userId': {'$in': user_ids}})
+        users.delete_many({'_id': {'$in': user_ids}})
+        self.stdout.write(f'Removed {len(user_ids)} benchmark users')
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+import asyncio
+import json
+
+from project.benchmarking import login, process_tree_rss_mb, run_load
+
+# (name, sync path, async path) for the hot read endpoints
+READ_ENDPOINTS = [
+    ('task-list', '/api/tasks/', '/api/async/tasks/'),
+    ('people-list', '/api/people/', '/api/async/people/'),
+    ('team-list', '/api/teams/', '/api/async/teams/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync (WSGI) and async (ASGI) read endpoints. Start both servers '
+        'with the same memory budget, e.g. "gunicorn project.wsgi -w 4 --threads 4" and '
+        '"uvicorn project.asgi:application --workers 1", then pass their URLs and PIDs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--async-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--sync-pid', type=int, help='Master PID of the WSGI server, for RSS')
+        parser.add_argument('--async-pid', type=int, help='Master PID of the ASGI server, for RSS')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--task-id', help='Also benchmark task retrieve for this task')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=15.0)
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        endpoints = list(READ_ENDPOINTS)
+        if options['task_id']:
+            task_id = options['task_id']
+            endpoints.append(('task-detail', f'/api/tasks/{task_id}/', f'/api/async/tasks/{task_id}/'))
+
+        try:
+            token = login(options['sync_url'], options['username'], options['password'])
+        except Exception as e:
+            raise CommandError(f"Could not log in: {str(e)}")
+        headers = {'Authorization': f'Bearer {token}'}
+
+        results = []
+        for name, sync_path, async_path in endpoints:
+            for mode, base_url, path, pid in [
+                ('sync', options['sync_url'], sync_path, options['sync_pid']),
+                ('async', options['async_url'], async_path, options['async_pid']),
+            ]:
+                result = asyncio.run(run_load(
+                    base_url.rstrip('/') + path,
+                    headers=headers,
+                    concurrency=options['concurrency'],
+                    duration=options['duration']
+                ))
+                rss = process_tree_rss_mb(pid)
+                result.update({'endpoint': name, 'mode': mode, 'rss_mb': rss})
+                if rss:
+                    result['requests_per_second_per_100mb'] = result['requests_per_second'] * 100.0 / rss
+                results.append(result)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            line = (
+                f"{result['endpoint']:<12} {result['mode']:<5} "
+                f"{result['requests_per_second']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f}ms  p95 {result['p95_ms']:7.1f}ms  "
+                f"p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}"
+            )
+            if result['rss_mb']:
+                line += (
+                    f"  rss {result['rss_mb']:.0f}MB"
+                    f"  {result['requests_per_second_per_100mb']:.1f} req/s per 100MB"
+                )
+            self.stdout.write(line)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from people.registration import ensure_user_indexes
+from people.search import ensure_people_indexes
+from project.authentication import ensure_revocation_indexes
+from tasks.hierarchy import ensure_hierarchy_indexes
+from tasks.pagination import ensure_pagination_indexes
+from tasks.search import ensure_task_indexes
+
+class Command(BaseCommand):
+    help = 'Create all MongoDB indexes the API relies on (safe to re-run)'
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        ensure_task_indexes()
+        ensure_people_indexes()
+        ensure_user_indexes()
+        ensure_hierarchy_indexes()
+        ensure_pagination_indexes()
+        ensure_revocation_indexes()
+        self.stdout.write(self.style.SUCCESS('Indexes are in place'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from people.search import ensure_people_indexes
+from tasks.search import ensure_task_indexes
+
+class Command(BaseCommand):
+    help = 'Create the task text index and people name index, backfilling name keys'
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        ensure_task_indexes()
+        self.stdout.write(self.style.SUCCESS('Task text index is in place'))
+        
+        backfilled = ensure_people_indexes()
+        self.stdout.write(self.style.SUCCESS(f'People name index is in place ({backfilled} name keys backfilled)'))
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+import time
+
+from project.loadgen import LoadDataGenerator, clear_synthetic_data, existing_synthetic_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-insert a deterministic synthetic dataset for scale testing: organizations, '
+        'teams with skewed membership, people and users, tasks with subtasks and blocking '
+        'edges, comments, history and AI predictions. Documents are tagged synthetic; '
+        'remove them with --clear. Run setup_initial_data first so users get roles, and '
+        'ensure_indexes afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--people', type=int, help='Defaults to one per 20 tasks')
+        parser.add_argument('--orgs', type=int, default=5)
+        parser.add_argument('--teams-per-org', type=int, default=20)
+        parser.add_argument('--users-ratio', type=float, default=0.2, help='Share of people with a user account')
+        parser.add_argument('--subtask-ratio', type=float, default=0.3, help='Share of tasks nested under another')
+        parser.add_argument('--blocking-ratio', type=float, default=0.1, help='Share of tasks blocked by others')
+        parser.add_argument('--comments-per-task', type=float, default=2.0, help='Mean comments per task')
+        parser.add_argument('--predictions-per-user', type=float, default=3.0, help='Mean AI predictions per user')
+        parser.add_argument('--password', default='load-test-password', help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--clear', action='store_true', help='Remove synthetic data first (alone with --tasks 0)')
+
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        db = settings.MONGODB_DB
+
+        if options['clear']:
+            removed = clear_synthetic_data(db)
+            self.stdout.write(self.style.SUCCESS(f"Removed {sum(removed.values())} synthetic documents"))
+        if not options['tasks']:
+            return
+        if options['orgs'] < 1 or options['teams_per_org'] < 1:
+            raise CommandError('--orgs and --teams-per-org must be at least 1')
+        existing = existing_synthetic_data(db)
+        if existing:
+            raise CommandError(
+                f"Synthetic data already exists in {', '.join(existing)}; rerun with --clear to replace it"
+            )
+        if db['roles'].count_documents({'name': {'$in': ['team_member', 'manager']}}) < 2:
+            self.stdout.write(self.style.WARNING('team_member/manager roles missing; generated users get no role'))
+
+        started = time.perf_counter()
+        generator = LoadDataGenerator(db, seed=options['seed'], batch_size=options['batch_size'], stdout=self.stdout)
+        counts = generator.generate(
+            options['tasks'],
+            people=options['people'],
+            organizations=options['orgs'],
+            teams_per_org=options['teams_per_org'],
+            users_ratio=options['users_ratio'],
+            subtask_ratio=options['subtask_ratio'],
+            blocking_ratio=options['blocking_ratio'],
+            comments_per_task=options['comments_per_task'],
+            predictions_per_user=options['predictions_per_user'],
+            # Hashed once: every user shares it, and hashing millions would take hours
+            password=make_password(options['password'])
+        )
+        elapsed = time.perf_counter() - started
+
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {total} documents in {elapsed:.1f}s ({total / elapsed:.0f}/s): "
+            + ', '.join(f'{count} {name}' for name, count in sorted(counts.items()))
+        ))
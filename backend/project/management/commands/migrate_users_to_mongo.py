@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import is_password_usable
+import datetime
+
+from people.registration import RegistrationConflict, register_user, role_for_name
+from people.search import name_key
+
+class Command(BaseCommand):
+    help = (
+        'Move users from the legacy Django user table into MongoDB, which is now '
+        'the only user store. Missing users are created with a linked person; '
+        'existing ones get any fields and password hash they lack.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        users_collection = settings.MONGODB_DB['users']
+        dry_run = options['dry_run']
+        created = updated = conflicts = 0
+        
+        for legacy in get_user_model().objects.all().iterator():
+            password = legacy.password if is_password_usable(legacy.password) else None
+            existing = users_collection.find_one({'username': legacy.username})
+            
+            if existing:
+                changes = {
+                    field: getattr(legacy, field)
+                    for field in ['email', 'first_name', 'last_name']
+                    if getattr(legacy, field) and not existing.get(field)
+                }
+                # Earlier mirroring wrote placeholder hashes; the Django one is real
+                if password and not is_password_usable(existing.get('password')):
+                    changes['password'] = password
+                if changes:
+                    updated += 1
+                    if not dry_run:
+                        changes['updated_at'] = datetime.datetime.now()
+                        users_collection.update_one({'_id': existing['_id']}, {'$set': changes})
+                continue
+            
+            created += 1
+            if dry_run:
+                continue
+            
+            role_name = 'admin' if legacy.is_superuser else 'team_member'
+            role = role_for_name(role_name)
+            now = datetime.datetime.now()
+            user_data = {
+                'username': legacy.username,
+                'email': legacy.email,
+                'password': password or legacy.password,
+                'first_name': legacy.first_name,
+                'last_name': legacy.last_name,
+                'is_active': legacy.is_active,
+                'is_staff': legacy.is_staff,
+                'is_superuser': legacy.is_superuser,
+                'last_login': legacy.last_login,
+                'role': role['_id'],
+                'created_at': legacy.date_joined or now,
+                'updated_at': now
+            }
+            person_name = f"{legacy.first_name} {legacy.last_name}".strip() or legacy.username
+            person_data = {
+                'name': person_name,
+                'name_key': name_key(person_name),
+                'email': legacy.email,
+                'role': role_name,
+                'teams': [],
+                'skills': [],
+                'created_at': now
+            }
+            try:
+                register_user(user_data, person_data)
+            except RegistrationConflict as e:
+                created -= 1
+                conflicts += 1
+                self.stdout.write(self.style.WARNING(f"Skipped {legacy.username}: {str(e)}"))
+        
+        prefix = 'Would migrate' if dry_run else 'Migrated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {created} users and {'would update' if dry_run else 'updated'} {updated} existing MongoDB users"
+        ))
+        if conflicts:
+            self.stdout.write(self.style.WARNING(f"{conflicts} users conflicted with an existing email"))
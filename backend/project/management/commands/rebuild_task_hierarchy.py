@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from tasks.hierarchy import ensure_hierarchy_indexes, rebuild_paths
+
+class Command(BaseCommand):
+    help = 'Create the task hierarchy indexes and recompute ancestor paths from parent pointers'
+    
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'MONGODB_DB') or settings.MONGODB_DB is None:
+            self.stdout.write(self.style.ERROR('MongoDB client not configured in settings'))
+            return
+        
+        ensure_hierarchy_indexes()
+        self.stdout.write(self.style.SUCCESS('Hierarchy indexes are in place'))
+        
+        updated, orphaned = rebuild_paths()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt paths for {updated} tasks'))
+        if orphaned:
+            self.stdout.write(self.style.WARNING(f'{orphaned} tasks pointed at a missing parent and are now roots'))
@@ -0,0 +1,186 @@
+# project/metrics.py
+# Prometheus metrics: API latency per route, MongoDB command latency and
+# connection pool wait, OpenAI call latency/tokens/retries and cache hit
+# rates, served at /metrics. Under gunicorn set PROMETHEUS_MULTIPROC_DIR
+# (gunicorn.conf.py does) so every worker writes its samples to shared
+# files and a scrape of any worker reports the sum over all of them.
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+MONGO_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5)
+OPENAI_BUCKETS = (.25, .5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'API request latency',
+    ['method', 'route', 'status']
+)
+mongodb_command_duration = Histogram(
+    'mongodb_command_duration_seconds', 'MongoDB command latency',
+    ['command', 'outcome'], buckets=MONGO_BUCKETS
+)
+mongodb_pool_wait = Histogram(
+    'mongodb_pool_wait_seconds', 'Time spent waiting to check a connection out of the pool',
+    ['outcome'], buckets=MONGO_BUCKETS
+)
+openai_request_duration = Histogram(
+    'openai_request_duration_seconds', 'OpenAI API call latency, per attempt',
+    ['method', 'outcome'], buckets=OPENAI_BUCKETS
+)
+openai_tokens = Counter(
+    'openai_tokens', 'OpenAI tokens used',
+    ['method', 'kind']
+)
+openai_retries = Counter(
+    'openai_retries', 'OpenAI calls retried after an error',
+    ['method', 'reason']
+)
+cache_lookups = Counter(
+    'cache_lookups', 'Cache lookups by result',
+    ['cache', 'result']
+)
+
+
+def record_cache_lookups(cache, hits, misses):
+    if hits:
+        cache_lookups.labels(cache, 'hit').inc(hits)
+    if misses:
+        cache_lookups.labels(cache, 'miss').inc(misses)
+
+
+@contextmanager
+def openai_call(method):
+    """Time one OpenAI API attempt for ``method``"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        openai_request_duration.labels(method, outcome).observe(time.perf_counter() - started)
+
+
+def record_openai_usage(method, response):
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    for kind in ['prompt_tokens', 'completion_tokens']:
+        count = getattr(usage, kind, None)
+        if count:
+            openai_tokens.labels(method, kind.split('_')[0]).inc(count)
+
+
+def record_openai_retry(method, error):
+    openai_retries.labels(method, type(error).__name__).inc()
+
+
+def route_label(request):
+    """The URL pattern that matched, so ids don't explode the label set"""
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None and match.route else 'unmatched'
+
+
+class MongoMetricsListener(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Command latency and pool checkout wait for every MongoDB client"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongodb_command_duration.labels(event.command_name, 'success').observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongodb_command_duration.labels(event.command_name, 'failure').observe(event.duration_micros / 1e6)
+
+    def connection_checked_out(self, event):
+        if event.duration is not None:
+            mongodb_pool_wait.labels('success').observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        if event.duration is not None:
+            mongodb_pool_wait.labels('failure').observe(event.duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+mongo_metrics_listener = MongoMetricsListener()
+
+
+class ScrapeCollector:
+    """Everything in ``source`` plus hit ratios derived from the cache lookup counters"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        lookups = {}
+        for family in self.source.collect():
+            if family.name == 'cache_lookups':
+                for sample in family.samples:
+                    if sample.name == 'cache_lookups_total':
+                        counts = lookups.setdefault(sample.labels['cache'], {'hit': 0.0, 'miss': 0.0})
+                        counts[sample.labels['result']] += sample.value
+            yield family
+
+        ratio = GaugeMetricFamily('cache_hit_ratio', 'Share of cache lookups that hit, since start', labels=['cache'])
+        for cache, counts in sorted(lookups.items()):
+            total = counts['hit'] + counts['miss']
+            ratio.add_metric([cache], counts['hit'] / total if total else 0.0)
+        yield ratio
+
+
+def scrape_registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        source = CollectorRegistry()
+        multiprocess.MultiProcessCollector(source)
+    else:
+        source = REGISTRY
+    registry = CollectorRegistry()
+    registry.register(ScrapeCollector(source))
+    return registry
+
+
+def metrics_view(request):
+    """Prometheus exposition, limited to METRICS_ALLOWED_IPS"""
+    from project.ratelimit import client_ip
+
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if '*' not in allowed and client_ip(request) not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(scrape_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -1,31 +1,140 @@
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 from django.http import HttpResponse
 import pymongo
 import json
+import time
+
+from utils.mongodb_connection import get_async_database
+from .metrics import http_request_duration, route_label
+from .profiling import current_profile, finish_profile, start_profile, view_name
 
 logger = logging.getLogger(__name__)
 
 class MongoDBConnectionMiddleware:
+    # Supports both modes so async views aren't pushed onto a thread under ASGI
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Check MongoDB connection before processing request
         if hasattr(settings, 'MONGODB_DB') and settings.MONGODB_CLIENT:
             try:
                 # Check if MongoDB is still connected
                 settings.MONGODB_CLIENT.admin.command('ping')
             except pymongo.errors.ConnectionFailure:
-                logger.error("MongoDB connection lost")
-                # For API requests, return JSON error
-                if request.path.startswith('/api/'):
-                    return HttpResponse(
-                        json.dumps({"error": "Database connection unavailable"}),
-                        content_type="application/json",
-                        status=503
-                    )
-                # For other requests, let them proceed (they might not need MongoDB)
-        
+                unavailable = self._unavailable_response(request)
+                if unavailable:
+                    return unavailable
+
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+    async def __acall__(self, request):
+        if hasattr(settings, 'MONGODB_DB') and settings.MONGODB_CLIENT:
+            try:
+                await get_async_database().command('ping')
+            except pymongo.errors.ConnectionFailure:
+                unavailable = self._unavailable_response(request)
+                if unavailable:
+                    return unavailable
+
+        return await self.get_response(request)
+
+    def _unavailable_response(self, request):
+        logger.error("MongoDB connection lost")
+        # For API requests, return JSON error
+        if request.path.startswith('/api/'):
+            return HttpResponse(
+                json.dumps({"error": "Database connection unavailable"}),
+                content_type="application/json",
+                status=503
+            )
+        # For other requests, let them proceed (they might not need MongoDB)
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Counts and times the MongoDB commands of sampled requests, attributed to
+    the view/action that served them (see project.profiling). Placed after
+    MongoDBConnectionMiddleware so its ping isn't counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile, token = start_profile(request)
+        if profile is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            finish_profile(profile, token, None)
+            raise
+        return finish_profile(profile, token, response)
+
+    async def __acall__(self, request):
+        profile, token = start_profile(request)
+        if profile is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            finish_profile(profile, token, None)
+            raise
+        return finish_profile(profile, token, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = current_profile()
+        if profile is not None:
+            profile.view = view_name(view_func, request.method)
+        return None
+
+
+class MetricsMiddleware:
+    """Records the latency of every request in the per-route histogram (project.metrics)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    def _observe(self, request, response, started):
+        http_request_duration.labels(
+            request.method, route_label(request), str(response.status_code)
+        ).observe(time.perf_counter() - started)
@@ -0,0 +1,188 @@
+# project/profiling.py
+# Per-request MongoDB instrumentation. A PyMongo CommandListener, registered
+# globally before any client is created, reports every command to the
+# RequestProfile of the request that issued it (tracked in a context variable,
+# so it follows sync_to_async threads and async views alike). The profiling
+# middleware in project.middleware starts a profile for a sample of requests,
+# names it after the view/action that handled it, and reports it as a
+# Server-Timing header (when SERVER_TIMING is on) and, for slow requests, a
+# log line with the query fingerprints.
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.01,
+    'SLOW_REQUEST_MS': 500,
+    'SERVER_TIMING': False,
+    'REPEATED_QUERY_THRESHOLD': 10,
+}
+
+# Fields holding the part of a command that decides which documents it touches
+SHAPE_FIELDS = ['filter', 'query', 'q', 'pipeline', 'sort', 'updates', 'deletes']
+
+_current = contextvars.ContextVar('mongo_request_profile', default=None)
+
+
+def profiling_settings():
+    return dict(DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {}))
+
+
+def _shape(value):
+    """Replace the values in a filter/pipeline with '?' keeping its structure"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in lists and batches differ only in length
+        return [_shape(value[0])] if value else []
+    return '?'
+
+
+def query_fingerprint(command_name, command):
+    """e.g. find tasks {'filter': {'assignedTo': '?'}}"""
+    collection = command.get(command_name)
+    shape = {field: _shape(command[field]) for field in SHAPE_FIELDS if field in command}
+    fingerprint = f"{command_name} {collection}" if isinstance(collection, str) else command_name
+    return f"{fingerprint} {shape}" if shape else fingerprint
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.view = None
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.failed = 0
+        self.fingerprints = Counter()
+        self.fingerprint_ms = Counter()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def command_started(self, key, fingerprint):
+        with self._lock:
+            self._pending[key] = fingerprint
+
+    def command_finished(self, key, duration_ms, failed=False):
+        with self._lock:
+            fingerprint = self._pending.pop(key, None)
+            if fingerprint is None:
+                return
+            self.query_count += 1
+            self.query_ms += duration_ms
+            self.fingerprints[fingerprint] += 1
+            self.fingerprint_ms[fingerprint] += duration_ms
+            if failed:
+                self.failed += 1
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def server_timing(self, total_ms):
+        return (
+            f'mongo;dur={self.query_ms:.1f};desc="{self.query_count} queries", '
+            f'app;dur={max(total_ms - self.query_ms, 0):.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+
+    def summary(self, total_ms, limit=10):
+        """Plain dict for logging: totals plus the most expensive fingerprints"""
+        top = sorted(self.fingerprint_ms.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {
+            'method': self.method,
+            'path': self.path,
+            'view': self.view,
+            'duration_ms': round(total_ms, 1),
+            'queries': self.query_count,
+            'query_ms': round(self.query_ms, 1),
+            'failed_queries': self.failed,
+            'fingerprints': [
+                {'query': fingerprint, 'count': self.fingerprints[fingerprint], 'ms': round(ms, 1)}
+                for fingerprint, ms in top
+            ],
+        }
+
+    def repeated_queries(self, threshold):
+        """Fingerprints run at least ``threshold`` times, the usual N+1 signature"""
+        return {fingerprint: count for fingerprint, count in self.fingerprints.items() if count >= threshold}
+
+
+class QueryListener(monitoring.CommandListener):
+    """Feeds command timings to the active RequestProfile, if any"""
+
+    def started(self, event):
+        profile = _current.get()
+        if profile is not None:
+            profile.command_started(
+                (event.connection_id, event.request_id),
+                query_fingerprint(event.command_name, event.command)
+            )
+
+    def succeeded(self, event):
+        profile = _current.get()
+        if profile is not None:
+            profile.command_finished((event.connection_id, event.request_id), event.duration_micros / 1000.0)
+
+    def failed(self, event):
+        profile = _current.get()
+        if profile is not None:
+            profile.command_finished((event.connection_id, event.request_id), event.duration_micros / 1000.0, failed=True)
+
+
+query_listener = QueryListener()
+
+
+def start_profile(request):
+    """Begin profiling this request if profiling is on and it is sampled"""
+    options = profiling_settings()
+    if not options['ENABLED'] or random.random() >= options['SAMPLE_RATE']:
+        return None, None
+    profile = RequestProfile(request.method, request.path)
+    return profile, _current.set(profile)
+
+
+def current_profile():
+    return _current.get()
+
+
+def view_name(view_func, method):
+    """ViewSet.action for DRF viewsets, otherwise the view's qualified name"""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    return f"{view_class.__name__}.{action}" if action else view_class.__name__
+
+
+def finish_profile(profile, token, response):
+    """Stop profiling, add Server-Timing and log the request if it was slow"""
+    _current.reset(token)
+    options = profiling_settings()
+    total_ms = profile.elapsed_ms
+
+    if options['SERVER_TIMING'] and response is not None:
+        response['Server-Timing'] = profile.server_timing(total_ms)
+
+    repeated = profile.repeated_queries(options['REPEATED_QUERY_THRESHOLD'])
+    if total_ms >= options['SLOW_REQUEST_MS'] or repeated:
+        summary = profile.summary(total_ms)
+        summary['repeated_queries'] = repeated
+        logger.warning(
+            f"{'Slow request' if total_ms >= options['SLOW_REQUEST_MS'] else 'Repeated queries'}: "
+            f"{profile.method} {profile.path} ({profile.view}) {total_ms:.1f}ms, "
+            f"{profile.query_count} queries in {profile.query_ms:.1f}ms",
+            extra={'profile': summary}
+        )
+    return response
@@ -0,0 +1,159 @@
+# project/ratelimit.py
+# Login throttling. Each attempt takes a token from a bucket per username
+# and one per client IP; empty buckets are rejected before any user lookup
+# or password hash. Buckets live in process and, when LOGIN_RATE_LIMIT_CACHE
+# names a shared cache alias, are mirrored there so all workers see the same
+# budget. Usernames that don't exist are remembered briefly (in the shared
+# cache alone when there is one) so repeats skip the lookup and the dummy
+# hash entirely; register_user forgets them again.
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCAL_BUCKETS = 50000
+
+
+class TokenBucket:
+    """``capacity`` attempts in a burst, refilled at ``per_minute``"""
+
+    def __init__(self, capacity, per_minute):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+
+    def take(self, state, now):
+        """
+        Take one token from ``state`` ((tokens, updated_at) or None).
+        Returns (allowed, new_state, seconds until a token is available).
+        """
+        tokens, updated = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return True, (tokens - 1, now), 0
+        return False, (tokens, now), math.ceil((1 - tokens) / self.rate)
+
+
+class LoginRateLimiter:
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._unknown = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        alias = getattr(settings, 'LOGIN_RATE_LIMIT_CACHE', None)
+        if not alias:
+            return None
+        from django.core.cache import caches
+        return caches[alias]
+
+    def _limits(self):
+        return {
+            scope: TokenBucket(limit['capacity'], limit['per_minute'])
+            for scope, limit in getattr(settings, 'LOGIN_RATE_LIMITS', {}).items()
+        }
+
+    def _take(self, key, bucket, now):
+        with self._lock:
+            allowed, state, retry_after = bucket.take(self._buckets.get(key), now)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > MAX_LOCAL_BUCKETS:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            return False, retry_after
+
+        shared = self._shared()
+        if shared is None:
+            return True, 0
+        # Read-modify-write without a lock: racing workers may let a few
+        # extra attempts through, which is fine for throttling.
+        try:
+            allowed, state, retry_after = bucket.take(shared.get(f'ratelimit:{key}'), time.time())
+            shared.set(f'ratelimit:{key}', state, math.ceil(bucket.capacity / bucket.rate))
+        except Exception as e:
+            logger.warning(f"Shared rate limit cache unavailable: {str(e)}")
+            return True, 0
+        return allowed, retry_after
+
+    def check(self, username, ip):
+        """
+        Take a token from the username and IP buckets.
+        Returns 0 when the attempt may proceed, else seconds to wait.
+        """
+        limits = self._limits()
+        now = time.monotonic()
+        keys = {'ip': f'login:ip:{ip}', 'username': f'login:user:{(username or "").lower()}'}
+        wait = 0
+        for scope, bucket in limits.items():
+            if scope not in keys:
+                continue
+            allowed, retry_after = self._take(keys[scope], bucket, now)
+            if not allowed:
+                wait = max(wait, retry_after)
+        return wait
+
+    # Unknown usernames live in the shared cache when there is one and only
+    # in process otherwise, so one worker's forget is seen by every worker
+    def is_unknown_username(self, username):
+        key = username or ''
+        shared = self._shared()
+        if shared is not None:
+            try:
+                return bool(shared.get(f'unknown-user:{key}'))
+            except Exception:
+                return False
+
+        with self._lock:
+            expires = self._unknown.get(key)
+            if expires and expires > time.monotonic():
+                return True
+            self._unknown.pop(key, None)
+            return False
+
+    def remember_unknown_username(self, username):
+        ttl = getattr(settings, 'LOGIN_UNKNOWN_USER_CACHE_SECONDS', 60)
+        key = username or ''
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(f'unknown-user:{key}', True, ttl)
+            except Exception as e:
+                logger.warning(f"Shared rate limit cache unavailable: {str(e)}")
+            return
+
+        with self._lock:
+            self._unknown[key] = time.monotonic() + ttl
+            self._unknown.move_to_end(key)
+            while len(self._unknown) > MAX_LOCAL_BUCKETS:
+                self._unknown.popitem(last=False)
+
+    def forget_unknown_username(self, username):
+        """Call when a user is created so they can log in straight away"""
+        key = username or ''
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.delete(f'unknown-user:{key}')
+            except Exception as e:
+                logger.warning(f"Shared rate limit cache unavailable: {str(e)}")
+            return
+
+        with self._lock:
+            self._unknown.pop(key, None)
+
+
+login_rate_limiter = LoginRateLimiter()
+
+
+def client_ip(request):
+    """Client address, from X-Forwarded-For only when the proxy is trusted"""
+    if getattr(settings, 'LOGIN_RATE_LIMIT_TRUST_FORWARDED', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
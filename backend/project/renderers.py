@@ -0,0 +1,28 @@
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class MongoJSONEncoder(JSONEncoder):
+    """
+    JSON encoder that understands BSON types returned by PyMongo.
+
+    Only the values the C encoder cannot handle reach ``default``, so raw
+    documents are encoded recursively in a single pass without converting
+    every ObjectId field in Python beforehand.
+    """
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, Decimal128):
+            return str(obj.to_decimal())
+        # datetime, date, Decimal, UUID, ... are handled by DRF's encoder
+        return super().default(obj)
+
+
+class MongoJSONRenderer(JSONRenderer):
+    """
+    Renderer that lets views pass raw MongoDB documents to ``Response``.
+    """
+    encoder_class = MongoJSONEncoder
@@ -0,0 +1,104 @@
+# project/retention.py
+# Per-collection retention. Collections whose old documents can simply go
+# get a TTL index, so the server purges them continuously. task_history is
+# summarized into monthly rollups before old entries are purged.
+import datetime
+import logging
+
+import pymongo
+from django.conf import settings
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+task_history_rollups_collection = settings.MONGODB_DB['task_history_rollups']
+
+
+def _policies():
+    return getattr(settings, 'RETENTION_POLICIES', {})
+
+
+def ensure_ttl_index(collection, field, seconds):
+    """
+    Create a TTL index on ``field``, or change the expiry of an existing one.
+    Documents without a date in ``field`` are never expired.
+    """
+    name = f'{field}_ttl'
+    try:
+        collection.create_index([(field, pymongo.ASCENDING)], name=name, expireAfterSeconds=seconds)
+    except OperationFailure:
+        # Index exists with another expiry
+        settings.MONGODB_DB.command(
+            'collMod', collection.name,
+            index={'name': name, 'expireAfterSeconds': seconds}
+        )
+
+
+def apply_ttl_policies():
+    """Create/update TTL indexes for every 'ttl' policy. Returns the collections handled."""
+    handled = []
+    for name, policy in _policies().items():
+        if policy.get('mode') != 'ttl' or policy.get('days') is None:
+            continue
+        ensure_ttl_index(settings.MONGODB_DB[name], policy['field'], int(policy['days'] * 86400))
+        handled.append(name)
+    return handled
+
+
+def rollup_task_history(days, dry_run=False):
+    """
+    Fold task_history entries older than ``days`` into monthly per-task,
+    per-change-type counts in task_history_rollups, then delete them.
+
+    The merge and purge both run server side. A run interrupted between
+    the two steps counts the surviving entries again on the next run.
+    Returns the number of entries purged (or eligible, for dry runs).
+    """
+    history = settings.MONGODB_DB['task_history']
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+    match = {'timestamp': {'$lt': cutoff}}
+
+    if dry_run:
+        return history.count_documents(match)
+
+    history.aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': {
+                'task_id': '$task_id',
+                'change_type': '$change_type',
+                'month': {'$dateToString': {'format': '%Y-%m', 'date': '$timestamp'}},
+            },
+            'count': {'$sum': 1},
+            'first_at': {'$min': '$timestamp'},
+            'last_at': {'$max': '$timestamp'},
+        }},
+        {'$merge': {
+            'into': task_history_rollups_collection.name,
+            'on': '_id',
+            'whenMatched': [{'$set': {
+                'count': {'$add': ['$count', '$$new.count']},
+                'first_at': {'$min': ['$first_at', '$$new.first_at']},
+                'last_at': {'$max': ['$last_at', '$$new.last_at']},
+            }}],
+            'whenNotMatched': 'insert',
+        }},
+    ])
+
+    purged = history.delete_many(match).deleted_count
+    logger.info(f"Rolled up and purged {purged} task history entries older than {days} days")
+    return purged
+
+
+def apply_rollup_policies(dry_run=False):
+    """Run every 'rollup' policy. Returns {collection: purged count}."""
+    jobs = {'task_history': rollup_task_history}
+    results = {}
+    for name, policy in _policies().items():
+        if policy.get('mode') != 'rollup' or policy.get('days') is None:
+            continue
+        if name not in jobs:
+            logger.warning(f"No rollup job for collection {name}")
+            continue
+        results[name] = jobs[name](policy['days'], dry_run=dry_run)
+    return results
@@ -23,6 +23,16 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 load_dotenv()
+
+# Per-request Mongo command counting (project.profiling) and Prometheus
+# metrics (project.metrics). Listeners have to be registered before any
+# client is created to see its commands.
+from project.logconfig import parse_levels, parse_rates
+from project.profiling import query_listener
+from project.metrics import mongo_metrics_listener
+pymongo.monitoring.register(query_listener)
+pymongo.monitoring.register(mongo_metrics_listener)
+
 MONGODB_URI = os.environ.get('MONGODB_URI')
 MONGODB_DB_NAME = 'taskmanagement'
 
@@ -32,10 +42,8 @@ try:
     MONGODB_CLIENT.server_info()
     MONGODB_DB = MONGODB_CLIENT[MONGODB_DB_NAME]
     logger.info(f"Successfully connected to MongoDB: {MONGODB_URI}")
-    print(f"Successfully connected to MongoDB: {MONGODB_URI}")
 except pymongo.errors.ServerSelectionTimeoutError as err:
     logger.error(f"MongoDB connection error: {err}")
-    print(f"MongoDB connection error: {err}")
     # Set to None so the application can still start even without MongoDB
     MONGODB_CLIENT = None
     MONGODB_DB = None
@@ -76,6 +84,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'project.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -85,6 +94,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'project.middleware.MongoDBConnectionMiddleware',
+    'project.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = "project.urls"
@@ -106,6 +116,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "project.wsgi.application"
+ASGI_APPLICATION = "project.asgi.application"
 
 
 # Database
@@ -118,13 +129,71 @@ DATABASES = {
     }
 }
 
+# Cache tiers. 'local' is always per process; 'default' is picked by
+# CACHE_BACKEND: locmem (per process), file (shared on one host) or redis
+# (shared, any Redis-compatible server at CACHE_URL).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHES = {
+    'default': dict(CACHE_BACKENDS[CACHE_BACKEND], KEY_PREFIX='taskmgr'),
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+    },
+}
+
+# Cache alias for categories, security levels and roles (project.caching).
+# Invalidation only reaches other workers through a shared backend; in a
+# per-process cache the other workers keep serving old roles and security
+# levels until their copy expires, so it is only kept for a few seconds.
+REFERENCE_DATA_CACHE = os.environ.get('REFERENCE_DATA_CACHE', 'default')
+REFERENCE_DATA_CACHE_SHARED = REFERENCE_DATA_CACHE == 'default' and CACHE_BACKEND != 'locmem'
+REFERENCE_DATA_CACHE_SECONDS = 300 if REFERENCE_DATA_CACHE_SHARED else 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
 AUTHENTICATION_BACKENDS = [
-    'project.auth.MongoDBAuthBackend',
-    'django.contrib.auth.backends.ModelBackend',  # Keep the default backend as fallback
+    'project.auth.MongoDBAuthBackend',  # MongoDB is the only user store
+]
+
+# Password hashing. PASSWORD_HASHER picks the hasher for new hashes ('argon2'
+# needs argon2-cffi, otherwise 'pbkdf2' is used); the others only verify old
+# hashes, which are rehashed with the current hasher/parameters on login.
+try:
+    import argon2  # noqa: F401
+    HAS_ARGON2 = True
+except ImportError:
+    HAS_ARGON2 = False
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2' if HAS_ARGON2 else 'pbkdf2')
+PASSWORD_HASHER_PARAMS = {
+    'argon2': {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},  # memory in KiB
+    'pbkdf2': {'iterations': 1000000},  # Django's default, and the floor
+}
+_TUNED_HASHERS = {
+    'argon2': 'project.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'project.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_TUNED_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _TUNED_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
 ]
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -169,68 +238,150 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'project.authentication.MongoJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Encodes ObjectId/Decimal128 natively so views can return raw documents
+    'DEFAULT_RENDERER_CLASSES': [
+        'project.renderers.MongoJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_REFRESH_SERIALIZER': 'project.authentication.RevocationAwareRefreshSerializer',
+}
+
+# How often (seconds) each process pulls new entries from the revoked_tokens collection
+JWT_REVOCATION_REFRESH_SECONDS = 5
+
+# Login throttling (project.ratelimit): token buckets per username and per client IP.
+# Set LOGIN_RATE_LIMIT_CACHE to a CACHES alias to share buckets between workers.
+LOGIN_RATE_LIMITS = {
+    'username': {'capacity': 5, 'per_minute': 5},
+    'ip': {'capacity': 30, 'per_minute': 60},
 }
+LOGIN_RATE_LIMIT_CACHE = os.environ.get('LOGIN_RATE_LIMIT_CACHE') or None
+LOGIN_RATE_LIMIT_TRUST_FORWARDED = False  # True behind a proxy that sets X-Forwarded-For
+LOGIN_UNKNOWN_USER_CACHE_SECONDS = 60
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
+# Response headers the frontend reads (cursor pagination, revalidation, profiling)
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'ETag', 'Server-Timing']
+
+# Live task feed (SSE over a change stream, served by the ASGI app)
+TASK_FEED_BUFFER_SIZE = 1000  # recent events kept for Last-Event-ID resumes
+TASK_FEED_QUEUE_SIZE = 100  # per-subscriber backlog before forcing a reset
+TASK_FEED_KEEPALIVE_SECONDS = 15
+TASK_FEED_RETRY_MS = 3000
+
+# How often (seconds) the in-memory assignee name index checks for people changes
+NAME_RESOLVER_REFRESH_SECONDS = 30
+
+# User/person cards (people.user_cards) used to enrich tasks, comments and history.
+# Set USER_CARD_SHARED_CACHE to a CACHES alias to share loaded cards between workers.
+USER_CARD_CACHE_SECONDS = 30
+USER_CARD_CACHE_SIZE = 5000
+USER_CARD_SHARED_CACHE = os.environ.get('USER_CARD_SHARED_CACHE') or None
+
+# Done/archived tasks untouched for this many days move to the archive collections
+TASK_ARCHIVE_AFTER_DAYS = 90
+TASK_ARCHIVE_BATCH_SIZE = 500
+
+# Retention per collection (apply with `manage.py apply_retention`).
+# 'ttl': the server deletes documents `days` after the date in `field`.
+# 'rollup': entries older than `days` are summarized, then purged.
+# Set days to None to keep a collection forever.
+RETENTION_POLICIES = {
+    'task_history': {'mode': 'rollup', 'field': 'timestamp', 'days': 365},
+    'ai_training_data': {'mode': 'ttl', 'field': 'createdAt', 'days': 365},
+    'transcription_records': {'mode': 'ttl', 'field': 'created_at', 'days': 180},
+    # Predictions expire at their own expires_at
+    'ai_task_predictions': {'mode': 'ttl', 'field': 'expires_at', 'days': 0},
+}
 
 # OpenAI API key
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 
+# Request profiling (project.profiling): the share of requests profiled,
+# the duration above which a request is logged with its query fingerprints,
+# and how often one fingerprint may repeat in a request before it is logged
+# as a likely N+1 loop. Server-Timing headers reveal query counts and
+# timings to clients, so they are only sent in DEBUG unless switched on
+# (benchmark_api needs them, with the sample rate at 1).
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING', 'True') == 'True',
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '0.01')),
+    'SLOW_REQUEST_MS': 500,
+    'SERVER_TIMING': os.environ.get('REQUEST_PROFILING_SERVER_TIMING', str(DEBUG)) == 'True',
+    'REPEATED_QUERY_THRESHOLD': 10,
+}
+
+# Clients allowed to scrape /metrics ('*' for anyone). Under gunicorn,
+# PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes the numbers
+# cover all workers.
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 # Custom user model
 AUTH_USER_MODEL = 'people.User'
 
-# Add logging configuration
+# Logging (project.logconfig): every logger feeds the root handler, which
+# queues records for a background thread that writes them as JSON lines to
+# the console and LOG_FILE. LOG_LEVELS sets per-logger levels and
+# LOG_SAMPLING the share of sub-WARNING records kept per logger, e.g.
+# LOG_LEVELS="tasks=DEBUG" LOG_SAMPLING="project.profiling=0.1"
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FILE = os.environ.get('LOG_FILE', os.path.join(BASE_DIR, 'app.log'))
+LOG_LEVELS = parse_levels(os.environ.get('LOG_LEVELS', ''))
+LOG_SAMPLING = parse_rates(os.environ.get('LOG_SAMPLING', ''))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
+        'json': {
+            '()': 'project.logconfig.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'project.logconfig.SamplingFilter',
+            'rates': LOG_SAMPLING,
         },
     },
     'handlers': {
+        # Written to only by the queue listener thread
         'console': {
-            'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'mongodb.log'),
-            'formatter': 'verbose',
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': LOG_FILE,
+            'formatter': 'json',
         },
+        'queue': {
+            '()': 'project.logconfig.QueuedHandler',
+            'handlers': ['console', 'file'],
+            'filters': ['sampling'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'project': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-        'ai_integration': {
-            'handlers': ['console', 'file'],
             'level': 'INFO',
-            'propagate': False,
         },
+        **{name: {'level': level} for name, level in LOG_LEVELS.items()},
     },
 }
\ No newline at end of file
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from .ratelimit import LoginRateLimiter, TokenBucket
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratelimit-tests'},
+}
+LIMITS = {
+    'username': {'capacity': 2, 'per_minute': 1},
+    'ip': {'capacity': 3, 'per_minute': 1},
+}
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_allows_a_burst_of_capacity(self):
+        bucket = TokenBucket(3, 60)
+        state = None
+        for _ in range(3):
+            allowed, state, retry_after = bucket.take(state, 100.0)
+            self.assertTrue(allowed)
+            self.assertEqual(retry_after, 0)
+
+        allowed, state, retry_after = bucket.take(state, 100.0)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 1)
+
+    def test_retry_after_covers_the_missing_fraction(self):
+        bucket = TokenBucket(1, 6)  # one token per 10s
+        _, state, _ = bucket.take(None, 0.0)
+
+        allowed, _, retry_after = bucket.take(state, 4.0)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 6)
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(1, 6)
+        _, state, _ = bucket.take(None, 0.0)
+
+        allowed, _, _ = bucket.take(state, 10.0)
+        self.assertTrue(allowed)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(2, 60)
+        _, state, _ = bucket.take(None, 0.0)
+
+        # An hour idle still only buys a burst of two
+        results = []
+        for _ in range(3):
+            allowed, state, _ = bucket.take(state, 3600.0)
+            results.append(allowed)
+        self.assertEqual(results, [True, True, False])
+
+
+@override_settings(LOGIN_RATE_LIMITS=LIMITS, LOGIN_RATE_LIMIT_CACHE=None, LOGIN_UNKNOWN_USER_CACHE_SECONDS=60)
+class LoginRateLimiterTests(SimpleTestCase):
+    def test_username_bucket_limits_across_ips(self):
+        limiter = LoginRateLimiter()
+
+        self.assertEqual(limiter.check('alice', '10.0.0.1'), 0)
+        self.assertEqual(limiter.check('Alice', '10.0.0.2'), 0)
+        self.assertGreater(limiter.check('ALICE', '10.0.0.3'), 0)
+        self.assertEqual(limiter.check('bob', '10.0.0.3'), 0)
+
+    def test_ip_bucket_limits_across_usernames(self):
+        limiter = LoginRateLimiter()
+
+        for username in ['a', 'b', 'c']:
+            self.assertEqual(limiter.check(username, '10.0.0.1'), 0)
+        self.assertGreater(limiter.check('d', '10.0.0.1'), 0)
+        self.assertEqual(limiter.check('d', '10.0.0.2'), 0)
+
+    def test_unknown_username_is_remembered_until_forgotten(self):
+        limiter = LoginRateLimiter()
+
+        self.assertFalse(limiter.is_unknown_username('ghost'))
+        limiter.remember_unknown_username('ghost')
+        self.assertTrue(limiter.is_unknown_username('ghost'))
+
+        limiter.forget_unknown_username('ghost')
+        self.assertFalse(limiter.is_unknown_username('ghost'))
+
+    @override_settings(LOGIN_UNKNOWN_USER_CACHE_SECONDS=0)
+    def test_unknown_username_expires(self):
+        limiter = LoginRateLimiter()
+        limiter.remember_unknown_username('ghost')
+
+        self.assertFalse(limiter.is_unknown_username('ghost'))
+
+
+@override_settings(
+    CACHES=SHARED_CACHES, LOGIN_RATE_LIMITS=LIMITS, LOGIN_RATE_LIMIT_CACHE='shared',
+    LOGIN_UNKNOWN_USER_CACHE_SECONDS=60
+)
+class SharedLoginRateLimiterTests(SimpleTestCase):
+    """Two limiters stand in for two workers sharing one cache"""
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_workers_share_the_username_budget(self):
+        first, second = LoginRateLimiter(), LoginRateLimiter()
+
+        self.assertEqual(first.check('alice', '10.0.0.1'), 0)
+        self.assertEqual(first.check('alice', '10.0.0.2'), 0)
+        self.assertGreater(second.check('alice', '10.0.0.3'), 0)
+
+    def test_cache_errors_fall_back_to_the_local_bucket(self):
+        limiter = LoginRateLimiter()
+
+        with mock.patch.object(caches['shared'], 'get', side_effect=ConnectionError('down')), \
+                self.assertLogs('project.ratelimit', 'WARNING'):
+            self.assertEqual(limiter.check('alice', '10.0.0.1'), 0)
+            self.assertEqual(limiter.check('alice', '10.0.0.1'), 0)
+            # The local bucket still applies
+            self.assertGreater(limiter.check('alice', '10.0.0.1'), 0)
+
+    def test_unknown_usernames_live_only_in_the_shared_cache(self):
+        first, second = LoginRateLimiter(), LoginRateLimiter()
+
+        first.remember_unknown_username('ghost')
+        self.assertEqual(len(first._unknown), 0)
+        self.assertTrue(second.is_unknown_username('ghost'))
+
+    def test_forget_on_one_worker_clears_every_worker(self):
+        first, second = LoginRateLimiter(), LoginRateLimiter()
+        first.remember_unknown_username('ghost')
+
+        second.forget_unknown_username('ghost')
+        self.assertFalse(first.is_unknown_username('ghost'))
+
+    def test_unknown_username_lookup_survives_cache_errors(self):
+        limiter = LoginRateLimiter()
+
+        with mock.patch.object(caches['shared'], 'get', side_effect=ConnectionError('down')):
+            self.assertFalse(limiter.is_unknown_username('ghost'))
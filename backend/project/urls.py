@@ -14,22 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
 # Import auth views
-from .auth_views import RegisterView, LoginView, UserProfileView
+from .auth_views import RegisterView, LoginView, LogoutView, UserProfileView
 from rest_framework_simplejwt.views import TokenRefreshView
+from .metrics import metrics_view
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name='metrics'),
     
     # Authentication endpoints
     path("api/auth/register/", RegisterView.as_view(), name='register'),
     path("api/auth/login/", LoginView.as_view(), name='login'),
     path("api/auth/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
+    path("api/auth/logout/", LogoutView.as_view(), name='logout'),
     path("api/auth/user/", UserProfileView.as_view(), name='user_profile'),
     
     # API endpoints - enable them one by one as they're ready
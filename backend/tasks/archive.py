@@ -0,0 +1,133 @@
+# tasks/archive.py
+# Archival tier for finished tasks. Tasks that have been done/archived for
+# longer than the retention window move, with their comments, attachments
+# and history, into zstd-compressed *_archive collections so the hot
+# collections and their indexes only hold live work.
+import datetime
+import logging
+
+import pymongo
+from django.conf import settings
+from pymongo.errors import CollectionInvalid
+
+from .models import (
+    tasks_collection, comments_collection, attachments_collection,
+    task_history_collection, id_variants
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ['done', 'archived']
+
+tasks_archive_collection = settings.MONGODB_DB['tasks_archive']
+comments_archive_collection = settings.MONGODB_DB['comments_archive']
+attachments_archive_collection = settings.MONGODB_DB['attachments_archive']
+task_history_archive_collection = settings.MONGODB_DB['task_history_archive']
+
+# Hot collection -> archive collection for records hanging off a task
+CHILD_COLLECTIONS = [
+    (comments_collection, comments_archive_collection),
+    (attachments_collection, attachments_archive_collection),
+    (task_history_collection, task_history_archive_collection),
+]
+
+
+def ensure_archive_collections():
+    """Create the archive collections with zstd block compression"""
+    storage = {'wiredTiger': {'configString': 'block_compressor=zstd'}}
+    existing = set(settings.MONGODB_DB.list_collection_names())
+    for collection in [tasks_archive_collection] + [archive for _, archive in CHILD_COLLECTIONS]:
+        if collection.name not in existing:
+            try:
+                settings.MONGODB_DB.create_collection(collection.name, storageEngine=storage)
+            except CollectionInvalid:
+                pass  # Created concurrently
+
+    for _, archive in CHILD_COLLECTIONS:
+        archive.create_index([('task_id', pymongo.ASCENDING)], name='task_id')
+
+
+def _eligible_query(cutoff):
+    return {'status': {'$in': ARCHIVABLE_STATUSES}, 'updated_at': {'$lt': cutoff}}
+
+
+def _copy(collection, documents):
+    """Upsert documents by _id so a re-run after a crash doesn't fail on duplicates"""
+    if documents:
+        collection.bulk_write(
+            [pymongo.ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in documents],
+            ordered=False
+        )
+
+
+def archive_tasks(older_than_days=None, batch_size=None, dry_run=False):
+    """
+    Move finished tasks untouched for ``older_than_days`` into the archive.
+
+    Each batch is copied to the archive before it is removed from the hot
+    collections, so an interrupted run leaves duplicates (cleaned up next
+    run) rather than losing data. Tasks that still have live subtasks stay
+    hot so subtree queries keep working.
+
+    Returns the number of tasks archived (or that would be, for dry runs).
+    """
+    if older_than_days is None:
+        older_than_days = settings.TASK_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.TASK_ARCHIVE_BATCH_SIZE
+
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+    query = _eligible_query(cutoff)
+
+    if dry_run:
+        return tasks_collection.count_documents(query)
+
+    archived = 0
+    skipped = []
+    while True:
+        batch_query = dict(query, _id={'$nin': skipped}) if skipped else query
+        tasks = list(tasks_collection.find(batch_query).limit(batch_size))
+        if not tasks:
+            break
+
+        ids = [task['_id'] for task in tasks]
+        # Keep ancestors of live tasks in the hot set
+        live_ancestors = set(
+            str(ancestor) for ancestor in tasks_collection.distinct(
+                'ancestors',
+                {'ancestors': {'$in': ids}, '$nor': [query]}
+            )
+        )
+        if live_ancestors:
+            skipped.extend(task['_id'] for task in tasks if str(task['_id']) in live_ancestors)
+            tasks = [task for task in tasks if str(task['_id']) not in live_ancestors]
+            ids = [task['_id'] for task in tasks]
+            if not tasks:
+                continue
+
+        now = datetime.datetime.now()
+        for task in tasks:
+            task['archived_at'] = task.get('archived_at') or now
+
+        references = id_variants(ids)
+        _copy(tasks_archive_collection, tasks)
+        for hot, archive in CHILD_COLLECTIONS:
+            _copy(archive, list(hot.find({'task_id': {'$in': references}})))
+
+        for hot, _ in CHILD_COLLECTIONS:
+            hot.delete_many({'task_id': {'$in': references}})
+        tasks_collection.delete_many({'_id': {'$in': ids}})
+
+        archived += len(tasks)
+        logger.info(f"Archived {len(tasks)} tasks ({archived} so far)")
+
+    return archived
+
+
+def find_archived_task(task_id):
+    """Read-through lookup for a task that is no longer in the hot set"""
+    task = tasks_archive_collection.find_one({'_id': {'$in': id_variants([task_id])}})
+    if task:
+        task['archived'] = True
+    return task
+
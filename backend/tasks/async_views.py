@@ -0,0 +1,159 @@
+# tasks/async_views.py
+# Async variants of the hot task read endpoints for the ASGI entry point.
+# They return the same payloads as TaskViewSet but use the async Mongo
+# client, so independent lookups run concurrently instead of back to back.
+import asyncio
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+
+from project.async_utils import (
+    aauthenticate_request, error_response, mongo_json_response,
+    not_modified, unauthorized_response, validated_response
+)
+from project.caching import get_reference_data, get_reference_document
+from project.conditional import ascope_validators
+from utils.mongodb_connection import get_async_database
+from .models import id_variants
+from .serializers import TaskSerializer
+from .views import attach_person_cards, build_task_filters, security_scope_query
+
+
+async def _attach_person_cards(tasks, fields=('assigned_to', 'assigned_by')):
+    """Batched assignee/assigner details from the shared user-card cache"""
+    await sync_to_async(attach_person_cards, thread_sensitive=False)(tasks, fields)
+
+
+async def _find_one(collection, value):
+    if not value or not isinstance(value, ObjectId):
+        return None
+    return await collection.find_one({'_id': value})
+
+
+async def atask_security_scope(db, user):
+    """Async variant of task_security_scope"""
+    if not hasattr(user, 'role') or not user.role:
+        return None
+    if hasattr(user, 'is_admin') and await sync_to_async(user.is_admin)():
+        return None
+
+    user_id = ObjectId(str(user.id))
+
+    async def security_level_ids():
+        # Roles and security levels come from the reference data cache
+        user_role = await sync_to_async(get_reference_document)('roles', user.role)
+        if not user_role or 'permission_level' not in user_role:
+            return []
+        levels = await sync_to_async(get_reference_data)('security_levels')
+        return [
+            level['_id'] for level in levels
+            if 'required_permission_level' in level
+            and level['required_permission_level'] <= user_role['permission_level']
+        ]
+
+    async def team_ids():
+        cursor = db['teams'].find({'$or': [{'members': user_id}, {'leader': user_id}]}, {'_id': 1})
+        return [team['_id'] async for team in cursor]
+
+    levels, teams = await asyncio.gather(security_level_ids(), team_ids())
+    return security_scope_query(user_id, levels, teams)
+
+
+async def task_list(request):
+    """List all tasks"""
+    user = await aauthenticate_request(request)
+    if not user:
+        return unauthorized_response()
+
+    try:
+        query = build_task_filters(request.GET)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    db = get_async_database()
+    security_query = await atask_security_scope(db, user)
+    if security_query:
+        query['$or'] = security_query
+
+    etag, last_modified = await ascope_validators(db['tasks'], query)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    tasks = await db['tasks'].find(query).sort('created_at', -1).to_list(None)
+
+    await _attach_person_cards(tasks)
+
+    serializer = TaskSerializer(tasks, many=True)
+    return validated_response(serializer.data, etag, last_modified)
+
+
+async def task_detail(request, pk):
+    """Get a specific task"""
+    user = await aauthenticate_request(request)
+    if not user:
+        return unauthorized_response()
+
+    db = get_async_database()
+    task = await db['tasks'].find_one({'_id': {'$in': id_variants([pk])}})
+    if not task:
+        # Read through to the archive tier, like TaskViewSet.retrieve
+        task = await db['tasks_archive'].find_one({'_id': {'$in': id_variants([pk])}})
+        if task:
+            task['archived'] = True
+    if not task:
+        return error_response("Task not found", 404)
+
+    # The four lookups are independent, so issue them together
+    _, category, security_level, team = await asyncio.gather(
+        _attach_person_cards([task], fields=('assigned_to',)),
+        _find_one(db['task_categories'], task.get('category')),
+        _find_one(db['security_levels'], task.get('security_level')),
+        _find_one(db['teams'], task.get('team'))
+    )
+
+    if category:
+        task['category_details'] = {
+            'id': category['_id'],
+            'name': category.get('name', ''),
+            'color_code': category.get('color_code', '#FF5733')
+        }
+    if security_level:
+        task['security_level_details'] = {
+            'id': security_level['_id'],
+            'name': security_level.get('name', ''),
+            'required_permission_level': security_level.get('required_permission_level', 1)
+        }
+    if team:
+        task['team_details'] = {
+            'id': team['_id'],
+            'name': team.get('name', '')
+        }
+
+    serializer = TaskSerializer(task)
+    return mongo_json_response(serializer.data)
+
+
+async def user_tasks(request, user_id):
+    """Get tasks for a specific user"""
+    user = await aauthenticate_request(request)
+    if not user:
+        return unauthorized_response()
+
+    if not ObjectId.is_valid(user_id):
+        return error_response("Invalid user ID", 400)
+
+    db = get_async_database()
+    assignee = await db['people'].find_one({'userId': ObjectId(user_id)})
+    if not assignee:
+        return error_response("Person not found", 404)
+
+    query = {'assigned_to': str(assignee['_id'])}
+    if request.GET.get('status'):
+        query['status'] = request.GET.get('status')
+
+    tasks = await db['tasks'].find(query).sort('created_at', -1).to_list(None)
+    await _attach_person_cards(tasks)
+
+    serializer = TaskSerializer(tasks, many=True)
+    return mongo_json_response(serializer.data)
@@ -0,0 +1,118 @@
+# tasks/deletion.py
+# Cascading task deletion. Collects a task's whole subtree, then removes the
+# tasks and everything hanging off them (comments, attachments, history,
+# back-references on other tasks) in a fixed handful of bulk operations.
+# Stored attachment files are deleted in the background.
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+
+from .models import (
+    tasks_collection, comments_collection, attachments_collection,
+    task_history_collection, id_variants
+)
+
+logger = logging.getLogger(__name__)
+
+# Storage deletes can be slow (S3 etc.), so keep them off the request thread
+_file_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='task-file-delete')
+
+REFERENCE_FIELDS = ['related_tasks', 'blocking_tasks', 'blocked_by_tasks']
+
+
+def collect_closure(task_ids):
+    """
+    Get the _ids of the given tasks and all their descendants.
+
+    Uses the materialized ``ancestors`` paths, and also follows ``parent``
+    pointers so tasks without paths yet are not orphaned.
+    """
+    closure = {}
+    frontier = id_variants(task_ids)
+    query = {'_id': {'$in': frontier}}
+
+    while frontier:
+        new_ids = []
+        for task in tasks_collection.find(query, {'_id': 1}):
+            if str(task['_id']) not in closure:
+                closure[str(task['_id'])] = task['_id']
+                new_ids.append(task['_id'])
+
+        frontier = id_variants(new_ids)
+        query = {
+            '$or': [{'ancestors': {'$in': frontier}}, {'parent': {'$in': frontier}}],
+            '_id': {'$nin': list(closure.values())}
+        }
+
+    return list(closure.values())
+
+
+def _delete_files(paths):
+    for path in paths:
+        try:
+            default_storage.delete(path)
+        except Exception as e:
+            logger.error(f"Error deleting attachment file {path}: {str(e)}")
+
+
+def queue_file_deletions(paths):
+    if paths:
+        _file_executor.submit(_delete_files, list(paths))
+
+
+def cascade_delete(task_ids):
+    """
+    Delete tasks, their subtasks and all dependent records.
+    Returns counts of what was removed.
+    """
+    ids = collect_closure(task_ids)
+    if not ids:
+        return {'tasks': 0}
+
+    # Children reference tasks by both id forms (comments use the string pk)
+    references = id_variants(ids)
+    file_paths = [
+        attachment['file_path'] for attachment in attachments_collection.find(
+            {'task_id': {'$in': references}, 'file_path': {'$exists': True}},
+            {'file_path': 1}
+        )
+    ]
+
+    summary = {
+        'tasks': tasks_collection.delete_many({'_id': {'$in': ids}}).deleted_count,
+        'comments': comments_collection.delete_many({'task_id': {'$in': references}}).deleted_count,
+        'attachments': attachments_collection.delete_many({'task_id': {'$in': references}}).deleted_count,
+        'history': task_history_collection.delete_many({'task_id': {'$in': references}}).deleted_count,
+    }
+
+    # Drop dangling dependency/related links from the surviving tasks in one pass
+    summary['unlinked_tasks'] = tasks_collection.update_many(
+        {'$or': [{field: {'$in': references}} for field in REFERENCE_FIELDS]},
+        {
+            '$pull': {field: {'$in': references} for field in REFERENCE_FIELDS},
+            '$set': {'updated_at': datetime.datetime.now()}
+        }
+    ).modified_count
+
+    queue_file_deletions(file_paths)
+    summary['files_queued'] = len(file_paths)
+    return summary
+
+
+def cascade_archive(task_ids, user_id=None):
+    """
+    Archive tasks and their subtasks instead of deleting them: a single
+    update, reversible, and the records move to archive storage later.
+    """
+    ids = collect_closure(task_ids)
+    if not ids:
+        return {'tasks': 0}
+
+    now = datetime.datetime.now()
+    result = tasks_collection.update_many(
+        {'_id': {'$in': ids}},
+        {'$set': {'status': 'archived', 'archived_at': now, 'archived_by': user_id, 'updated_at': now}}
+    )
+    return {'tasks': result.modified_count}
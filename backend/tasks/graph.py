@@ -0,0 +1,213 @@
+# tasks/graph.py
+# Dependency graph over the blocking_tasks adjacency lists.
+#
+# On a task document, ``blocking_tasks`` lists the tasks that block it and
+# ``blocked_by_tasks`` the tasks it blocks, so an edge runs from each entry
+# of ``blocking_tasks`` to the task holding the list. Graphs are held as
+# integer adjacency arrays so every query below is O(V + E).
+import collections
+import datetime
+import threading
+
+from project.conditional import scope_validators
+from .models import tasks_collection
+
+DONE_STATUSES = ('done', 'archived')
+
+GRAPH_PROJECTION = {
+    'title': 1, 'status': 1, 'blocking_tasks': 1,
+    'start_date': 1, 'due_date': 1, 'team': 1, 'parent': 1
+}
+# Blockers outside the requested scope
+EXTERNAL_PROJECTION = {'status': 1}
+
+# Graphs by scope, reused until the scope's validator changes
+GRAPH_CACHE_SIZE = 64
+_graph_cache = collections.OrderedDict()
+_graph_cache_lock = threading.Lock()
+
+
+def _duration(task):
+    """Remaining effort in days: planned span if known, 1 otherwise, 0 once done"""
+    if task.get('status') in DONE_STATUSES:
+        return 0
+    start, due = task.get('start_date'), task.get('due_date')
+    if isinstance(start, datetime.datetime) and isinstance(due, datetime.datetime):
+        return max((due - start).days, 1)
+    return 1
+
+
+class DependencyGraph:
+    """Compact DAG of task dependencies"""
+
+    def __init__(self, tasks):
+        self.ids = [str(task['_id']) for task in tasks]
+        self.index = {task_id: i for i, task_id in enumerate(self.ids)}
+        self.titles = [task.get('title', '') for task in tasks]
+        self.done = [task.get('status') in DONE_STATUSES for task in tasks]
+        self.durations = [_duration(task) for task in tasks]
+
+        # blockers[i]: nodes that must finish before i; dependents[i]: the reverse
+        self.blockers = [[] for _ in tasks]
+        self.dependents = [[] for _ in tasks]
+        for i, task in enumerate(tasks):
+            for blocker_id in task.get('blocking_tasks') or []:
+                j = self.index.get(str(blocker_id))
+                if j is not None and j != i:
+                    self.blockers[i].append(j)
+                    self.dependents[j].append(i)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def topological_order(self):
+        """
+        Kahn's algorithm. Returns (order, cyclic_ids); tasks caught in or
+        behind a cycle are left out of the order and listed separately.
+        """
+        in_degree = [len(blockers) for blockers in self.blockers]
+        queue = collections.deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in self.dependents[i]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    queue.append(j)
+
+        ordered = set(order)
+        cyclic = [self.ids[i] for i in range(len(self)) if i not in ordered]
+        return [self.ids[i] for i in order], cyclic
+
+    def blocked(self):
+        """Map of unfinished task id -> ids of unfinished tasks blocking it"""
+        result = {}
+        for i, blockers in enumerate(self.blockers):
+            if self.done[i]:
+                continue
+            open_blockers = [self.ids[j] for j in blockers if not self.done[j]]
+            if open_blockers:
+                result[self.ids[i]] = open_blockers
+        return result
+
+    def critical_path(self):
+        """
+        Longest chain of remaining work through the DAG, weighted by task
+        duration. Returns (task ids, total days); cyclic tasks are ignored.
+        """
+        order, _ = self.topological_order()
+        finish = [0] * len(self)
+        previous = [None] * len(self)
+
+        for task_id in order:
+            i = self.index[task_id]
+            start = 0
+            for j in self.blockers[i]:
+                if finish[j] > start:
+                    start, previous[i] = finish[j], j
+            finish[i] = start + self.durations[i]
+
+        if not order:
+            return [], 0
+
+        end = max((self.index[task_id] for task_id in order), key=lambda i: finish[i])
+        path = []
+        node = end
+        while node is not None:
+            path.append(self.ids[node])
+            node = previous[node]
+        path.reverse()
+        return path, finish[end]
+
+    def reachable(self, start_id, target_id):
+        """Whether target can be reached from start by following dependents"""
+        start, target = self.index.get(str(start_id)), self.index.get(str(target_id))
+        if start is None or target is None:
+            return False
+        seen = {start}
+        queue = collections.deque([start])
+        while queue:
+            i = queue.popleft()
+            if i == target:
+                return True
+            for j in self.dependents[i]:
+                if j not in seen:
+                    seen.add(j)
+                    queue.append(j)
+        return False
+
+    def would_create_cycle(self, task_id, blocking_task_id):
+        """Whether making blocking_task_id block task_id closes a cycle"""
+        return str(task_id) == str(blocking_task_id) or self.reachable(task_id, blocking_task_id)
+
+    def summary(self):
+        order, cyclic = self.topological_order()
+        path, length = self.critical_path()
+        return {
+            'task_count': len(self),
+            'edge_count': sum(len(blockers) for blockers in self.blockers),
+            'topological_order': order,
+            'cyclic_tasks': cyclic,
+            'blocked': self.blocked(),
+            'critical_path': {'tasks': path, 'length_days': length},
+        }
+
+
+def load_graph(query):
+    """
+    Build (or reuse) the dependency graph for the tasks matching ``query``.
+
+    Blockers outside the scope are fetched in one extra query so their
+    status counts, but their own dependencies are not followed and only
+    their id and status are loaded, since the caller may not see them.
+    """
+    etag, _ = scope_validators(tasks_collection, query)
+    key = repr(sorted(query.items(), key=lambda item: item[0]))
+
+    with _graph_cache_lock:
+        cached = _graph_cache.get(key)
+        if cached and cached[0] == etag:
+            _graph_cache.move_to_end(key)
+            return cached[1]
+
+    tasks = list(tasks_collection.find(query, GRAPH_PROJECTION))
+    known = {str(task['_id']) for task in tasks}
+    external = {
+        blocker_id for task in tasks for blocker_id in task.get('blocking_tasks') or []
+        if str(blocker_id) not in known
+    }
+    if external:
+        tasks.extend(tasks_collection.find({'_id': {'$in': list(external)}}, EXTERNAL_PROJECTION))
+
+    graph = DependencyGraph(tasks)
+    with _graph_cache_lock:
+        _graph_cache[key] = (etag, graph)
+        _graph_cache.move_to_end(key)
+        while len(_graph_cache) > GRAPH_CACHE_SIZE:
+            _graph_cache.popitem(last=False)
+    return graph
+
+
+def would_create_cycle(task_id, blocking_task_id):
+    """
+    Check a new edge against the whole collection with one $graphLookup:
+    it closes a cycle if task_id already (transitively) blocks blocking_task_id.
+    """
+    if str(task_id) == str(blocking_task_id):
+        return True
+
+    result = list(tasks_collection.aggregate([
+        {'$match': {'_id': task_id}},
+        {'$graphLookup': {
+            'from': tasks_collection.name,
+            'startWith': '$blocked_by_tasks',
+            'connectFromField': 'blocked_by_tasks',
+            'connectToField': '_id',
+            'as': 'downstream',
+        }},
+        {'$project': {'downstream': '$downstream._id'}},
+    ]))
+    if not result:
+        return False
+    return str(blocking_task_id) in {str(downstream_id) for downstream_id in result[0]['downstream']}
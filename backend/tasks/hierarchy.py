@@ -0,0 +1,174 @@
+# tasks/hierarchy.py
+# Materialized ancestor paths for hierarchical tasks.
+#
+# Every task keeps ``ancestors`` (root first, parent last) and ``depth``
+# alongside ``parent``. With a multikey index on ``ancestors`` a whole
+# subtree is a single indexed match, and rollups come from the same
+# aggregation.
+import datetime
+
+import pymongo
+
+from .graph import DONE_STATUSES
+from .models import tasks_collection, id_variants
+
+SUBTREE_PROJECTION = {
+    'title': 1, 'status': 1, 'priority': 1, 'parent': 1, 'ancestors': 1, 'depth': 1,
+    'assigned_to': 1, 'due_date': 1, 'estimated_hours': 1, 'created_at': 1
+}
+
+
+def ensure_hierarchy_indexes():
+    tasks_collection.create_index([('ancestors', pymongo.ASCENDING)], name='ancestors')
+    tasks_collection.create_index([('parent', pymongo.ASCENDING)], name='parent')
+
+
+def find_task(task_id, projection=None):
+    """Find a task whatever form its _id is stored in"""
+    return tasks_collection.find_one({'_id': {'$in': id_variants([task_id])}}, projection)
+
+
+def path_fields(parent):
+    """parent/ancestors/depth for a task placed under ``parent`` (None for a root)"""
+    if not parent:
+        return {'parent': None, 'ancestors': [], 'depth': 0}
+    ancestors = list(parent.get('ancestors') or []) + [parent['_id']]
+    return {'parent': parent['_id'], 'ancestors': ancestors, 'depth': len(ancestors)}
+
+
+def set_parent(task_id, parent_id):
+    """
+    Move a task (and its whole subtree) under a new parent, or to the root
+    when parent_id is empty. Raises ValueError for unknown tasks or moves
+    that would put a task inside its own subtree.
+    """
+    task = find_task(task_id, {'ancestors': 1})
+    if not task:
+        raise ValueError("Task not found")
+
+    parent = None
+    if parent_id:
+        parent = find_task(parent_id, {'ancestors': 1})
+        if not parent:
+            raise ValueError("Parent task not found")
+        if parent['_id'] == task['_id'] or task['_id'] in (parent.get('ancestors') or []):
+            raise ValueError("A task cannot be moved under itself or one of its subtasks")
+
+    fields = path_fields(parent)
+    # Moved tasks count as modified, so list validators change with them
+    now = datetime.datetime.now()
+    tasks_collection.update_one({'_id': task['_id']}, {'$set': dict(fields, updated_at=now)})
+
+    # Rewrite the prefix of every descendant's path in one pipeline update
+    new_prefix = fields['ancestors'] + [task['_id']]
+    tasks_collection.update_many(
+        {'ancestors': task['_id']},
+        [
+            {'$set': {'ancestors': {'$concatArrays': [
+                new_prefix,
+                {'$slice': [
+                    '$ancestors',
+                    {'$add': [{'$indexOfArray': ['$ancestors', task['_id']]}, 1]},
+                    {'$size': '$ancestors'}
+                ]}
+            ]}}},
+            {'$set': {'depth': {'$size': '$ancestors'}, 'updated_at': now}}
+        ]
+    )
+    return fields
+
+
+def _rollup(stats):
+    total = stats.get('total', 0)
+    done = stats.get('done', 0)
+    return {
+        'total_tasks': total,
+        'done_tasks': done,
+        'percent_done': round(100.0 * done / total, 1) if total else 0.0,
+        'total_estimate_hours': stats.get('estimate', 0) or 0,
+        'remaining_estimate_hours': stats.get('remaining_estimate', 0) or 0,
+    }
+
+
+def get_subtree(task_id):
+    """
+    Load a task with all its descendants as a nested tree, each node carrying
+    rollups (percent done, estimates) over its own subtree. One aggregation.
+    Returns None if the task does not exist.
+    """
+    root = find_task(task_id, {'_id': 1})
+    if not root:
+        return None
+    root_id = root['_id']
+
+    is_done = {'$in': ['$status', list(DONE_STATUSES)]}
+    estimate = {'$ifNull': ['$estimated_hours', 0]}
+    stats = {
+        'total': {'$sum': 1},
+        'done': {'$sum': {'$cond': [is_done, 1, 0]}},
+        'estimate': {'$sum': estimate},
+        'remaining_estimate': {'$sum': {'$cond': [is_done, 0, estimate]}},
+    }
+
+    result = list(tasks_collection.aggregate([
+        {'$match': {'$or': [{'_id': root_id}, {'ancestors': root_id}]}},
+        {'$project': SUBTREE_PROJECTION},
+        {'$facet': {
+            'tasks': [{'$sort': {'depth': 1, 'priority': 1, 'created_at': 1}}],
+            # Each task counts towards itself and every ancestor inside the subtree
+            'rollups': [
+                {'$project': {
+                    'status': 1, 'estimated_hours': 1,
+                    'node': {'$concatArrays': [{'$ifNull': ['$ancestors', []]}, ['$_id']]}
+                }},
+                {'$unwind': '$node'},
+                {'$group': {'_id': '$node', **stats}},
+            ],
+        }},
+    ]))[0]
+
+    rollups = {str(stats['_id']): _rollup(stats) for stats in result['rollups']}
+    nodes = {}
+    for task in result['tasks']:
+        task['rollup'] = rollups.get(str(task['_id']), _rollup({}))
+        task['children'] = []
+        nodes[str(task['_id'])] = task
+
+    for task in result['tasks']:
+        if task['_id'] != root_id and str(task.get('parent')) in nodes:
+            nodes[str(task['parent'])]['children'].append(task)
+
+    return nodes[str(root_id)]
+
+
+def rebuild_paths():
+    """
+    Recompute ancestors/depth for every task from the parent pointers.
+    Returns (updated, orphaned) counts; tasks whose parent is missing become roots.
+    """
+    tasks = {str(task['_id']): task for task in tasks_collection.find({}, {'parent': 1})}
+    children = {}
+    roots = []
+    orphaned = 0
+    for key, task in tasks.items():
+        parent = task.get('parent')
+        if parent and str(parent) in tasks and str(parent) != key:
+            children.setdefault(str(parent), []).append(key)
+        else:
+            if parent:
+                orphaned += 1
+            roots.append(key)
+
+    updates = []
+    stack = [(key, None) for key in roots]
+    while stack:
+        key, parent = stack.pop()
+        fields = path_fields(parent)
+        task = tasks[key]
+        task['ancestors'] = fields['ancestors']
+        updates.append(pymongo.UpdateOne({'_id': task['_id']}, {'$set': fields}))
+        stack.extend((child, task) for child in children.get(key, []))
+
+    for i in range(0, len(updates), 1000):
+        tasks_collection.bulk_write(updates[i:i + 1000], ordered=False)
+    return len(updates), orphaned
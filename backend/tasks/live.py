@@ -0,0 +1,274 @@
+# tasks/live.py
+# Live task feed over Server-Sent Events. Needs the ASGI entry point and a
+# replica set, since it tails a MongoDB change stream.
+import asyncio
+import collections
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from pymongo.errors import PyMongoError
+
+from project.async_utils import aauthenticate_request, unauthorized_response
+from project.renderers import MongoJSONEncoder
+from utils.mongodb_connection import get_async_database
+from .models import tasks_collection
+from .views import task_security_scope
+
+logger = logging.getLogger(__name__)
+
+FEED_COLLECTIONS = ['tasks', 'comments', 'task_history']
+# Task fields the security scope clauses test
+SCOPE_FIELDS = ['security_level', 'assigned_to', 'team']
+
+
+def _same_id(stored, value):
+    return stored is not None and value is not None and str(stored) == str(value)
+
+
+def _matches(document, clause):
+    """Evaluate one security_scope_query clause against a task's scope fields"""
+    for field, condition in clause.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if '$exists' in condition and (field in document) != condition['$exists']:
+                return False
+            if '$in' in condition and not any(_same_id(value, item) for item in condition['$in']):
+                return False
+        elif condition is None:
+            if value is not None:
+                return False
+        elif not _same_id(value, condition):
+            return False
+    return True
+
+
+class FeedScope:
+    """
+    The set of tasks a subscriber may see, defined by the same security
+    $or clauses as the task list. A scope of ``None`` means the subscriber
+    sees everything.
+    """
+
+    def __init__(self, clauses, task_ids):
+        self.clauses = clauses
+        self.task_ids = set(task_ids)
+
+    def visible(self, event):
+        """The event to deliver to this subscriber, or None"""
+        task_id = event['task_id']
+
+        if event['collection'] != 'tasks':
+            return event if task_id in self.task_ids else None
+
+        if event['operation'] == 'delete':
+            if task_id in self.task_ids:
+                self.task_ids.discard(task_id)
+                return event
+            return None
+
+        fields = event['scope_fields']
+        if fields is not None and any(_matches(fields, clause) for clause in self.clauses):
+            self.task_ids.add(task_id)
+            return event
+
+        # Task moved out of scope: only tell the client to drop it
+        if task_id in self.task_ids:
+            self.task_ids.discard(task_id)
+            return dict(event, operation='remove', data=None)
+        return None
+
+
+class Subscriber:
+    """A connected client with its own bounded event queue"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queue = asyncio.Queue(maxsize=settings.TASK_FEED_QUEUE_SIZE)
+        self.needs_reset = False
+
+    def push(self, event):
+        if self.needs_reset:
+            return
+        if self.scope is not None:
+            event = self.scope.visible(event)
+            if event is None:
+                return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: tell it to refetch instead of buffering without bound
+            self.needs_reset = True
+
+
+class TaskFeedHub:
+    """
+    Fans a single change stream out to every subscriber of this process.
+    Recent events are kept so reconnecting clients can resume from their
+    last event ID.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.recent_events = collections.deque(maxlen=settings.TASK_FEED_BUFFER_SIZE)
+        self.resume_token = None
+        self.watcher = None
+
+    def subscribe(self, scope, last_event_id=None):
+        subscriber = Subscriber(scope)
+
+        if last_event_id:
+            event_ids = [event['id'] for event in self.recent_events]
+            if last_event_id in event_ids:
+                for event in list(self.recent_events)[event_ids.index(last_event_id) + 1:]:
+                    subscriber.push(event)
+            else:
+                # Too old to replay, the client has to refetch its board
+                subscriber.needs_reset = True
+
+        self.subscribers.add(subscriber)
+        if self.watcher is None or self.watcher.done():
+            self.watcher = asyncio.create_task(self._watch())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self.watcher:
+            # Nobody is listening; events from the gap can't be replayed later
+            self.watcher.cancel()
+            self.watcher = None
+            self.resume_token = None
+            self.recent_events.clear()
+
+    async def _watch(self):
+        db = get_async_database()
+        pipeline = [{'$match': {'ns.coll': {'$in': FEED_COLLECTIONS}}}]
+        delay = 1
+
+        while True:
+            try:
+                stream = await db.watch(
+                    pipeline,
+                    full_document='updateLookup',
+                    resume_after=self.resume_token
+                )
+                async with stream:
+                    delay = 1
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        event = _change_to_event(change)
+                        self.recent_events.append(event)
+                        for subscriber in list(self.subscribers):
+                            subscriber.push(event)
+            except PyMongoError as e:
+                logger.error(f"Task feed change stream error: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+hub = TaskFeedHub()
+
+
+def _change_to_event(change):
+    """Reduce a change stream document to the delta sent to clients"""
+    collection = change['ns']['coll']
+    operation = change['operationType']
+    document_id = change.get('documentKey', {}).get('_id')
+    full_document = change.get('fullDocument') or {}
+
+    if collection == 'tasks':
+        task_id = document_id
+    else:
+        task_id = full_document.get('task_id')
+
+    if operation == 'update':
+        description = change.get('updateDescription', {})
+        data = {
+            'updated': description.get('updatedFields', {}),
+            'removed': description.get('removedFields', [])
+        }
+    elif operation in ('insert', 'replace'):
+        data = full_document
+    else:
+        data = None
+
+    return {
+        'id': change['_id']['_data'],
+        'collection': collection,
+        'operation': operation,
+        'document_id': str(document_id) if document_id is not None else None,
+        'task_id': str(task_id) if task_id is not None else None,
+        # None when the task is gone, so it can't match the "no security_level" clause
+        'scope_fields': (
+            {field: full_document[field] for field in SCOPE_FIELDS if field in full_document}
+            if full_document else None
+        ),
+        'data': data,
+    }
+
+
+def _format_event(event):
+    payload = {
+        'collection': event['collection'],
+        'operation': event['operation'],
+        'id': event['document_id'],
+        'task_id': event['task_id'],
+        'data': event['data'],
+    }
+    return f"id: {event['id']}\nevent: {event['collection']}\ndata: {json.dumps(payload, cls=MongoJSONEncoder)}\n\n"
+
+
+def _load_scope(user):
+    """Work out which tasks the user may follow (None if they may see all)"""
+    clauses = task_security_scope(user)
+    if clauses is None:
+        return None
+
+    task_ids = [str(task['_id']) for task in tasks_collection.find({'$or': clauses}, {'_id': 1})]
+    return FeedScope(clauses, task_ids)
+
+
+async def _event_stream(subscriber):
+    try:
+        yield f"retry: {settings.TASK_FEED_RETRY_MS}\n\n"
+        while True:
+            if subscriber.needs_reset:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.needs_reset = False
+                yield "event: reset\ndata: {}\n\n"
+                continue
+
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=settings.TASK_FEED_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            yield _format_event(event)
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+async def task_feed(request):
+    """
+    Stream task, comment and history changes visible to the user as SSE.
+    Clients resume with the standard Last-Event-ID header.
+    """
+    user = await aauthenticate_request(request, allow_query_token=True)
+    if not user:
+        return unauthorized_response()
+
+    scope = await sync_to_async(_load_scope)(user)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    subscriber = hub.subscribe(scope, last_event_id)
+
+    response = StreamingHttpResponse(_event_stream(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
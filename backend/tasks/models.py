@@ -4,6 +4,9 @@ from bson import ObjectId
 import datetime
 import uuid
 
+from project.caching import get_reference_data, invalidate_reference_data
+from project.conditional import bump_collection_version
+
 # Access MongoDB collections
 tasks_collection = settings.MONGODB_DB['tasks']
 comments_collection = settings.MONGODB_DB['comments']
@@ -14,6 +17,17 @@ security_levels_collection = settings.MONGODB_DB['security_levels']
 transcription_collection = settings.MONGODB_DB['transcription_records']
 ai_prediction_collection = settings.MONGODB_DB['ai_task_predictions']
 
+
+def id_variants(ids):
+    """References to tasks, people and teams are stored both as strings and ObjectIds"""
+    variants = []
+    for value in ids:
+        variants.append(str(value))
+        if ObjectId.is_valid(str(value)):
+            variants.append(ObjectId(str(value)))
+    return variants
+
+
 class TaskCategory:
     """
     Categories for tasks (e.g., Development, Design, Marketing).
@@ -27,6 +41,8 @@ class TaskCategory:
             data['color_code'] = "#FF5733"  # Default color
             
         result = categories_collection.insert_one(data)
+        bump_collection_version('task_categories')
+        invalidate_reference_data('task_categories')
         data['_id'] = result.inserted_id
         return data
     
@@ -43,8 +59,8 @@ class TaskCategory:
     
     @staticmethod
     def get_all():
-        """Get all categories"""
-        return list(categories_collection.find())
+        """Get all categories (cached)"""
+        return get_reference_data('task_categories')
     
     @staticmethod
     def update(category_id, update_data):
@@ -59,6 +75,8 @@ class TaskCategory:
             {'_id': category_id},
             {'$set': update_data}
         )
+        bump_collection_version('task_categories')
+        invalidate_reference_data('task_categories')
         
         if result.modified_count > 0:
             return TaskCategory.get_by_id(category_id)
@@ -74,6 +92,8 @@ class TaskCategory:
                 return False
                 
         result = categories_collection.delete_one({'_id': category_id})
+        bump_collection_version('task_categories')
+        invalidate_reference_data('task_categories')
         return result.deleted_count > 0
 
 
@@ -90,6 +110,7 @@ class SecurityLevel:
             data['required_permission_level'] = 1  # Default permission level
             
         result = security_levels_collection.insert_one(data)
+        invalidate_reference_data('security_levels')
         data['_id'] = result.inserted_id
         return data
     
@@ -106,8 +127,8 @@ class SecurityLevel:
     
     @staticmethod
     def get_all():
-        """Get all security levels"""
-        return list(security_levels_collection.find())
+        """Get all security levels (cached)"""
+        return get_reference_data('security_levels')
 
 
 class Task:
@@ -149,6 +170,11 @@ class Task:
             
         if 'ai_generated' not in task_data:
             task_data['ai_generated'] = False
+        
+        # Materialize the ancestor path so subtrees are one indexed query
+        from .hierarchy import find_task, path_fields
+        parent = find_task(task_data['parent'], {'ancestors': 1}) if task_data.get('parent') else None
+        task_data.update(path_fields(parent))
             
         # Insert and return
         tasks_collection.insert_one(task_data)
@@ -186,17 +212,12 @@ class Task:
         return None
     
     @staticmethod
-    def delete(task_id):
-        """Delete a task"""
-        # Delete the task
-        result = tasks_collection.delete_one({'_id': task_id})
+    def delete(task_id, archive=False):
+        """Delete (or archive) a task with its subtasks and everything attached to them"""
+        from .deletion import cascade_archive, cascade_delete
         
-        # Delete all related comments and attachments
-        if result.deleted_count > 0:
-            comments_collection.delete_many({'task_id': task_id})
-            attachments_collection.delete_many({'task_id': task_id})
-            
-        return result.deleted_count > 0
+        summary = cascade_archive([task_id]) if archive else cascade_delete([task_id])
+        return summary['tasks'] > 0
     
     @staticmethod
     def get_by_user(user_id, status=None):
@@ -218,35 +239,60 @@ class Task:
         """Get all child tasks for a parent task"""
         return list(tasks_collection.find({'parent': task_id}).sort('priority', 1))
     
+    @staticmethod
+    def get_subtree(task_id):
+        """Get a task with all its descendants nested, with progress rollups"""
+        from .hierarchy import get_subtree
+        return get_subtree(task_id)
+    
+    @staticmethod
+    def set_parent(task_id, parent_id):
+        """Move a task and its subtree under another task (or to the root)"""
+        from .hierarchy import set_parent
+        return set_parent(task_id, parent_id)
+    
     @staticmethod
     def add_related_task(task_id, related_task_id):
         """Add a related task (bidirectional relationship)"""
+        now = datetime.datetime.now()
+        
         # Add to first task
         tasks_collection.update_one(
             {'_id': task_id},
-            {'$addToSet': {'related_tasks': related_task_id}}
+            {'$addToSet': {'related_tasks': related_task_id}, '$set': {'updated_at': now}}
         )
         
         # Add to the related task (symmetrical)
         tasks_collection.update_one(
             {'_id': related_task_id},
-            {'$addToSet': {'related_tasks': task_id}}
+            {'$addToSet': {'related_tasks': task_id}, '$set': {'updated_at': now}}
         )
     
     @staticmethod
     def add_blocking_task(task_id, blocking_task_id):
-        """Add a blocking task relationship"""
+        """
+        Add a blocking task relationship.
+        Returns False without writing if the edge would create a dependency cycle.
+        """
+        from .graph import would_create_cycle
+        
+        if would_create_cycle(task_id, blocking_task_id):
+            return False
+        
+        now = datetime.datetime.now()
+        
         # Update that this task is blocked by another
         tasks_collection.update_one(
             {'_id': task_id},
-            {'$addToSet': {'blocking_tasks': blocking_task_id}}
+            {'$addToSet': {'blocking_tasks': blocking_task_id}, '$set': {'updated_at': now}}
         )
         
         # Update that the blocking task blocks this one
         tasks_collection.update_one(
             {'_id': blocking_task_id},
-            {'$addToSet': {'blocked_by_tasks': task_id}}
+            {'$addToSet': {'blocked_by_tasks': task_id}, '$set': {'updated_at': now}}
         )
+        return True
     
     @staticmethod
     def can_user_modify(task, user):
@@ -503,12 +549,10 @@ class AITaskPrediction:
         query = {'user_id': user_id}
         
         if active_only:
-            # Only get predictions that haven't expired
-            now = datetime.datetime.now()
-            query['$or'] = [
-                {'expires_at': {'$gt': now}},
-                {'expires_at': None}
-            ]
+            # Expired predictions are purged by the expires_at TTL index; this
+            # only hides the ones the TTL monitor hasn't reached yet. A single
+            # predicate keeps the (user_id, created_at) index usable.
+            query['expires_at'] = {'$not': {'$lte': datetime.datetime.now()}}
             
         return list(
             ai_prediction_collection.find(query)
@@ -0,0 +1,84 @@
+# tasks/pagination.py
+# Keyset (cursor) pagination on (sort field, _id). Each page is one indexed
+# range scan, however deep the client pages, unlike skip/limit.
+import base64
+
+import pymongo
+from bson import json_util
+
+from .models import comments_collection, task_history_collection
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(document, field):
+    raw = json_util.dumps([document.get(field), document['_id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Raises ValueError for cursors that weren't produced by encode_cursor"""
+    try:
+        value, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return value, last_id
+
+
+def page_size_param(params):
+    """Read ?limit=, clamped to MAX_PAGE_SIZE. Raises ValueError if not a number."""
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def paginate(collection, query, field, direction=1, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Fetch one page of ``query`` ordered by (field, _id).
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        op = '$gt' if direction == 1 else '$lt'
+        after = {'$or': [
+            {field: {op: value}},
+            {field: value, '_id': {op: last_id}}
+        ]}
+        query = {'$and': [query, after]} if query else after
+
+    documents = list(
+        collection.find(query)
+        .sort([(field, direction), ('_id', direction)])
+        .limit(limit + 1)
+    )
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1], field)
+    return documents, next_cursor
+
+
+def set_next_cursor(response, next_cursor):
+    """Pages stay plain lists; the cursor for the next page travels in a header"""
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def ensure_pagination_indexes():
+    comments_collection.create_index(
+        [('task_id', pymongo.ASCENDING), ('created_at', pymongo.ASCENDING), ('_id', pymongo.ASCENDING)],
+        name='task_id_created_at'
+    )
+    comments_collection.create_index(
+        [('created_at', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)],
+        name='created_at'
+    )
+    task_history_collection.create_index(
+        [('task_id', pymongo.ASCENDING), ('timestamp', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)],
+        name='task_id_timestamp'
+    )
@@ -0,0 +1,66 @@
+# tasks/search.py
+# Index-backed task search: a weighted text index over title/description,
+# optionally narrowed to assignees whose name starts with a prefix.
+import pymongo
+
+from people.search import name_prefix_query, people_collection
+from .models import tasks_collection
+
+TEXT_INDEX_NAME = 'task_text_search'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def ensure_task_indexes():
+    """Create the task text index (a collection can only have one)"""
+    tasks_collection.create_index(
+        [('title', pymongo.TEXT), ('description', pymongo.TEXT)],
+        name=TEXT_INDEX_NAME,
+        weights={'title': 10, 'description': 2},
+        default_language='english'
+    )
+
+
+def assignee_ids_for_prefix(prefix):
+    """People ids whose name starts with prefix, in both stored forms"""
+    ids = []
+    for person in people_collection.find(name_prefix_query(prefix), {'_id': 1}):
+        ids.extend([person['_id'], str(person['_id'])])
+    return ids
+
+
+def search_tasks(text=None, filters=None, assignee_prefix=None, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Search tasks, ranked by text relevance when ``text`` is given and by
+    newest first otherwise.
+
+    Returns (tasks, total_count).
+    """
+    query = dict(filters or {})
+
+    if assignee_prefix:
+        assignee_ids = assignee_ids_for_prefix(assignee_prefix)
+        if not assignee_ids:
+            return [], 0
+        assignee_query = {'assigned_to': {'$in': assignee_ids}}
+        if 'assigned_to' in query:
+            query.setdefault('$and', []).append(assignee_query)
+        else:
+            query.update(assignee_query)
+
+    if text:
+        query['$text'] = {'$search': text}
+        projection = {'score': {'$meta': 'textScore'}}
+        sort = [('score', {'$meta': 'textScore'}), ('created_at', pymongo.DESCENDING)]
+    else:
+        projection = None
+        sort = [('created_at', pymongo.DESCENDING)]
+
+    total = tasks_collection.count_documents(query)
+    tasks = list(
+        tasks_collection.find(query, projection)
+        .sort(sort)
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+    )
+    return tasks, total
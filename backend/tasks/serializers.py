@@ -51,6 +51,16 @@ class TaskSerializer(serializers.Serializer):
     related_tasks = serializers.ListField(child=serializers.CharField(), required=False)
     blocking_tasks = serializers.ListField(child=serializers.CharField(), required=False)
     
+    # Hierarchy (ancestors is root first, maintained by the backend)
+    parent = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    ancestors = serializers.ListField(child=serializers.CharField(), read_only=True)
+    depth = serializers.IntegerField(read_only=True)
+    estimated_hours = serializers.FloatField(required=False, allow_null=True)
+    
+    # Set when the task was served from the archive tier
+    archived = serializers.BooleanField(read_only=True, required=False)
+    archived_at = serializers.DateTimeField(read_only=True, required=False)
+    
     def to_representation(self, instance):
         """Convert the MongoDB document to a serializable format."""
         # Make sure instance is a dict
@@ -62,7 +72,7 @@ class TaskSerializer(serializers.Serializer):
             instance['_id'] = str(instance['_id'])
             
         # Convert additional fields if needed
-        for field in ['assigned_to', 'assigned_by', 'team', 'category', 'security_level']:
+        for field in ['assigned_to', 'assigned_by', 'team', 'category', 'security_level', 'parent']:
             if field in instance and instance[field]:
                 instance[field] = str(instance[field])
                 
@@ -72,6 +82,9 @@ class TaskSerializer(serializers.Serializer):
             
         if 'blocking_tasks' in instance and instance['blocking_tasks']:
             instance['blocking_tasks'] = [str(t) for t in instance['blocking_tasks']]
+        
+        if 'ancestors' in instance and instance['ancestors']:
+            instance['ancestors'] = [str(t) for t in instance['ancestors']]
             
         # Let the parent class handle the rest
         return super().to_representation(instance)
@@ -1,3 +1,123 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .graph import DependencyGraph, would_create_cycle
+
+
+def task(task_id, blocking=(), status='todo', **fields):
+    return dict({'_id': task_id, 'title': task_id.upper(), 'status': status, 'blocking_tasks': list(blocking)}, **fields)
+
+
+class DependencyGraphTests(SimpleTestCase):
+    """a blocks b and d, b blocks c; e and f block each other"""
+
+    def graph(self, **overrides):
+        tasks = {
+            'a': task('a'),
+            'b': task('b', ['a']),
+            'c': task('c', ['b']),
+            'd': task('d', ['a']),
+            'e': task('e', ['f']),
+            'f': task('f', ['e']),
+        }
+        tasks.update(overrides)
+        return DependencyGraph(list(tasks.values()))
+
+    def test_topological_order_puts_blockers_first(self):
+        order, _ = self.graph().topological_order()
+
+        self.assertEqual(set(order), {'a', 'b', 'c', 'd'})
+        self.assertLess(order.index('a'), order.index('b'))
+        self.assertLess(order.index('b'), order.index('c'))
+        self.assertLess(order.index('a'), order.index('d'))
+
+    def test_topological_order_reports_cycles(self):
+        _, cyclic = self.graph().topological_order()
+
+        self.assertEqual(sorted(cyclic), ['e', 'f'])
+
+    def test_tasks_behind_a_cycle_are_reported_as_cyclic(self):
+        _, cyclic = self.graph(g=task('g', ['e'])).topological_order()
+
+        self.assertEqual(sorted(cyclic), ['e', 'f', 'g'])
+
+    def test_self_edges_and_unknown_blockers_are_ignored(self):
+        graph = self.graph(a=task('a', ['a', 'missing']))
+
+        self.assertEqual(graph.blockers[graph.index['a']], [])
+        self.assertNotIn('a', graph.topological_order()[1])
+
+    def test_critical_path_is_the_longest_chain(self):
+        path, length = self.graph().critical_path()
+
+        self.assertEqual(path, ['a', 'b', 'c'])
+        self.assertEqual(length, 3)
+
+    def test_critical_path_weights_tasks_by_planned_days(self):
+        start = datetime.datetime(2025, 1, 1)
+        long_task = task('d', ['a'], start_date=start, due_date=start + datetime.timedelta(days=5))
+        path, length = self.graph(d=long_task).critical_path()
+
+        self.assertEqual(path, ['a', 'd'])
+        self.assertEqual(length, 6)
+
+    def test_done_tasks_add_no_time_to_the_critical_path(self):
+        _, length = self.graph(a=task('a', status='done')).critical_path()
+
+        self.assertEqual(length, 2)
+
+    def test_critical_path_of_an_empty_graph(self):
+        self.assertEqual(DependencyGraph([]).critical_path(), ([], 0))
+
+    def test_blocked_lists_open_blockers_of_open_tasks(self):
+        blocked = self.graph().blocked()
+
+        self.assertEqual(blocked['b'], ['a'])
+        self.assertEqual(blocked['c'], ['b'])
+        self.assertNotIn('a', blocked)
+
+    def test_finished_blockers_do_not_block(self):
+        blocked = self.graph(a=task('a', status='done'), c=task('c', ['b'], status='archived')).blocked()
+
+        self.assertNotIn('b', blocked)
+        self.assertNotIn('d', blocked)
+        self.assertNotIn('c', blocked)
+
+    def test_would_create_cycle(self):
+        graph = self.graph()
+
+        self.assertTrue(graph.would_create_cycle('a', 'a'))
+        self.assertTrue(graph.would_create_cycle('a', 'c'))
+        self.assertFalse(graph.would_create_cycle('c', 'a'))
+        self.assertFalse(graph.would_create_cycle('d', 'c'))
+
+    def test_summary(self):
+        summary = self.graph().summary()
+
+        self.assertEqual(summary['task_count'], 6)
+        self.assertEqual(summary['edge_count'], 5)
+        self.assertEqual(summary['critical_path'], {'tasks': ['a', 'b', 'c'], 'length_days': 3})
+
+
+class WouldCreateCycleTests(SimpleTestCase):
+    """The collection-wide check, with the $graphLookup result faked"""
+
+    def test_self_edge_needs_no_query(self):
+        with mock.patch('tasks.graph.tasks_collection') as collection:
+            self.assertTrue(would_create_cycle('a', 'a'))
+        collection.aggregate.assert_not_called()
+
+    def test_transitive_dependent_closes_a_cycle(self):
+        with mock.patch('tasks.graph.tasks_collection') as collection:
+            collection.aggregate.return_value = [{'downstream': ['b', 'c']}]
+
+            self.assertTrue(would_create_cycle('a', 'c'))
+            self.assertFalse(would_create_cycle('a', 'x'))
+
+    def test_unknown_task_creates_no_cycle(self):
+        with mock.patch('tasks.graph.tasks_collection') as collection:
+            collection.aggregate.return_value = []
+
+            self.assertFalse(would_create_cycle('a', 'b'))
@@ -4,6 +4,8 @@ from .views import (
     TaskViewSet, CommentViewSet, AttachmentViewSet, 
     TaskCategoryViewSet, SecurityLevelViewSet
 )
+from .live import task_feed
+from . import async_views
 
 # Create a router and register our viewsets with explicit basenames
 router = DefaultRouter()
@@ -15,6 +17,14 @@ router.register(r'security-levels', SecurityLevelViewSet, basename='security-lev
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
+    # Must come before the router so 'live' isn't taken for a task ID
+    path('tasks/live/', task_feed, name='task-live-feed'),
+    
+    # Async read path, served concurrently when running under ASGI
+    path('async/tasks/', async_views.task_list, name='async-task-list'),
+    path('async/tasks/user/<str:user_id>/', async_views.user_tasks, name='async-user-tasks'),
+    path('async/tasks/<str:pk>/', async_views.task_detail, name='async-task-detail'),
+    
     path('', include(router.urls)),
     
     # Add custom user-specific task routes
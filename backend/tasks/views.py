@@ -6,21 +6,153 @@ from django.conf import settings
 from bson import ObjectId
 import datetime
 import json
+import logging
 
 from .serializers import (
     TaskSerializer, CommentSerializer, AttachmentSerializer, TaskHistorySerializer,
     TaskCategorySerializer, SecurityLevelSerializer
 )
 from people.permissions import IsTaskModifier, IsAdminOrManager
+from .search import search_tasks, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .graph import load_graph, would_create_cycle, DONE_STATUSES
+from .hierarchy import find_task, get_subtree, path_fields, set_parent
+from .deletion import cascade_archive, cascade_delete
+from .archive import find_archived_task, task_history_archive_collection
+from .pagination import paginate, page_size_param, set_next_cursor
+from people import user_cards
+from project.caching import get_reference_document, invalidate_reference_data
+from project.conditional import (
+    bump_collection_version, collection_validators, scope_validators,
+    not_modified_response, set_validators
+)
+
+logger = logging.getLogger(__name__)
 
 # Get MongoDB collections
 from .models import (
-    tasks_collection, comments_collection, attachments_collection, 
-    task_history_collection, categories_collection, security_levels_collection
+    Task, TaskCategory, SecurityLevel, tasks_collection, comments_collection, attachments_collection,
+    task_history_collection, categories_collection, security_levels_collection,
+    id_variants
 )
 users_collection = settings.MONGODB_DB['users']
 people_collection = settings.MONGODB_DB['people']
 teams_collection = settings.MONGODB_DB['teams']
+roles_collection = settings.MONGODB_DB['roles']
+
+
+def build_task_filters(params):
+    """
+    Build a task query from list filter parameters.
+    Raises ValueError with a client-facing message for invalid values.
+    """
+    query = {}
+    
+    if params.get('status'):
+        query['status'] = params.get('status')
+        
+    if params.get('priority'):
+        query['priority'] = params.get('priority')
+    
+    for field in ['category', 'assigned_to', 'team']:
+        if params.get(field):
+            try:
+                query[field] = ObjectId(params.get(field))
+            except:
+                raise ValueError(f"Invalid {field} ID")
+        
+    if params.get('due_before'):
+        try:
+            query['due_date'] = {'$lte': datetime.datetime.fromisoformat(params.get('due_before'))}
+        except:
+            raise ValueError("Invalid due_before date")
+        
+    if params.get('due_after'):
+        try:
+            if 'due_date' not in query:
+                query['due_date'] = {}
+            query['due_date']['$gte'] = datetime.datetime.fromisoformat(params.get('due_after'))
+        except:
+            raise ValueError("Invalid due_after date")
+    
+    return query
+
+
+def security_scope_query(user_id, security_level_ids, team_ids):
+    """Build the $or clauses limiting a regular user to the tasks they may see"""
+    security_query = [
+        {'security_level': {'$exists': False}},
+        {'security_level': None}
+    ]
+    
+    if security_level_ids:
+        security_query.append({'security_level': {'$in': security_level_ids}})
+    
+    # Tasks assigned to user
+    security_query.append({'assigned_to': ObjectId(str(user_id))})
+    
+    # Tasks for user's teams (as member or leader)
+    if team_ids:
+        security_query.append({'team': {'$in': team_ids}})
+    
+    return security_query
+
+
+def task_security_scope(user):
+    """
+    Get the security $or clauses for a user, or None if they may see all tasks
+    """
+    if hasattr(user, 'is_admin') and user.is_admin():
+        return None
+    if not hasattr(user, 'role') or not user.role:
+        return None
+    
+    # Find all security levels with required_permission_level less than or equal to user's level
+    security_level_ids = []
+    user_role = get_reference_document('roles', user.role)
+    if user_role and 'permission_level' in user_role:
+        security_level_ids = [
+            level['_id'] for level in SecurityLevel.get_all()
+            if 'required_permission_level' in level
+            and level['required_permission_level'] <= user_role['permission_level']
+        ]
+    
+    user_id = ObjectId(str(user.id))
+    team_ids = [
+        team['_id'] for team in teams_collection.find(
+            {'$or': [{'members': user_id}, {'leader': user_id}]},
+            {'_id': 1}
+        )
+    ]
+    
+    return security_scope_query(user_id, security_level_ids, team_ids)
+
+
+def attach_user_cards(documents, id_field, details_field):
+    """Add author details to documents with a single batched lookup"""
+    cards = user_cards.get_many([doc.get(id_field) for doc in documents])
+    for doc in documents:
+        card = cards.get(str(doc.get(id_field)))
+        if card:
+            doc[details_field] = card
+    return documents
+
+
+def person_details(card):
+    return {'id': card['id'], 'name': card['name'], 'role': card['role']}
+
+
+def attach_person_cards(tasks, fields=('assigned_to', 'assigned_by')):
+    """Add assignee/assigner details to tasks with a single batched lookup"""
+    cards = user_cards.get_many(
+        [task.get(field) for task in tasks for field in fields], user_cards.PERSON
+    )
+    for task in tasks:
+        for field in fields:
+            card = cards.get(str(task.get(field)))
+            if card:
+                task[f'{field}_details'] = person_details(card)
+    return tasks
+
 
 class TaskViewSet(viewsets.ViewSet):
     """
@@ -36,139 +168,71 @@ class TaskViewSet(viewsets.ViewSet):
     
     def list(self, request):
         """List all tasks"""
-        # Get query parameters
-        status_filter = request.query_params.get('status')
-        priority_filter = request.query_params.get('priority')
-        category_filter = request.query_params.get('category')
-        assigned_to_filter = request.query_params.get('assigned_to')
-        team_filter = request.query_params.get('team')
-        due_before = request.query_params.get('due_before')
-        due_after = request.query_params.get('due_after')
-        
-        # Build query
-        query = {}
-        
-        if status_filter:
-            query['status'] = status_filter
-            
-        if priority_filter:
-            query['priority'] = priority_filter
-            
-        if category_filter:
-            try:
-                query['category'] = ObjectId(category_filter)
-            except:
-                return Response({"error": "Invalid category ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        if assigned_to_filter:
-            try:
-                query['assigned_to'] = ObjectId(assigned_to_filter)
-            except:
-                return Response({"error": "Invalid assigned_to ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        if team_filter:
-            try:
-                query['team'] = ObjectId(team_filter)
-            except:
-                return Response({"error": "Invalid team ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        if due_before:
-            try:
-                query['due_date'] = {'$lte': datetime.datetime.fromisoformat(due_before)}
-            except:
-                return Response({"error": "Invalid due_before date"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        if due_after:
-            try:
-                if 'due_date' not in query:
-                    query['due_date'] = {}
-                query['due_date']['$gte'] = datetime.datetime.fromisoformat(due_after)
-            except:
-                return Response({"error": "Invalid due_after date"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            query = build_task_filters(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Security level filtering for regular users
-        user = request.user
-        if not hasattr(user, 'is_admin') or not user.is_admin():
-            if hasattr(user, 'role') and user.role:
-                security_query = [
-                    {'security_level': {'$exists': False}},
-                    {'security_level': None}
-                ]
-                
-                # Get user's permission level
-                user_role = roles_collection.find_one({'_id': ObjectId(user.role)})
-                if user_role and 'permission_level' in user_role:
-                    # Find all security levels with required_permission_level less than or equal to user's level
-                    security_levels = list(security_levels_collection.find(
-                        {'required_permission_level': {'$lte': user_role['permission_level']}}
-                    ))
-                    if security_levels:
-                        security_level_ids = [level['_id'] for level in security_levels]
-                        security_query.append({'security_level': {'$in': security_level_ids}})
-                
-                # Tasks assigned to user
-                security_query.append({'assigned_to': ObjectId(str(user.id))})
-                
-                # Tasks for user's teams
-                user_teams = list(teams_collection.find({'members': ObjectId(str(user.id))}))
-                if user_teams:
-                    team_ids = [team['_id'] for team in user_teams]
-                    security_query.append({'team': {'$in': team_ids}})
-                
-                # Tasks for teams where user is leader
-                led_teams = list(teams_collection.find({'leader': ObjectId(str(user.id))}))
-                if led_teams:
-                    led_team_ids = [team['_id'] for team in led_teams]
-                    security_query.append({'team': {'$in': led_team_ids}})
-                
-                # Add security query to main query
-                query['$or'] = security_query
+        security_query = task_security_scope(request.user)
+        if security_query:
+            query['$or'] = security_query
+        
+        # Answer polling clients from the validators before loading any documents
+        etag, last_modified = scope_validators(tasks_collection, query)
+        cached = not_modified_response(request, etag, last_modified)
+        if cached:
+            return cached
         
         # Get tasks from MongoDB
         tasks = list(tasks_collection.find(query).sort('created_at', -1))
         
-        # Process tasks for serialization
-        for task in tasks:
-            task['_id'] = str(task['_id'])
-            
-            if 'assigned_to' in task and task['assigned_to']:
-                # Get assignee details
-                assignee = people_collection.find_one({'_id': ObjectId(task['assigned_to'])})
-                if assignee:
-                    task['assigned_to_details'] = {
-                        'id': str(assignee['userId']),
-                        'name': assignee.get('name', ''),
-                        'role': assignee.get('role', '')
-                    }
-            
-            if 'assigned_by' in task and task['assigned_by']:
-                # Get assigned_by details
-                assigned_by = people_collection.find_one({'_id': ObjectId(task['assigned_by'])})
-                if assigned_by:
-                    task['assigned_by_details'] = {
-                        'id': str(assigned_by['userId']),
-                        'name': assigned_by.get('name', ''),
-                        'role': assigned_by.get('role', '')
-                    }
-            
-            if 'category' in task and task['category'] and isinstance(task['category'], ObjectId):
-                task['category'] = str(task['category'])
-            
-            if 'security_level' in task and task['security_level'] and isinstance(task['security_level'], ObjectId):
-                task['security_level'] = str(task['security_level'])
-            
-            if 'team' in task and task['team'] and isinstance(task['team'], ObjectId):
-                task['team'] = str(task['team'])
-            
-            if 'related_tasks' in task and task['related_tasks']:
-                task['related_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in task['related_tasks']]
-            
-            if 'blocking_tasks' in task and task['blocking_tasks']:
-                task['blocking_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in task['blocking_tasks']]
-        
+        # Enrich tasks with people details; ObjectIds are encoded by the renderer
+        attach_person_cards(tasks)
+
         serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
-    
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Search tasks by text and/or assignee name prefix"""
+        text = request.query_params.get('q', '').strip()
+        assignee_prefix = request.query_params.get('assignee', '').strip()
+        if not text and not assignee_prefix:
+            return Response(
+                {"error": "Provide a search query (q) or an assignee name prefix (assignee)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "Invalid page or page_size"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            query = build_task_filters(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        security_query = task_security_scope(request.user)
+        if security_query:
+            query['$or'] = security_query
+
+        tasks, total = search_tasks(text, query, assignee_prefix, page, page_size)
+
+        results = TaskSerializer(tasks, many=True).data
+        for result, task in zip(results, tasks):
+            if 'score' in task:
+                result['score'] = task['score']
+
+        return Response({
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'results': results
+        })
+
     def user_tasks(self, request, user_id=None):
         """Get tasks for a specific user"""
         try:
@@ -186,34 +250,14 @@ class TaskViewSet(viewsets.ViewSet):
             if assignee:
                 tasks = list(tasks_collection.find(query).sort('created_at', -1))
                 
-            # Process tasks for serialization
-            for task in tasks:
-                task['_id'] = str(task['_id'])
+            # Enrich tasks with people details
+            attach_person_cards(tasks)
 
-                task['assigned_to_details'] = {
-                    'id': str(assignee['_id']),
-                    'name': assignee.get('name', ''),
-                    'role': assignee.get('role', '')
-                }
-
-                assigned_by = people_collection.find_one({'_id': ObjectId(task['assigned_by'])})
-                task['assigned_by_details'] = {
-                    'id': str(assigned_by['_id']),
-                    'name': assigned_by.get('name', ''),
-                    'role': assigned_by.get('role', '')
-                }
-                    
-                if 'assigned_by' in task and task['assigned_by']:
-                    task['assigned_by'] = str(task['assigned_by'])
-                
-                if 'team' in task and task['team']:
-                    task['team'] = str(task['team'])
-            
             serializer = TaskSerializer(tasks, many=True)
             return Response(serializer.data)
             
         except Exception as e:
-            print(f"Error fetching user tasks: {str(e)}")
+            logger.error(f"Error fetching user tasks: {str(e)}")
             return Response(
                 {"error": f"Error fetching tasks: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -221,84 +265,60 @@ class TaskViewSet(viewsets.ViewSet):
     
     def retrieve(self, request, pk=None):
         """Get a specific task"""
-        task = tasks_collection.find_one({'_id': pk})
+        # Fall back to the archive for finished tasks moved out of the hot set
+        task = find_task(pk) or find_archived_task(pk)
         
         if not task:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Process task for serialization
-        task['_id'] = str(task['_id'])
-        
-        if 'assigned_to' in task and task['assigned_to'] and isinstance(task['assigned_to'], ObjectId):
-            task['assigned_to'] = str(task['assigned_to'])
-            
+        # Enrich task with related details; ObjectIds are encoded by the renderer
+        if 'assigned_to' in task and task['assigned_to']:
             # Get assignee details
-            assignee = people_collection.find_one({'_id': ObjectId(task['assigned_to'])})
-            if assignee:
-                task['assigned_to_details'] = {
-                    'id': str(assignee['_id']),
-                    'name': assignee.get('name', ''),
-                    'role': assignee.get('role', '')
-                }
-        
-        if 'assigned_by' in task and task['assigned_by'] and isinstance(task['assigned_by'], ObjectId):
-            task['assigned_by'] = str(task['assigned_by'])
-        
+            attach_person_cards([task], fields=('assigned_to',))
+
         if 'category' in task and task['category'] and isinstance(task['category'], ObjectId):
-            task['category'] = str(task['category'])
-            
             # Get category details
-            category = categories_collection.find_one({'_id': ObjectId(task['category'])})
+            category = get_reference_document('task_categories', task['category'])
             if category:
                 task['category_details'] = {
-                    'id': str(category['_id']),
+                    'id': category['_id'],
                     'name': category.get('name', ''),
                     'color_code': category.get('color_code', '#FF5733')
                 }
-        
+
         if 'security_level' in task and task['security_level'] and isinstance(task['security_level'], ObjectId):
-            task['security_level'] = str(task['security_level'])
-            
             # Get security level details
-            security_level = security_levels_collection.find_one({'_id': ObjectId(task['security_level'])})
+            security_level = get_reference_document('security_levels', task['security_level'])
             if security_level:
                 task['security_level_details'] = {
-                    'id': str(security_level['_id']),
+                    'id': security_level['_id'],
                     'name': security_level.get('name', ''),
                     'required_permission_level': security_level.get('required_permission_level', 1)
                 }
-        
+
         if 'team' in task and task['team'] and isinstance(task['team'], ObjectId):
-            task['team'] = str(task['team'])
-            
             # Get team details
-            team = teams_collection.find_one({'_id': ObjectId(task['team'])})
+            team = teams_collection.find_one({'_id': task['team']})
             if team:
                 task['team_details'] = {
-                    'id': str(team['_id']),
+                    'id': team['_id'],
                     'name': team.get('name', '')
                 }
-        
-        if 'related_tasks' in task and task['related_tasks']:
-            task['related_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in task['related_tasks']]
-        
-        if 'blocking_tasks' in task and task['blocking_tasks']:
-            task['blocking_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in task['blocking_tasks']]
-        
+
         serializer = TaskSerializer(task)
         return Response(serializer.data)
     
     def create(self, request):
         """Create a new task"""
-        # Log the received data for debugging
-        print("Received task data:", request.data)
+        logger.debug(f"Creating task with fields: {sorted(request.data)}")
     
         # Use a dictionary instead of serializer to avoid validation issues for MongoDB
         task_data = {}
     
         # Copy fields from request.data
         allowed_fields = ['title', 'description', 'status', 'priority', 'dueDate', 
-                        'assignedTo', 'assignedBy', 'team', 'category', 'aiGenerated']
+                        'assignedTo', 'assignedBy', 'team', 'category', 'aiGenerated',
+                        'parent', 'estimatedHours']
     
         for field in allowed_fields:
             if field in request.data:
@@ -312,6 +332,24 @@ class TaskViewSet(viewsets.ViewSet):
                 task_data['due_date'] = datetime.datetime.fromisoformat(request.data['dueDate'])
             except (ValueError, TypeError):
                 return Response({"error": "Invalid due date format"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Stored as a number so the subtree rollups can $sum it
+        if 'estimatedHours' in request.data:
+            if request.data['estimatedHours'] in (None, ''):
+                task_data['estimated_hours'] = None
+            else:
+                try:
+                    task_data['estimated_hours'] = float(request.data['estimatedHours'])
+                except (ValueError, TypeError):
+                    return Response({"error": "Invalid estimated hours"}, status=status.HTTP_400_BAD_REQUEST)
+    
+        # Place the task in the hierarchy
+        parent = None
+        if task_data.get('parent'):
+            parent = find_task(task_data['parent'], {'ancestors': 1})
+            if not parent:
+                return Response({"error": "Parent task not found"}, status=status.HTTP_400_BAD_REQUEST)
+        task_data.update(path_fields(parent))
     
         # Add created_at and updated_at timestamps
         task_data['created_at'] = datetime.datetime.now()
@@ -321,27 +359,11 @@ class TaskViewSet(viewsets.ViewSet):
         try:
             # Store assignedTo as ObjectId if possible, otherwise as string
             if 'assigned_to' in task_data and task_data['assigned_to']:
-                try:
-                    task_data['assigned_to'] = str(task_data['assigned_to'])
-                    # Test lookup to verify user exists
-                    user = users_collection.find_one({'_id': task_data['assigned_to']})
-                    if not user:
-                        # Try looking up in people collection
-                        user = people_collection.find_one({'_id': ObjectId(task_data['assigned_to'])})
-                except Exception as e:
-                    print(f"Warning: User lookup failed: {str(e)}")
+                task_data['assigned_to'] = str(task_data['assigned_to'])
             
             # Store assignedBy as ObjectId if possible, otherwise as string
             if 'assigned_by' in task_data and task_data['assigned_by']:
-                try:
-                    task_data['assigned_by'] = str(task_data['assigned_by'])
-                    # Test lookup to verify user exists
-                    user = users_collection.find_one({'_id': task_data['assigned_by']})
-                    if not user:
-                        # Try looking up in people collection
-                        user = people_collection.find_one({'_id': ObjectId(task_data['assigned_by'])})
-                except Exception as e:
-                    print(f"Warning: User lookup failed: {str(e)}")
+                task_data['assigned_by'] = str(task_data['assigned_by'])
         
             # Store team as ObjectId if possible, otherwise as string
             if 'team' in task_data and task_data['team']:
@@ -350,9 +372,9 @@ class TaskViewSet(viewsets.ViewSet):
                     # Test lookup to verify team exists
                     team = teams_collection.find_one({'_id': task_data['team']})
                 except Exception as e:
-                    print(f"Warning: Team lookup failed: {str(e)}")
+                    logger.warning(f"Team lookup failed: {str(e)}")
         except Exception as e:
-            print(f"Warning during ID conversion: {str(e)}")
+            logger.warning(f"Task id conversion failed: {str(e)}")
     
         # Insert task into MongoDB
         try:
@@ -372,44 +394,10 @@ class TaskViewSet(viewsets.ViewSet):
             # Get the created task
             created_task = tasks_collection.find_one({'_id': result.inserted_id})
         
-            # Process task for serialization (convert ObjectId to string)
-            created_task['_id'] = str(created_task['_id'])
-        
-            # Enrich with user and team details for better frontend display
-            if 'assigned_to' in created_task and created_task['assigned_to']:
-                created_task['assigned_to'] = str(created_task['assigned_to'])
-            
-                # Try to get user details
-                try:
-                    user = users_collection.find_one({'_id': created_task['assigned_to']})
-                    if user:
-                        created_task['assigned_to_details'] = {
-                            'id': str(user['_id']),
-                            'name': f"{user.get('first_name', '')} {user.get('last_name', '')}".strip(),
-                            'username': user.get('username', ''),
-                            'email': user.get('email', '')
-                    }
-                except Exception as e:
-                    print(f"Error enriching user details: {str(e)}")
-                
-            if 'assigned_by' in created_task and created_task['assigned_by']:
-                created_task['assigned_by'] = str(created_task['assigned_by'])
-            
-                # Try to get creator details
-                try:
-                    creator = users_collection.find_one({'_id': created_task['assigned_by']})
-                    if creator:
-                        created_task['assigned_by_details'] = {
-                            'id': str(creator['_id']),
-                            'name': f"{creator.get('first_name', '')} {creator.get('last_name', '')}".strip(),
-                            'username': creator.get('username', ''),
-                        }
-                except Exception as e:
-                    print(f"Error enriching creator details: {str(e)}")
-                
+            # Enrich with people and team details for better frontend display
+            attach_person_cards([created_task])
+
             if 'team' in created_task and created_task['team']:
-                created_task['team'] = str(created_task['team'])
-            
                 # Try to get team details
                 try:
                     team = teams_collection.find_one({'_id': created_task['team']})
@@ -419,26 +407,29 @@ class TaskViewSet(viewsets.ViewSet):
                             'name': team.get('name', '')
                         }
                 except Exception as e:
-                    print(f"Error enriching team details: {str(e)}")
+                    logger.warning(f"Error enriching team details: {str(e)}")
         
             return Response(created_task, status=status.HTTP_201_CREATED)
         
         except Exception as e:
-            print(f"Error creating task: {str(e)}")
+            logger.exception(f"Error creating task: {str(e)}")
             return Response({"error": f"Error creating task: {str(e)}"}, 
                       status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def update(self, request, pk=None):
         """Update a task"""
-        try:
-            task_id = ObjectId(pk)
-        except:
-            return Response({"error": "Invalid task ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        task = tasks_collection.find_one({'_id': task_id})
+        task = find_task(pk)
         
         if not task:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        task_id = task['_id']
+        
+        # Edges go through the dependencies action, which keeps both sides and rejects cycles
+        if 'blocking_tasks' in request.data or 'blocked_by_tasks' in request.data:
+            return Response(
+                {"error": "Change dependencies through the task's dependencies endpoint"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = TaskSerializer(data=request.data, partial=True)
         
@@ -465,6 +456,13 @@ class TaskViewSet(viewsets.ViewSet):
             if 'team' in update_data and update_data['team']:
                 update_data['team'] = ObjectId(update_data['team'])
             
+            # Re-parenting also rewrites the paths of the whole subtree
+            if 'parent' in update_data:
+                try:
+                    set_parent(task_id, update_data.pop('parent'))
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
             # Update task in MongoDB
             tasks_collection.update_one({'_id': task_id}, {'$set': update_data})
             
@@ -496,53 +494,22 @@ class TaskViewSet(viewsets.ViewSet):
             # Get the updated task
             updated_task = tasks_collection.find_one({'_id': task_id})
             
-            # Process task for serialization
-            updated_task['_id'] = str(updated_task['_id'])
-            
-            if 'assigned_to' in updated_task and updated_task['assigned_to'] and isinstance(updated_task['assigned_to'], ObjectId):
-                updated_task['assigned_to'] = str(updated_task['assigned_to'])
-            
-            if 'assigned_by' in updated_task and updated_task['assigned_by'] and isinstance(updated_task['assigned_by'], ObjectId):
-                updated_task['assigned_by'] = str(updated_task['assigned_by'])
-            
-            if 'category' in updated_task and updated_task['category'] and isinstance(updated_task['category'], ObjectId):
-                updated_task['category'] = str(updated_task['category'])
-            
-            if 'security_level' in updated_task and updated_task['security_level'] and isinstance(updated_task['security_level'], ObjectId):
-                updated_task['security_level'] = str(updated_task['security_level'])
-            
-            if 'team' in updated_task and updated_task['team'] and isinstance(updated_task['team'], ObjectId):
-                updated_task['team'] = str(updated_task['team'])
-            
-            if 'related_tasks' in updated_task and updated_task['related_tasks']:
-                updated_task['related_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in updated_task['related_tasks']]
-            
-            if 'blocking_tasks' in updated_task and updated_task['blocking_tasks']:
-                updated_task['blocking_tasks'] = [str(t) if isinstance(t, ObjectId) else t for t in updated_task['blocking_tasks']]
-            
             return Response(updated_task)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, pk=None):
-        """Delete a task"""
-        try:
-            task_id = ObjectId(pk)
-        except:
-            return Response({"error": "Invalid task ID"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        print("[DEBUG] Connected to collection:", tasks_collection.full_name)
-        task = tasks_collection.find_one({'_id': task_id})
+        """Delete a task with its subtasks, comments, attachments and history"""
+        task = find_task(pk, {'_id': 1})
         
         if not task:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Delete task from MongoDB
-        tasks_collection.delete_one({'_id': task_id})
-        
-        # Delete related comments and attachments
-        comments_collection.delete_many({'task_id': task_id})
-        attachments_collection.delete_many({'task_id': task_id})
+        # ?archive=true keeps the records (status 'archived') instead of deleting them
+        if request.query_params.get('archive', '').lower() in ('1', 'true', 'yes'):
+            cascade_archive([task['_id']], str(request.user.id))
+        else:
+            cascade_delete([task['_id']])
         
         return Response(status=status.HTTP_204_NO_CONTENT)
     
@@ -554,7 +521,7 @@ class TaskViewSet(viewsets.ViewSet):
         except:
             return Response({"error": "Invalid task ID"}, status=status.HTTP_400_BAD_REQUEST)
             
-        task = tasks_collection.find_one({'_id': task_id})
+        task = find_task(task_id, {'_id': 1})
         
         if not task:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -577,60 +544,130 @@ class TaskViewSet(viewsets.ViewSet):
         # Get created comment
         comment = comments_collection.find_one({'_id': result.inserted_id})
         
-        # Process for serialization
-        comment['_id'] = str(comment['_id'])
-        if 'author' in comment and isinstance(comment['author'], ObjectId):
-            comment['author'] = str(comment['author'])
-            
-            # Get author details
-            author = users_collection.find_one({'_id': ObjectId(comment['author'])})
-            if author:
-                comment['author_details'] = {
-                    'id': str(author['_id']),
-                    'username': author.get('username', ''),
-                    'first_name': author.get('first_name', ''),
-                    'last_name': author.get('last_name', '')
-                }
+        # Enrich with author details
+        attach_user_cards([comment], 'author', 'author_details')
         
         serializer = CommentSerializer(comment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
     def history(self, request, pk=None):
-        """Get task history"""
+        """Get task history, newest first, a page at a time (see X-Next-Cursor)"""
+        task_id = pk
+        
         try:
-            task_id = pk
-        except:
-            return Response({"error": "Invalid task ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        task = tasks_collection.find_one({'_id': task_id})
+            limit = page_size_param(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not task:
+        task = find_task(task_id, {'_id': 1})
+        
+        if task:
+            collection = task_history_collection
+        elif find_archived_task(task_id):
+            collection = task_history_archive_collection
+        else:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get history records
-        history = list(task_history_collection.find({'task_id': task_id}).sort('timestamp', -1))
+        try:
+            # History rows reference the task by both id forms
+            history, next_cursor = paginate(
+                collection, {'task_id': {'$in': id_variants([task_id])}}, 'timestamp', -1,
+                limit, request.query_params.get('cursor')
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Process for serialization
+        # Enrich with user details
         for record in history:
-            record['_id'] = str(record['_id'])
-            
-            if 'user_id' in record and isinstance(record['user_id'], ObjectId):
+            if isinstance(record.get('user_id'), ObjectId):
                 record['user'] = str(record['user_id'])
-                
-                # Get user details
-                user = users_collection.find_one({'_id': record['user_id']})
-                if user:
-                    record['user_details'] = {
-                        'id': str(user['_id']),
-                        'username': user.get('username', ''),
-                        'first_name': user.get('first_name', ''),
-                        'last_name': user.get('last_name', '')
-                    }
+        attach_user_cards(history, 'user_id', 'user_details')
         
         serializer = TaskHistorySerializer(history, many=True)
-        return Response(serializer.data)
-    
+        return set_next_cursor(Response(serializer.data), next_cursor)
+
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """Get a task with all its subtasks nested, with progress rollups"""
+        tree = get_subtree(pk)
+        
+        if not tree:
+            return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(tree)
+
+    @action(detail=False, methods=['get'], url_path='dependency-graph')
+    def dependency_graph(self, request):
+        """Get topological order, blocked tasks and critical path for a team or parent task"""
+        query = {}
+        for field in ['team', 'parent']:
+            if request.query_params.get(field):
+                query[field] = {'$in': id_variants([request.query_params.get(field)])}
+
+        security_query = task_security_scope(request.user)
+        if security_query:
+            query['$or'] = security_query
+
+        graph = load_graph(query)
+        return Response(graph.summary())
+
+    @action(detail=True, methods=['get', 'post'])
+    def dependencies(self, request, pk=None):
+        """Get a task's blockers and dependents, or add a blocker"""
+        task = find_task(pk)
+
+        if not task:
+            return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == 'POST':
+            blocking_task_id = request.data.get('blocking_task')
+            blocking_task = find_task(blocking_task_id, {'_id': 1}) if blocking_task_id else None
+            if not blocking_task:
+                return Response({"error": "Blocking task not found"}, status=status.HTTP_400_BAD_REQUEST)
+
+            if request.data.get('dry_run'):
+                return Response({'creates_cycle': would_create_cycle(task['_id'], blocking_task['_id'])})
+
+            if not Task.add_blocking_task(task['_id'], blocking_task['_id']):
+                return Response(
+                    {"error": "Adding this dependency would create a cycle"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            task = tasks_collection.find_one({'_id': task['_id']})
+
+        related_ids = list(task.get('blocking_tasks') or []) + list(task.get('blocked_by_tasks') or [])
+        related = {
+            str(related_task['_id']): related_task
+            for related_task in tasks_collection.find(
+                {'_id': {'$in': related_ids}}, {'title': 1, 'status': 1}
+            )
+        }
+
+        # Tasks the user can't list show up by id and status only
+        security_query = task_security_scope(request.user)
+        if security_query and related:
+            visible = {
+                str(related_task['_id'])
+                for related_task in tasks_collection.find(
+                    {'_id': {'$in': related_ids}, '$or': security_query}, {'_id': 1}
+                )
+            }
+            for related_id, related_task in related.items():
+                if related_id not in visible:
+                    related_task.pop('title', None)
+
+        def summarize(ids):
+            return [related[str(task_id)] for task_id in ids or [] if str(task_id) in related]
+
+        blockers = summarize(task.get('blocking_tasks'))
+        return Response({
+            'id': task['_id'],
+            'blocked': any(blocker.get('status') not in DONE_STATUSES for blocker in blockers),
+            'blocking_tasks': blockers,
+            'blocked_by_tasks': summarize(task.get('blocked_by_tasks'))
+        })
+
 class CommentViewSet(viewsets.ViewSet):
     """
     API endpoint for task comments.
@@ -645,33 +682,32 @@ class CommentViewSet(viewsets.ViewSet):
         return [permission() for permission in permission_classes]
     
     def list(self, request):
-        """List comments (with optional task filter)"""
+        """
+        List comments a page at a time (see X-Next-Cursor): a task's thread
+        oldest first, or the newest comments overall without a task filter
+        """
         task_id = request.query_params.get('task')
         
-        if task_id:
-            comments = list(comments_collection.find({'task_id': task_id}).sort('created_at', 1))
-        else:
-            comments = list(comments_collection.find().sort('created_at', -1).limit(50))
-        
-        # Process for serialization
-        for comment in comments:
-            comment['_id'] = str(comment['_id'])
-            
-            if 'author' in comment and isinstance(comment['author'], ObjectId):
-                comment['author'] = str(comment['author'])
-                
-                # Get author details
-                author = users_collection.find_one({'_id': ObjectId(comment['author'])})
-                if author:
-                    comment['author_details'] = {
-                        'id': str(author['_id']),
-                        'username': author.get('username', ''),
-                        'first_name': author.get('first_name', ''),
-                        'last_name': author.get('last_name', '')
-                    }
+        try:
+            limit = page_size_param(request.query_params)
+            if task_id:
+                comments, next_cursor = paginate(
+                    comments_collection, {'task_id': task_id}, 'created_at', 1,
+                    limit, request.query_params.get('cursor')
+                )
+            else:
+                comments, next_cursor = paginate(
+                    comments_collection, {}, 'created_at', -1,
+                    limit, request.query_params.get('cursor')
+                )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Enrich with author details
+        attach_user_cards(comments, 'author', 'author_details')
         
         serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        return set_next_cursor(Response(serializer.data), next_cursor)
     
     def retrieve(self, request, pk=None):
         """Get a specific comment"""
@@ -685,21 +721,8 @@ class CommentViewSet(viewsets.ViewSet):
         if not comment:
             return Response({"error": "Comment not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Process for serialization
-        comment['_id'] = str(comment['_id'])
-        
-        if 'author' in comment and isinstance(comment['author'], ObjectId):
-            comment['author'] = str(comment['author'])
-            
-            # Get author details
-            author = users_collection.find_one({'_id': ObjectId(comment['author'])})
-            if author:
-                comment['author_details'] = {
-                    'id': str(author['_id']),
-                    'username': author.get('username', ''),
-                    'first_name': author.get('first_name', ''),
-                    'last_name': author.get('last_name', '')
-                }
+        # Get author details
+        attach_user_cards([comment], 'author', 'author_details')
         
         serializer = CommentSerializer(comment)
         return Response(serializer.data)
@@ -724,21 +747,8 @@ class CommentViewSet(viewsets.ViewSet):
             # Get the created comment
             comment = comments_collection.find_one({'_id': result.inserted_id})
             
-            # Process for serialization
-            comment['_id'] = str(comment['_id'])
-            
-            if 'author' in comment and isinstance(comment['author'], ObjectId):
-                comment['author'] = str(comment['author'])
-                
-                # Get author details
-                author = users_collection.find_one({'_id': ObjectId(comment['author'])})
-                if author:
-                    comment['author_details'] = {
-                        'id': str(author['_id']),
-                        'username': author.get('username', ''),
-                        'first_name': author.get('first_name', ''),
-                        'last_name': author.get('last_name', '')
-                    }
+            # Get author details
+            attach_user_cards([comment], 'author', 'author_details')
             
             return Response(comment, status=status.HTTP_201_CREATED)
         
@@ -774,21 +784,8 @@ class CommentViewSet(viewsets.ViewSet):
             # Get updated comment
             updated_comment = comments_collection.find_one({'_id': comment_id})
             
-            # Process for serialization
-            updated_comment['_id'] = str(updated_comment['_id'])
-            
-            if 'author' in updated_comment and isinstance(updated_comment['author'], ObjectId):
-                updated_comment['author'] = str(updated_comment['author'])
-                
-                # Get author details
-                author = users_collection.find_one({'_id': ObjectId(updated_comment['author'])})
-                if author:
-                    updated_comment['author_details'] = {
-                        'id': str(author['_id']),
-                        'username': author.get('username', ''),
-                        'first_name': author.get('first_name', ''),
-                        'last_name': author.get('last_name', '')
-                    }
+            # Get author details
+            attach_user_cards([updated_comment], 'author', 'author_details')
             
             return Response(updated_comment)
         
@@ -838,22 +835,8 @@ class AttachmentViewSet(viewsets.ViewSet):
         else:
             attachments = list(attachments_collection.find().limit(50))
         
-        # Process for serialization
-        for attachment in attachments:
-            attachment['_id'] = str(attachment['_id'])
-            
-            if 'uploaded_by' in attachment and isinstance(attachment['uploaded_by'], ObjectId):
-                attachment['uploaded_by'] = str(attachment['uploaded_by'])
-                
-                # Get uploader details
-                uploader = users_collection.find_one({'_id': ObjectId(attachment['uploaded_by'])})
-                if uploader:
-                    attachment['uploaded_by_details'] = {
-                        'id': str(uploader['_id']),
-                        'username': uploader.get('username', ''),
-                        'first_name': uploader.get('first_name', ''),
-                        'last_name': uploader.get('last_name', '')
-                    }
+        # Enrich with uploader details
+        attach_user_cards(attachments, 'uploaded_by', 'uploaded_by_details')
         
         serializer = AttachmentSerializer(attachments, many=True)
         return Response(serializer.data)
@@ -870,21 +853,8 @@ class AttachmentViewSet(viewsets.ViewSet):
         if not attachment:
             return Response({"error": "Attachment not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Process for serialization
-        attachment['_id'] = str(attachment['_id'])
-        
-        if 'uploaded_by' in attachment and isinstance(attachment['uploaded_by'], ObjectId):
-            attachment['uploaded_by'] = str(attachment['uploaded_by'])
-            
-            # Get uploader details
-            uploader = users_collection.find_one({'_id': ObjectId(attachment['uploaded_by'])})
-            if uploader:
-                attachment['uploaded_by_details'] = {
-                    'id': str(uploader['_id']),
-                    'username': uploader.get('username', ''),
-                    'first_name': uploader.get('first_name', ''),
-                    'last_name': uploader.get('last_name', '')
-                }
+        # Get uploader details
+        attach_user_cards([attachment], 'uploaded_by', 'uploaded_by_details')
         
         serializer = AttachmentSerializer(attachment)
         return Response(serializer.data)
@@ -922,12 +892,6 @@ class AttachmentViewSet(viewsets.ViewSet):
             # Get the created attachment
             attachment = attachments_collection.find_one({'_id': result.inserted_id})
             
-            # Process for serialization
-            attachment['_id'] = str(attachment['_id'])
-            
-            if 'uploaded_by' in attachment and isinstance(attachment['uploaded_by'], ObjectId):
-                attachment['uploaded_by'] = str(attachment['uploaded_by'])
-            
             return Response(attachment, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -955,7 +919,7 @@ class AttachmentViewSet(viewsets.ViewSet):
                 default_storage.delete(attachment['file_path'])
             except Exception as e:
                 # Log error but continue with attachment deletion
-                print(f"Error deleting file: {str(e)}")
+                logger.warning(f"Error deleting file: {str(e)}")
         
         # Delete from MongoDB
         attachments_collection.delete_one({'_id': attachment_id})
@@ -977,14 +941,15 @@ class TaskCategoryViewSet(viewsets.ViewSet):
     
     def list(self, request):
         """List all categories"""
-        categories = list(categories_collection.find())
+        etag, last_modified = collection_validators('task_categories')
+        cached = not_modified_response(request, etag, last_modified)
+        if cached:
+            return cached
         
-        # Process for serialization
-        for category in categories:
-            category['_id'] = str(category['_id'])
+        categories = TaskCategory.get_all()
         
         serializer = TaskCategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified)
     
     def retrieve(self, request, pk=None):
         """Get a specific category"""
@@ -998,9 +963,6 @@ class TaskCategoryViewSet(viewsets.ViewSet):
         if not category:
             return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Process for serialization
-        category['_id'] = str(category['_id'])
-        
         serializer = TaskCategorySerializer(category)
         return Response(serializer.data)
     
@@ -1017,10 +979,11 @@ class TaskCategoryViewSet(viewsets.ViewSet):
             
             # Insert into MongoDB
             result = categories_collection.insert_one(category_data)
+            bump_collection_version('task_categories')
+            invalidate_reference_data('task_categories')
             
             # Get the created category
             category = categories_collection.find_one({'_id': result.inserted_id})
-            category['_id'] = str(category['_id'])
             
             return Response(category, status=status.HTTP_201_CREATED)
         
@@ -1045,10 +1008,11 @@ class TaskCategoryViewSet(viewsets.ViewSet):
             
             # Update in MongoDB
             categories_collection.update_one({'_id': category_id}, {'$set': update_data})
+            bump_collection_version('task_categories')
+            invalidate_reference_data('task_categories')
             
             # Get the updated category
             updated_category = categories_collection.find_one({'_id': category_id})
-            updated_category['_id'] = str(updated_category['_id'])
             
             return Response(updated_category)
         
@@ -1077,6 +1041,8 @@ class TaskCategoryViewSet(viewsets.ViewSet):
         
         # Delete from MongoDB
         categories_collection.delete_one({'_id': category_id})
+        bump_collection_version('task_categories')
+        invalidate_reference_data('task_categories')
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -1095,11 +1061,7 @@ class SecurityLevelViewSet(viewsets.ViewSet):
     
     def list(self, request):
         """List all security levels"""
-        security_levels = list(security_levels_collection.find())
-        
-        # Process for serialization
-        for level in security_levels:
-            level['_id'] = str(level['_id'])
+        security_levels = SecurityLevel.get_all()
         
         serializer = SecurityLevelSerializer(security_levels, many=True)
         return Response(serializer.data)
@@ -1116,15 +1078,11 @@ class SecurityLevelViewSet(viewsets.ViewSet):
         if not level:
             return Response({"error": "Security level not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Process for serialization
-        level['_id'] = str(level['_id'])
-        
         serializer = SecurityLevelSerializer(level)
         return Response(serializer.data)
     
     def create(self, request):
         """Create a new task"""
-        print("Received task data:", request.data)  # Log the received data
         serializer = TaskSerializer(data=request.data)
 
         if serializer.is_valid():
@@ -1136,14 +1094,14 @@ class SecurityLevelViewSet(viewsets.ViewSet):
             
             # Insert into MongoDB
             result = security_levels_collection.insert_one(level_data)
+            invalidate_reference_data('security_levels')
             
             # Get the created security level
             level = security_levels_collection.find_one({'_id': result.inserted_id})
-            level['_id'] = str(level['_id'])
             
             return Response(level, status=status.HTTP_201_CREATED)
         else:
-            print("Serializer errors:", serializer.errors)  # Log validation errors
+            logger.debug(f"Security level validation failed: {serializer.errors}")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
     def update(self, request, pk=None):
@@ -1165,10 +1123,10 @@ class SecurityLevelViewSet(viewsets.ViewSet):
             
             # Update in MongoDB
             security_levels_collection.update_one({'_id': level_id}, {'$set': update_data})
+            invalidate_reference_data('security_levels')
             
             # Get the updated security level
             updated_level = security_levels_collection.find_one({'_id': level_id})
-            updated_level['_id'] = str(updated_level['_id'])
             
             return Response(updated_level)
         
@@ -1197,5 +1155,6 @@ class SecurityLevelViewSet(viewsets.ViewSet):
         
         # Delete from MongoDB
         security_levels_collection.delete_one({'_id': level_id})
+        invalidate_reference_data('security_levels')
         
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
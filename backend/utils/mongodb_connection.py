@@ -33,4 +33,21 @@ def get_collection(collection_name):
         MongoDB collection object
     """
     db = get_database()
-    return db[collection_name]
\ No newline at end of file
+    return db[collection_name]
+
+# Shared async client for ASGI views; created lazily on the serving event loop
+_async_client = None
+
+def get_async_database():
+    """
+    Get the MongoDB database through the shared async (AsyncMongoClient) driver
+    
+    Returns:
+        AsyncDatabase object
+    """
+    global _async_client
+    if _async_client is None:
+        from pymongo import AsyncMongoClient
+        _async_client = AsyncMongoClient(settings.MONGODB_URI, serverSelectionTimeoutMS=5000)
+        logger.info(f"Created async MongoDB client for: {settings.MONGODB_DB_NAME}")
+    return _async_client[settings.MONGODB_DB_NAME]
@@ -25,6 +25,26 @@ apiClient.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+/**
+ * GET every page of a cursor-paginated endpoint
+ * @param {string} endpoint - API path
+ * @param {Object} params - Query parameters
+ * @returns {Promise<Array>} - Items from all pages, in order
+ */
+const fetchAllPages = async (endpoint, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await apiClient.get(endpoint, {
+      params: cursor ? { ...params, cursor } : params,
+    });
+    items.push(...response.data);
+    // The server sends X-Next-Cursor while more pages remain
+    cursor = response.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return items;
+};
+
 /**
  * Fetch tasks for a user
  * @param {string} userId - User ID
@@ -150,6 +170,21 @@ export const getTaskDetails = async (taskId) => {
   }
 };
 
+/**
+ * Search tasks by text and/or assignee name prefix
+ * @param {Object} params - { q, assignee, status, priority, page, page_size }
+ * @returns {Promise<Object>} - { count, page, page_size, results }
+ */
+export const searchTasks = async (params) => {
+  try {
+    const response = await apiClient.get('/tasks/search/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error searching tasks:', error);
+    throw error;
+  }
+};
+
 /**
  * Fetch people (users/teammates)
  * @param {string} userId - User ID
@@ -223,17 +258,51 @@ export const addTaskComment = async (taskId, content) => {
   }
 };
 
+/**
+ * Get a task's comments, oldest first
+ * @param {string} taskId - Task ID
+ * @returns {Promise<Array>} - Comments
+ */
+export const getTaskComments = async (taskId) => {
+  try {
+    return await fetchAllPages('/comments/', { task: taskId });
+  } catch (error) {
+    console.error('Error fetching task comments:', error);
+    return [];
+  }
+};
+
 /**
  * Get task history
  * @param {string} taskId - Task ID
- * @returns {Promise<Array>} - Task history entries
+ * @returns {Promise<Array>} - Task history entries, newest first
  */
 export const getTaskHistory = async (taskId) => {
   try {
-    const response = await apiClient.get(`/tasks/${taskId}/history/`);
-    return response.data;
+    return await fetchAllPages(`/tasks/${taskId}/history/`);
   } catch (error) {
     console.error('Error fetching task history:', error);
     return [];
   }
-};
\ No newline at end of file
+};
+
+/**
+ * Subscribe to live task, comment and history changes
+ * @param {Function} onEvent - Called with each change ({collection, operation, id, task_id, data});
+ *   operation 'remove' (with no data) means the task left the user's view and should be dropped
+ * @param {Function} onReset - Called when the client must refetch its tasks
+ * @returns {Function} - Unsubscribe function
+ */
+export const subscribeToTaskFeed = (onEvent, onReset) => {
+  const token = localStorage.getItem('token');
+  // EventSource can't send headers, so the token goes in the query string.
+  // It reconnects on its own and resumes from the last event ID.
+  const source = new EventSource(`${API_BASE_URL}/tasks/live/?token=${encodeURIComponent(token)}`);
+
+  ['tasks', 'comments', 'task_history'].forEach((collection) => {
+    source.addEventListener(collection, (event) => onEvent(JSON.parse(event.data)));
+  });
+  source.addEventListener('reset', () => onReset && onReset());
+
+  return () => source.close();
+};